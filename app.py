@@ -1,8 +1,73 @@
-from langchain_core.messages import HumanMessage
+import asyncio
 
 import chainlit as cl
+from chainlit.server import app as servidor
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from checkpointer import manter_checkpoints
+from agente import aquecer, esta_pronto, fechar_agente_async, transmitir_turno
+from google_calendar_functions import pre_carregar_agenda
+import pre_carregamento
+from metricas import exportar_prometheus
+
+
+def registrar_rota(caminho, funcao):
+    servidor.add_api_route(caminho, funcao, methods=["GET"])
+    # A rota curinga do frontend do Chainlit atende qualquer GET; a nossa precisa ser avaliada antes dela.
+    servidor.router.routes.insert(0, servidor.router.routes.pop())
+
+
+async def prontidao():
+    return JSONResponse({"pronto": esta_pronto()}, status_code=200 if esta_pronto() else 503)
+
+
+async def metricas_prometheus():
+    return PlainTextResponse(exportar_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+registrar_rota("/ready", prontidao)
+registrar_rota("/metrics", metricas_prometheus)
+
+_tarefa_aquecimento = None
+_tarefa_manutencao = None
+
+
+@cl.on_app_startup
+async def on_app_startup():
+    # O aquecimento roda em segundo plano: o servidor sobe imediatamente e /ready informa quando terminou.
+    global _tarefa_aquecimento, _tarefa_manutencao
+    _tarefa_aquecimento = asyncio.create_task(aquecer())
+    _tarefa_manutencao = asyncio.create_task(manter_checkpoints())
+
+
+@cl.on_app_shutdown
+async def on_app_shutdown():
+    if _tarefa_manutencao is not None:
+        _tarefa_manutencao.cancel()
+    await fechar_agente_async()
+
+
+def _conta_da_sessao():
+    # Com autenticação habilitada no Chainlit, cada usuário usa a sua conta do Google; sem ela, a conta padrão.
+    usuario = cl.user_session.get("user")
+    return usuario.identifier if usuario else ""
+
+
+@cl.on_chat_start
+async def on_chat_start():
+    # Os starters pedem a agenda dos próximos dias: ela é buscada enquanto o usuário escolhe ou digita.
+    tarefa = asyncio.create_task(asyncio.to_thread(pre_carregar_agenda, cl.context.session.id, _conta_da_sessao()))
+    cl.user_session.set("pre_carregamento", tarefa)
+
+
+@cl.on_chat_end
+async def on_chat_end():
+    # Espera o pré-carregamento terminar, para que ele não registre a agenda de uma sessão já encerrada.
+    tarefa = cl.user_session.get("pre_carregamento")
+    if tarefa is not None:
+        await tarefa
+    pre_carregamento.encerrar(cl.context.session.id)
 
-from agente import agente_google_calendar
 
 @cl.set_starters
 async def set_starters():
@@ -25,7 +90,26 @@ async def set_starters():
 
 @cl.on_message
 async def on_message(msg: cl.Message):
-    config = {"configurable": {"thread_id": cl.context.session.id}}
-    resposta = agente_google_calendar.invoke({"messages": [HumanMessage(content=msg.content)]}, config=config)
-    final_answer = cl.Message(content=resposta["messages"][-1].content)
+    final_answer = cl.Message(content="")
+    passos = {}
+
+    async for tipo, dados in transmitir_turno(msg.content, cl.context.session.id, _conta_da_sessao()):
+        if tipo == "token":
+            await final_answer.stream_token(dados)
+        elif tipo == "descartar" and final_answer.content.endswith(dados):
+            final_answer.content = final_answer.content[:-len(dados)]
+            await final_answer.update()
+        elif tipo == "tool_inicio":
+            passo = cl.Step(name=dados["name"], type="tool")
+            passo.input = dados["args"]
+            await passo.send()
+            passos[dados["id"]] = passo
+        elif tipo == "tool_fim":
+            passo = passos.pop(dados.tool_call_id, None)
+            if passo is not None:
+                passo.output = dados.content
+                await passo.update()
+        elif tipo == "final" and not final_answer.content:
+            final_answer.content = dados
+
     await final_answer.send()
\ No newline at end of file
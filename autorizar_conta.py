@@ -0,0 +1,23 @@
+"""
+Autoriza um usuário do Chainlit a usar o próprio Google Calendar: abre o fluxo de consentimento do OAuth e
+grava o token em `token files/`, com um hash do identificador do usuário no nome do arquivo.
+
+Uso, na raiz do repositório:
+    python autorizar_conta.py <identificador do usuário no Chainlit>
+"""
+import argparse
+
+from google_calendar_functions import credenciais
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Autoriza o acesso de um usuário ao próprio Google Calendar.")
+    parser.add_argument("conta", help="identificador do usuário no Chainlit (`cl.User.identifier`)")
+    args = parser.parse_args(argv)
+
+    credenciais.authorize(args.conta)
+    print(f"Conta {args.conta!r} autorizada.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import email.parser
+import hashlib
+import itertools
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, unquote, urlparse
+
+import httplib2
+
+FUSO_PADRAO = "America/Sao_Paulo"
+
+
+def _timestamp(valor: dict | str | None) -> float | None:
+    if not valor:
+        return None
+    if isinstance(valor, dict):
+        valor = valor.get("dateTime") or valor.get("date")
+    instante = datetime.fromisoformat(valor)
+    if instante.tzinfo is None:
+        instante = instante.astimezone()
+    return instante.timestamp()
+
+
+class ApiCalendarioFalsa:
+    """
+    Substituto local da API do Google Calendar v3 com a interface de transporte do httplib2
+    (`request(uri, method, body, headers)`), para ser entregue ao googleapiclient no lugar da rede.
+
+    Atende as rotas usadas pelo projeto: calendarList, calendars.insert, freeBusy e events
+    (list com paginação e syncToken, get, insert, patch e delete), além de requisições em lote.
+    `latencia` acrescenta uma espera fixa a cada troca HTTP para simular a rede; `falhas` é uma fila
+    de status HTTP devolvidos, em ordem, antes de atender as próximas requisições. Leituras trazem uma
+    ETag e respondem 304 a `If-None-Match` quando o conteúdo não mudou.
+    """
+
+    def __init__(self, eventos_por_calendario: dict[str, list[dict]] | None = None, latencia: float = 0.0):
+        self.calendarios: dict[str, dict[str, dict]] = {}
+        self.latencia = latencia
+        self.falhas: list[int] = []
+        self.requisicoes = 0
+        self.nao_modificadas = 0
+        self._sequencia = itertools.count(1)
+        self._alteracoes: list[tuple[int, str, dict]] = []
+        self._versao = 0
+        self._filtrados: dict[tuple, list[dict]] = {}
+        self._lock = threading.Lock()
+        for calendar_id, eventos in (eventos_por_calendario or {}).items():
+            self.calendarios[calendar_id] = {evento["id"]: evento for evento in eventos}
+
+    # Interface de transporte do httplib2.
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        with self._lock:
+            self.requisicoes += 1
+        if self.latencia:
+            time.sleep(self.latencia)
+        url = urlparse(uri)
+        if url.path.startswith("/batch"):
+            return self._lote(body, headers or {})
+        status, conteudo = self._rotear(method, url.path, parse_qs(url.query), body)
+        if method == "GET" and status == 200:
+            # ETag derivada do conteúdo: leituras condicionais de algo que não mudou recebem 304 sem corpo.
+            etag = '"%s"' % hashlib.sha1(json.dumps(conteudo, sort_keys=True).encode()).hexdigest()[:16]
+            if {chave.lower(): valor for chave, valor in (headers or {}).items()}.get("if-none-match") == etag:
+                with self._lock:
+                    self.nao_modificadas += 1
+                return httplib2.Response({"status": 304, "etag": etag}), b""
+            conteudo = {**conteudo, "etag": etag}
+        dados = json.dumps(conteudo).encode() if conteudo is not None else b""
+        return httplib2.Response({"status": status, "content-type": "application/json"}), dados
+
+    def _rotear(self, method, path, query, body):
+        with self._lock:
+            falha = self.falhas.pop(0) if self.falhas else None
+        if falha:
+            motivo = "rateLimitExceeded" if falha in (403, 429) else "backendError"
+            return falha, {"error": {"code": falha, "message": motivo, "errors": [{"reason": motivo}]}}
+
+        parametros = {chave: valores[0] for chave, valores in query.items()}
+        # /calendar/v3/<recurso>...
+        partes = [unquote(parte) for parte in path.split("/") if parte][2:]
+        corpo = json.loads(body) if body else None
+
+        with self._lock:
+            if partes[:3] == ["users", "me", "calendarList"]:
+                return 200, {"items": [
+                    {"id": calendar_id, "summary": calendar_id, "etag": '"1"', "accessRole": "owner",
+                     "primary": calendar_id == "primary", "timeZone": FUSO_PADRAO}
+                    for calendar_id in self.calendarios
+                ]}
+            if partes == ["calendars"] and method == "POST":
+                calendar_id = f"cal-{uuid.uuid4().hex[:8]}"
+                self.calendarios[calendar_id] = {}
+                return 200, {"id": calendar_id, **corpo}
+            if partes == ["freeBusy"]:
+                return 200, self._livre_ocupado(corpo)
+            if len(partes) >= 3 and partes[0] == "calendars" and partes[2] == "events":
+                return self._eventos(method, partes[1], partes[3] if len(partes) > 3 else None, parametros, corpo)
+        return 404, {"error": {"code": 404, "message": f"Rota desconhecida: {method} {path}"}}
+
+    def _registrar_alteracao(self, calendar_id, evento):
+        self._alteracoes.append((next(self._sequencia), calendar_id, evento))
+        self._versao += 1
+
+    def _eventos(self, method, calendar_id, event_id, parametros, corpo):
+        eventos = self.calendarios.get(calendar_id)
+        if eventos is None:
+            return 404, {"error": {"code": 404, "message": "Not Found"}}
+
+        if event_id is None and method == "GET":
+            return self._listar(calendar_id, eventos, parametros)
+        if event_id is None and method == "POST":
+            event_id = corpo.get("id") or uuid.uuid4().hex
+            if event_id in eventos:
+                return 409, {"error": {"code": 409, "message": "The requested identifier already exists.",
+                                       "errors": [{"reason": "duplicate"}]}}
+            evento = {**corpo, "id": event_id, "status": "confirmed"}
+            eventos[event_id] = evento
+            self._registrar_alteracao(calendar_id, evento)
+            return 200, evento
+
+        evento = eventos.get(event_id)
+        if evento is None:
+            return 404, {"error": {"code": 404, "message": "Not Found"}}
+        if evento.get("status") == "cancelled":
+            return 410, {"error": {"code": 410, "message": "Resource has been deleted"}}
+        if method == "GET":
+            return 200, evento
+        if method == "PATCH":
+            for chave, valor in corpo.items():
+                if isinstance(valor, dict) and isinstance(evento.get(chave), dict):
+                    evento[chave] = {**evento[chave], **valor}
+                else:
+                    evento[chave] = valor
+            self._registrar_alteracao(calendar_id, evento)
+            return 200, evento
+        if method == "DELETE":
+            evento["status"] = "cancelled"
+            self._registrar_alteracao(calendar_id, {"id": event_id, "status": "cancelled"})
+            return 204, None
+        return 405, {"error": {"code": 405, "message": "Method Not Allowed"}}
+
+    def _listar(self, calendar_id, eventos, parametros):
+        if parametros.get("syncToken"):
+            desde = int(parametros["syncToken"])
+            itens = [evento for sequencia, cid, evento in self._alteracoes if cid == calendar_id and sequencia > desde]
+        else:
+            # O filtro da janela é guardado para que as páginas seguintes da mesma listagem não o refaçam.
+            chave = (calendar_id, parametros.get("timeMin"), parametros.get("timeMax"),
+                     parametros.get("showDeleted"), self._versao)
+            itens = self._filtrados.get(chave)
+            if itens is None:
+                inicio = _timestamp(parametros.get("timeMin"))
+                fim = _timestamp(parametros.get("timeMax"))
+                # Como na API real, ocorrências canceladas de eventos recorrentes vêm mesmo sem `showDeleted`
+                # quando as recorrências não são expandidas (`singleEvents=false`).
+                itens = [
+                    evento for evento in eventos.values()
+                    if (evento.get("status") != "cancelled" or parametros.get("showDeleted") == "true"
+                        or (evento.get("recurringEventId") and parametros.get("singleEvents") != "true"))
+                    and (inicio is None or _timestamp(evento.get("end")) > inicio)
+                    and (fim is None or _timestamp(evento.get("start")) < fim)
+                ]
+                self._filtrados = {chave: itens}
+
+        deslocamento = int(parametros.get("pageToken") or 0)
+        tamanho = int(parametros.get("maxResults") or 250)
+        resposta = {"items": itens[deslocamento:deslocamento + tamanho], "timeZone": FUSO_PADRAO}
+        if deslocamento + tamanho < len(itens):
+            resposta["nextPageToken"] = str(deslocamento + tamanho)
+        else:
+            resposta["nextSyncToken"] = str(self._alteracoes[-1][0] if self._alteracoes else 0)
+        return 200, resposta
+
+    def _livre_ocupado(self, corpo):
+        inicio, fim = _timestamp(corpo["timeMin"]), _timestamp(corpo["timeMax"])
+        calendarios = {}
+        for item in corpo["items"]:
+            eventos = self.calendarios.get(item["id"])
+            if eventos is None:
+                calendarios[item["id"]] = {"errors": [{"domain": "global", "reason": "notFound"}]}
+                continue
+            calendarios[item["id"]] = {"busy": [
+                {"start": evento["start"]["dateTime"], "end": evento["end"]["dateTime"]}
+                for evento in eventos.values()
+                if "dateTime" in evento.get("start", {}) and evento.get("status") != "cancelled"
+                and _timestamp(evento["end"]) > inicio and _timestamp(evento["start"]) < fim
+            ]}
+        return {"kind": "calendar#freeBusy", "calendars": calendarios}
+
+    def _lote(self, body, headers):
+        if isinstance(body, str):
+            body = body.encode()
+        tipo = headers["content-type"].encode()
+        mensagem = email.parser.BytesParser().parsebytes(b"content-type: " + tipo + b"\r\n\r\n" + body)
+        fronteira = f"batch_{uuid.uuid4().hex}"
+        partes = []
+        for parte in mensagem.get_payload():
+            content_id = parte["Content-ID"].strip("<>")
+            linha, _, resto = parte.get_payload().partition("\n")
+            method, caminho, _ = linha.split(" ", 2)
+            separador = "\r\n\r\n" if "\r\n\r\n" in resto else "\n\n"
+            corpo = resto.partition(separador)[2].strip() or None
+            url = urlparse(caminho)
+            status, conteudo = self._rotear(method, url.path, parse_qs(url.query), corpo)
+            dados = json.dumps(conteudo) if conteudo is not None else ""
+            partes.append(
+                f"--{fronteira}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n\r\n{dados}\r\n"
+            )
+        conteudo = "".join(partes) + f"--{fronteira}--\r\n"
+        resp = httplib2.Response({"status": 200, "content-type": f"multipart/mixed; boundary={fronteira}"})
+        return resp, conteudo.encode()
+
+
+def gerar_eventos(quantidade: int, inicio: str = "2025-06-02T08:00:00-03:00", prefixo: str = "e") -> list[dict]:
+    """Eventos sintéticos de 30 a 75 minutos espalhados ao longo de dois meses, com até 7 participantes."""
+    base = datetime.fromisoformat(inicio)
+    eventos = []
+    for i in range(quantidade):
+        comeco = base + timedelta(minutes=(i * 37) % (60 * 24 * 60))
+        termino = comeco + timedelta(minutes=30 + (i % 4) * 15)
+        eventos.append({
+            "id": f"{prefixo}{i}",
+            "summary": f"Evento {i}",
+            "description": "Reunião sintética gerada para o benchmark.",
+            "status": "confirmed",
+            "start": {"dateTime": comeco.isoformat()},
+            "end": {"dateTime": termino.isoformat()},
+            "creator": {"email": "dono@exemplo.com"},
+            "organizer": {"email": "dono@exemplo.com"},
+            "attendees": [{"email": f"pessoa{j}@exemplo.com", "responseStatus": "accepted"} for j in range(i % 8)],
+        })
+    return eventos
+
+
+def gerar_recorrentes(quantidade: int, inicio: str = "2025-06-02T08:00:00-03:00", prefixo: str = "r") -> list[dict]:
+    """Eventos recorrentes sem data de término: reuniões diárias nos dias úteis e aulas semanais, alternadamente."""
+    base = datetime.fromisoformat(inicio)
+    eventos = []
+    for i in range(quantidade):
+        comeco = base + timedelta(days=i % 5, minutes=30 * (i % 16))
+        regra = "RRULE:FREQ=DAILY;BYDAY=MO,TU,WE,TH,FR" if i % 2 == 0 else "RRULE:FREQ=WEEKLY"
+        eventos.append({
+            "id": f"{prefixo}{i}",
+            "summary": f"Recorrente {i}",
+            "status": "confirmed",
+            "start": {"dateTime": comeco.isoformat(), "timeZone": FUSO_PADRAO},
+            "end": {"dateTime": (comeco + timedelta(minutes=30)).isoformat(), "timeZone": FUSO_PADRAO},
+            "recurrence": [regra],
+            "organizer": {"email": "dono@exemplo.com"},
+        })
+    return eventos
@@ -0,0 +1,187 @@
+"""
+Teste de carga: N sessões simultâneas, cada uma com o seu `thread_id`, conversando com o agente pelo mesmo
+caminho de `app.on_message` (`agente.transmitir_turno`), com o checkpointer SQLite, o espelho de eventos e
+as ferramentas reais. O LLM é o modelo roteirizado, com latência configurável, e a API do Google Calendar
+é a API falsa local.
+
+Uso, na raiz do repositório:
+    python -m benchmarks.carga                                  # 1, 5, 10, 25 e 50 sessões
+    python -m benchmarks.carga --sessoes 10 50 100 --turnos 5 --latencia-llm-ms 800 --latencia-api-ms 40
+
+Para cada nível de concorrência são medidos a vazão de turnos, a latência dos turnos (p50/p95/p99), o
+atraso do event loop (quanto um `sleep` de 10 ms demora além do pedido) e a disputa pelo SQLite: duração
+das escritas do checkpointer, espera pelo lock do espelho de eventos e erros de banco bloqueado. O teto
+é o maior nível cujo p95 fica dentro de `--slo-ms`.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+from benchmarks.executar import RAIZ, _instalar_api_falsa, _preparar_ambiente, percentil
+
+INTERVALO_MONITOR = 0.01
+TEXTO_TURNO = "Quais são os meus compromissos da próxima semana?"
+JANELA_TURNO = ("2025-06-09T00:00:00-03:00", "2025-06-14T00:00:00-03:00")
+
+
+class LockMedido:
+    """Substitui o `threading.Lock` do espelho, somando o tempo que cada thread espera para obtê-lo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.esperas: list[float] = []
+
+    def __enter__(self):
+        inicio = time.perf_counter()
+        self._lock.acquire()
+        self.esperas.append(time.perf_counter() - inicio)
+        return self
+
+    def __exit__(self, *excecao):
+        self._lock.release()
+
+
+def _medir_metodo(objeto, nome: str, amostras: list[float]):
+    original = getattr(objeto, nome)
+
+    async def medido(*args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return await original(*args, **kwargs)
+        finally:
+            amostras.append(time.perf_counter() - inicio)
+
+    setattr(objeto, nome, medido)
+
+
+async def monitorar_loop(atrasos: list[float]):
+    loop = asyncio.get_running_loop()
+    while True:
+        inicio = loop.time()
+        await asyncio.sleep(INTERVALO_MONITOR)
+        atrasos.append(max(loop.time() - inicio - INTERVALO_MONITOR, 0.0))
+
+
+async def sessao(agente, turnos: int, pausa: float, latencias: list[float], erros: dict):
+    thread_id = f"carga-{uuid.uuid4().hex}"
+    for _ in range(turnos):
+        inicio = time.perf_counter()
+        try:
+            async for _evento in agente.transmitir_turno(TEXTO_TURNO, thread_id):
+                pass
+            latencias.append(time.perf_counter() - inicio)
+        except Exception as e:
+            tipo = "banco_bloqueado" if "locked" in str(e) else type(e).__name__
+            erros[tipo] = erros.get(tipo, 0) + 1
+        if pausa:
+            await asyncio.sleep(pausa)
+
+
+async def executar_nivel(agente, sessoes: int, turnos: int, pausa: float, medidas: dict) -> dict:
+    for amostras in medidas.values():
+        amostras.clear()
+    latencias, atrasos, erros = [], [], {}
+    monitor = asyncio.create_task(monitorar_loop(atrasos))
+    inicio = time.perf_counter()
+    try:
+        await asyncio.gather(*(sessao(agente, turnos, pausa, latencias, erros) for _ in range(sessoes)))
+    finally:
+        duracao = time.perf_counter() - inicio
+        monitor.cancel()
+
+    def ms(amostras, p):
+        return round(percentil(amostras, p) * 1000, 2) if amostras else None
+
+    return {
+        "sessoes": sessoes,
+        "turnos": len(latencias),
+        "turnos_s": round(len(latencias) / duracao, 2),
+        "p50_ms": ms(latencias, 50),
+        "p95_ms": ms(latencias, 95),
+        "p99_ms": ms(latencias, 99),
+        "atraso_loop_p99_ms": ms(atrasos, 99),
+        "atraso_loop_max_ms": round(max(atrasos, default=0) * 1000, 2),
+        "checkpoint_p95_ms": ms(medidas["checkpoint"], 95),
+        "espera_espelho_p95_ms": ms(medidas["espelho"], 95),
+        "espera_espelho_total_ms": round(sum(medidas["espelho"]) * 1000, 2),
+        "erros": erros,
+    }
+
+
+def imprimir(resultados: list[dict], slo_ms: float):
+    print(f"{'sessões':>8}{'turnos':>8}{'turnos/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'loop p99':>10}{'loop máx':>10}{'ckpt p95':>10}{'espelho p95':>13}{'espelho total':>15}  erros")
+    for r in resultados:
+        print(f"{r['sessoes']:>8}{r['turnos']:>8}{r['turnos_s']:>10.1f}{r['p50_ms'] or 0:>10.1f}{r['p95_ms'] or 0:>10.1f}"
+              f"{r['p99_ms'] or 0:>10.1f}{r['atraso_loop_p99_ms'] or 0:>10.1f}{r['atraso_loop_max_ms']:>10.1f}"
+              f"{r['checkpoint_p95_ms'] or 0:>10.2f}{r['espera_espelho_p95_ms'] or 0:>13.3f}"
+              f"{r['espera_espelho_total_ms']:>15.1f}  {r['erros'] or ''}")
+
+    dentro = [r["sessoes"] for r in resultados if r["p95_ms"] is not None and r["p95_ms"] <= slo_ms and not r["erros"]]
+    if dentro:
+        print(f"\nTeto por worker: {max(dentro)} sessões simultâneas com p95 ≤ {slo_ms:.0f} ms e sem erros.")
+    else:
+        print(f"\nNenhum nível ficou com p95 ≤ {slo_ms:.0f} ms sem erros.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga com várias sessões simultâneas do agente.")
+    parser.add_argument("--sessoes", type=int, nargs="+", default=[1, 5, 10, 25, 50],
+                        help="níveis de concorrência (sessões simultâneas)")
+    parser.add_argument("--turnos", type=int, default=3, help="turnos por sessão")
+    parser.add_argument("--pausa-ms", type=float, default=0.0, help="tempo de leitura do usuário entre turnos")
+    parser.add_argument("--eventos", type=int, default=2_000, help="eventos sintéticos no calendário principal")
+    parser.add_argument("--latencia-llm-ms", type=float, default=300.0, help="latência simulada por chamada ao LLM")
+    parser.add_argument("--latencia-api-ms", type=float, default=20.0, help="latência simulada por troca HTTP")
+    parser.add_argument("--slo-ms", type=float, default=2_000.0, help="p95 máximo aceito por turno")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="carga-calendar-") as diretorio:
+        _preparar_ambiente(diretorio)
+        # O checkpointer e os rastros do agente são criados no diretório corrente.
+        os.chdir(diretorio)
+
+        import agente
+        import google_calendar_functions
+        from benchmarks.api_falsa import ApiCalendarioFalsa, gerar_eventos
+        from benchmarks.llm_falso import LLMRoteirizado
+
+        api = ApiCalendarioFalsa({"primary": gerar_eventos(args.eventos)}, latencia=args.latencia_api_ms / 1000)
+        _instalar_api_falsa(api)
+        logging.getLogger("agent_calendar").setLevel(logging.WARNING)
+        agente.llm = LLMRoteirizado(
+            chamadas=[{"name": "listar_eventos_calendario_tool",
+                       "args": {"max_capacity": 20, "time_min": JANELA_TURNO[0], "time_max": JANELA_TURNO[1]}}],
+            resposta_final="Estes são os seus compromissos da próxima semana.",
+            latencia=args.latencia_llm_ms / 1000,
+        )
+
+        async def executar():
+            medidas = {"checkpoint": [], "espelho": []}
+            await agente.obter_agente_async()
+            for metodo in ("aput", "aput_writes"):
+                _medir_metodo(agente._checkpointer_async, metodo, medidas["checkpoint"])
+            espelho = google_calendar_functions.obter_cliente("").espelho
+            espelho.lock = LockMedido()
+            medidas["espelho"] = espelho.lock.esperas
+            try:
+                resultados = []
+                for sessoes in args.sessoes:
+                    resultados.append(await executar_nivel(agente, sessoes, args.turnos, args.pausa_ms / 1000, medidas))
+                return resultados
+            finally:
+                await agente.fechar_agente_async()
+
+        resultados = asyncio.run(executar())
+        os.chdir(RAIZ)
+
+    imprimir(resultados, args.slo_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+Benchmarks offline do agente: o código real de `google_calendar_functions`, `calendar_tool` e do agente
+ReAct é executado contra a API falsa (`api_falsa.py`) e um modelo de chat roteirizado (`llm_falso.py`),
+sem rede nem credenciais.
+
+Uso, na raiz do repositório:
+    python -m benchmarks.executar                       # todos os cenários, 10 mil eventos
+    python -m benchmarks.executar --eventos 100000 --cenarios paginacao_api sincronizacao_completa
+    python -m benchmarks.executar --latencia-api-ms 20 --latencia-llm-ms 300
+    python -m benchmarks.executar --salvar              # acrescenta a execução ao histórico
+    python -m benchmarks.executar --historico           # p50/p95 de cada cenário por commit
+
+Cada execução é comparada com a última execução salva de mesmos parâmetros. Com `--salvar`, ela é
+acrescentada a `benchmarks/resultados.jsonl` junto com o commit medido; salve as medições citadas em um
+commit, para que possam ser conferidas.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARQUIVO_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados.jsonl")
+
+JANELA_LISTAGEM = ("2025-06-10T00:00:00-03:00", "2025-06-11T00:00:00-03:00")
+JANELA_RECORRENCIAS = ("2025-06-09T00:00:00-03:00", "2025-08-04T00:00:00-03:00")
+JANELA_DISPONIBILIDADE = ("2025-06-09T00:00:00-03:00", "2025-06-14T00:00:00-03:00")
+
+
+def _preparar_ambiente(diretorio: str):
+    """Variáveis lidas na importação dos módulos do projeto: precisam estar definidas antes dela."""
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    os.environ["ESPELHO_EVENTOS_DB"] = os.path.join(diretorio, "espelho.sqlite")
+    # O limitador de cota mediria a si mesmo; no benchmark ele fica fora do caminho.
+    os.environ["GOOGLE_API_TAXA_MAXIMA"] = "1000000000"
+    os.environ["GOOGLE_API_RAJADA_MAXIMA"] = "1000000000"
+    if RAIZ not in sys.path:
+        sys.path.insert(0, RAIZ)
+
+
+def _instalar_api_falsa(api):
+    """Faz o cliente da conta padrão de `google_calendar_functions` falar com a API falsa."""
+    from googleapiclient.discovery import build_from_document
+
+    import google_calendar_functions
+    from google_api import HttpPool, load_discovery_document
+
+    class HttpPoolFalso(HttpPool):
+        def _new_connection(self):
+            return api
+
+    documento = load_discovery_document(google_calendar_functions.API_NAME, google_calendar_functions.API_VERSION)
+    google_calendar_functions.registrar_cliente(
+        "", build_from_document(documento, http=api),
+        HttpPoolFalso(None, response_hook=google_calendar_functions._medir_resposta)
+    )
+
+
+def percentil(amostras: list[float], p: int) -> float:
+    if len(amostras) == 1:
+        return amostras[0]
+    return statistics.quantiles(amostras, n=100, method="inclusive")[p - 1]
+
+
+def resumir(amostras: list[float], itens: int = 0) -> dict:
+    total = sum(amostras)
+    resumo = {
+        "n": len(amostras),
+        "ops_s": round(len(amostras) / total, 2) if total else None,
+        "p50_ms": round(percentil(amostras, 50) * 1000, 3),
+        "p95_ms": round(percentil(amostras, 95) * 1000, 3),
+        "p99_ms": round(percentil(amostras, 99) * 1000, 3),
+    }
+    if itens:
+        resumo["itens_s"] = round(itens * len(amostras) / total, 1) if total else None
+    return resumo
+
+
+def medir(funcao, repeticoes: int) -> list[float]:
+    amostras = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        amostras.append(time.perf_counter() - inicio)
+    return amostras
+
+
+# ----------------------------------------
+# CENÁRIOS
+# ----------------------------------------
+
+def cenario_listar_espelho(contexto, repeticoes):
+    """Listagem de um dia pela ferramenta, respondida pelo espelho local já sincronizado."""
+    from calendar_tool import listar_eventos_calendario_tool
+
+    argumentos = {"max_capacity": 50, "time_min": JANELA_LISTAGEM[0], "time_max": JANELA_LISTAGEM[1]}
+    listar_eventos_calendario_tool.invoke(argumentos)
+    return resumir(medir(lambda: listar_eventos_calendario_tool.invoke(argumentos), repeticoes))
+
+
+def cenario_sincronizacao_completa(contexto, repeticoes):
+    """Primeira sincronização do espelho: todas as páginas de `events.list` gravadas no SQLite."""
+    import google_calendar_functions
+    from espelho_eventos import EspelhoEventos
+
+    def sincronizar():
+        caminho = os.path.join(contexto["diretorio"], f"espelho-{uuid.uuid4().hex}.sqlite")
+        espelho = EspelhoEventos(caminho, executar=google_calendar_functions.executar)
+        espelho.sincronizar(google_calendar_functions.obter_service(), "primary")
+        espelho.conexao.close()
+
+    return resumir(medir(sincronizar, max(3, repeticoes // 10)), contexto["eventos"])
+
+
+def cenario_paginacao_api(contexto, repeticoes):
+    """Listagem direta na API (`show_deleted`), percorrendo todas as páginas de 250 eventos."""
+    import google_calendar_functions
+
+    eventos = contexto["eventos"]
+    return resumir(medir(
+        lambda: google_calendar_functions.listar_eventos_calendario(max_capacity=eventos, show_deleted=True),
+        max(3, repeticoes // 10)
+    ), eventos)
+
+
+def cenario_recorrencias(contexto, repeticoes):
+    """Oito semanas de um calendário só com eventos recorrentes, expandidos localmente a partir do espelho."""
+    import google_calendar_functions
+
+    def listar():
+        return google_calendar_functions.listar_eventos_calendario("recorrentes", 10_000, *JANELA_RECORRENCIAS)
+
+    ocorrencias = len(listar())
+    return resumir(medir(listar, repeticoes), ocorrencias)
+
+
+def cenario_disponibilidade(contexto, repeticoes):
+    """Horários livres de uma semana a partir do free/busy."""
+    from calendar_tool import consultar_disponibilidade_tool
+
+    argumentos = {"time_min": JANELA_DISPONIBILIDADE[0], "time_max": JANELA_DISPONIBILIDADE[1], "duracao_minutos": 30}
+    return resumir(medir(lambda: consultar_disponibilidade_tool.invoke(argumentos), repeticoes))
+
+
+def cenario_disponibilidade_sessao(contexto, repeticoes):
+    """Primeira consulta de disponibilidade de uma sessão cuja agenda foi pré-carregada quando ela começou."""
+    import google_calendar_functions
+    import pre_carregamento
+    from calendar_tool import consultar_disponibilidade_tool
+
+    argumentos = {"time_min": JANELA_DISPONIBILIDADE[0], "time_max": JANELA_DISPONIBILIDADE[1], "duracao_minutos": 30}
+    amostras = []
+    for _ in range(repeticoes):
+        sessao = f"benchmark-{uuid.uuid4().hex}"
+        google_calendar_functions.pre_carregar_agenda(sessao, "", datetime.fromisoformat(JANELA_DISPONIBILIDADE[0]))
+        marca = pre_carregamento.sessao_atual.set(sessao)
+        try:
+            amostras.extend(medir(lambda: consultar_disponibilidade_tool.invoke(argumentos), 1))
+        finally:
+            pre_carregamento.sessao_atual.reset(marca)
+            pre_carregamento.encerrar(sessao)
+    return resumir(amostras)
+
+
+def cenario_criar_em_lote(contexto, repeticoes):
+    """Criação de 50 eventos em uma única requisição em lote."""
+    from calendar_tool import criar_eventos_em_lote_tool
+
+    eventos = [{"start": f"2025-07-01T{9 + i % 8:02d}:00:00-03:00", "end": f"2025-07-01T{9 + i % 8:02d}:30:00-03:00",
+                "summary": f"Lote {i}"} for i in range(50)]
+    argumentos = {"eventos": eventos, "calendar_id": "escrita", "send_notifications": False}
+    return resumir(medir(lambda: criar_eventos_em_lote_tool.invoke(argumentos), repeticoes), len(eventos))
+
+
+def cenario_criar_evento(contexto, repeticoes):
+    """Criação de um evento por vez, para comparar com o lote."""
+    import google_calendar_functions
+
+    return resumir(medir(lambda: google_calendar_functions.criar_evento_programado(
+        "2025-07-02T10:00:00-03:00", "2025-07-02T11:00:00-03:00", calendar_id="escrita", summary="Avulso"
+    ), repeticoes))
+
+
+def cenario_turno_agente(contexto, repeticoes):
+    """Turno completo do agente: LLM escolhe a ferramenta de listagem, ela executa e o LLM responde."""
+    import agente
+    from benchmarks.llm_falso import LLMRoteirizado
+
+    agente.llm = LLMRoteirizado(
+        chamadas=[{"name": "listar_eventos_calendario_tool",
+                   "args": {"max_capacity": 20, "time_min": JANELA_LISTAGEM[0], "time_max": JANELA_LISTAGEM[1]}}],
+        resposta_final="Você tem estes compromissos amanhã.",
+        latencia=contexto["latencia_llm"],
+    )
+
+    async def executar_turnos():
+        amostras = []
+        try:
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                async for _evento in agente.transmitir_turno("Quais são meus compromissos amanhã?",
+                                                             f"benchmark-{uuid.uuid4().hex}"):
+                    pass
+                amostras.append(time.perf_counter() - inicio)
+        finally:
+            await agente.fechar_agente_async()
+        return amostras
+
+    return resumir(asyncio.run(executar_turnos()))
+
+
+CENARIOS = {
+    "listar_espelho": cenario_listar_espelho,
+    "sincronizacao_completa": cenario_sincronizacao_completa,
+    "paginacao_api": cenario_paginacao_api,
+    "recorrencias": cenario_recorrencias,
+    "disponibilidade": cenario_disponibilidade,
+    "disponibilidade_sessao": cenario_disponibilidade_sessao,
+    "criar_em_lote": cenario_criar_em_lote,
+    "criar_evento": cenario_criar_evento,
+    "turno_agente": cenario_turno_agente,
+}
+
+
+# ----------------------------------------
+# HISTÓRICO
+# ----------------------------------------
+
+def _commit_atual() -> tuple[str | None, bool]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        alterado = bool(subprocess.run(["git", "status", "--porcelain"], cwd=RAIZ,
+                                       capture_output=True, text=True, check=True).stdout.strip())
+        return commit, alterado
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+
+
+def carregar_historico() -> list[dict]:
+    if not os.path.exists(ARQUIVO_RESULTADOS):
+        return []
+    with open(ARQUIVO_RESULTADOS, encoding="utf-8") as arquivo:
+        return [json.loads(linha) for linha in arquivo if linha.strip()]
+
+
+def salvar(execucao: dict):
+    with open(ARQUIVO_RESULTADOS, "a", encoding="utf-8") as arquivo:
+        arquivo.write(json.dumps(execucao, ensure_ascii=False) + "\n")
+
+
+def imprimir_resultados(cenarios: dict, anterior: dict | None):
+    print(f"{'cenário':<24}{'n':>5}{'ops/s':>10}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'itens/s':>11}  vs anterior (p50)")
+    for nome, resumo in cenarios.items():
+        comparacao = ""
+        base = (anterior or {}).get("cenarios", {}).get(nome)
+        if base and base["p50_ms"]:
+            comparacao = f"{(resumo['p50_ms'] / base['p50_ms'] - 1) * 100:+.1f}% ({anterior['commit']})"
+        print(f"{nome:<24}{resumo['n']:>5}{resumo['ops_s'] or 0:>10.1f}{resumo['p50_ms']:>11.2f}"
+              f"{resumo['p95_ms']:>11.2f}{resumo['p99_ms']:>11.2f}{resumo.get('itens_s') or 0:>11.0f}  {comparacao}")
+
+
+def imprimir_historico(filtro: list[str] | None):
+    for execucao in carregar_historico():
+        marca = "*" if execucao.get("alterado") else ""
+        parametros = ", ".join(f"{chave}={valor}" for chave, valor in execucao["parametros"].items())
+        print(f"{execucao['data'][:19]}  {execucao['commit']}{marca}  ({parametros})")
+        for nome, resumo in execucao["cenarios"].items():
+            if not filtro or nome in filtro:
+                print(f"    {nome:<24}p50 {resumo['p50_ms']:>10.2f} ms   p95 {resumo['p95_ms']:>10.2f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks offline do agente de calendário.")
+    parser.add_argument("--eventos", type=int, default=10_000, help="eventos sintéticos no calendário principal")
+    parser.add_argument("--repeticoes", type=int, default=30, help="medições por cenário")
+    parser.add_argument("--latencia-api-ms", type=float, default=0.0, help="latência simulada por troca HTTP")
+    parser.add_argument("--latencia-llm-ms", type=float, default=0.0, help="latência simulada por chamada ao LLM")
+    parser.add_argument("--cenarios", nargs="+", choices=sorted(CENARIOS), help="cenários a executar (padrão: todos)")
+    parser.add_argument("--salvar", action="store_true", help="acrescenta a execução ao histórico")
+    parser.add_argument("--historico", action="store_true", help="mostra as execuções salvas e sai")
+    args = parser.parse_args(argv)
+
+    if args.historico:
+        imprimir_historico(args.cenarios)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="benchmark-calendar-") as diretorio:
+        _preparar_ambiente(diretorio)
+        # O checkpointer do agente é criado no diretório corrente.
+        os.chdir(diretorio)
+
+        from benchmarks.api_falsa import ApiCalendarioFalsa, gerar_eventos, gerar_recorrentes
+
+        api = ApiCalendarioFalsa({"primary": gerar_eventos(args.eventos), "recorrentes": gerar_recorrentes(40),
+                                  "escrita": []},
+                                 latencia=args.latencia_api_ms / 1000)
+        _instalar_api_falsa(api)
+        # Um log por chamada de ferramenta distorceria as medições e esconderia o relatório.
+        logging.getLogger("agent_calendar").setLevel(logging.WARNING)
+
+        contexto = {"diretorio": diretorio, "eventos": args.eventos, "latencia_llm": args.latencia_llm_ms / 1000}
+        resultados = {}
+        for nome in args.cenarios or CENARIOS:
+            resultados[nome] = CENARIOS[nome](contexto, args.repeticoes)
+        os.chdir(RAIZ)
+
+    commit, alterado = _commit_atual()
+    parametros = {"eventos": args.eventos, "repeticoes": args.repeticoes,
+                  "latencia_api_ms": args.latencia_api_ms, "latencia_llm_ms": args.latencia_llm_ms}
+    execucao = {
+        "commit": commit,
+        "alterado": alterado,
+        "data": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "parametros": parametros,
+        "cenarios": resultados,
+    }
+    anterior = next((e for e in reversed(carregar_historico()) if e["parametros"] == parametros), None)
+    imprimir_resultados(resultados, anterior)
+    if args.salvar:
+        salvar(execucao)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import asyncio
+import time
+import uuid
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class LLMRoteirizado(BaseChatModel):
+    """
+    Modelo de chat determinístico para o `create_react_agent`: enquanto a última mensagem não for o resultado
+    de uma ferramenta, pede a próxima chamada do roteiro; depois disso, responde com o texto final.
+    `latencia` simula o tempo de resposta do provedor a cada chamada.
+    """
+
+    chamadas: list[dict] = []
+    resposta_final: str = "Pronto!"
+    latencia: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "roteirizado"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _responder(self, messages) -> ChatResult:
+        # Quantas ferramentas já foram chamadas desde a última mensagem do usuário.
+        executadas = 0
+        for mensagem in reversed(messages):
+            if isinstance(mensagem, HumanMessage):
+                break
+            executadas += isinstance(mensagem, ToolMessage)
+
+        if executadas < len(self.chamadas):
+            chamada = self.chamadas[executadas]
+            mensagem = AIMessage(content="", tool_calls=[
+                {"name": chamada["name"], "args": chamada.get("args", {}), "id": f"call_{uuid.uuid4().hex[:8]}"}
+            ])
+        else:
+            mensagem = AIMessage(content=self.resposta_final)
+        return ChatResult(generations=[ChatGeneration(message=mensagem)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latencia:
+            time.sleep(self.latencia)
+        return self._responder(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        # Como um cliente HTTP assíncrono de verdade, a espera não ocupa uma thread do executor.
+        if self.latencia:
+            await asyncio.sleep(self.latencia)
+        return self._responder(messages)
@@ -0,0 +1,70 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import unquote
+
+# Quantas respostas ficam em memória e por quanto tempo (segundos) uma resposta pode ser revalidada.
+CAPACIDADE_CACHE = int(os.getenv("GOOGLE_API_CACHE_CAPACIDADE", "512"))
+TTL_CACHE = float(os.getenv("GOOGLE_API_CACHE_TTL", "600"))
+
+_CALENDARIO_NA_URI = re.compile(r"/calendars/([^/?]+)")
+
+
+def calendario_da_uri(uri: str) -> str | None:
+    """ID do calendário a que a requisição se refere, quando há um na URI."""
+    encontrado = _CALENDARIO_NA_URI.search(uri)
+    return unquote(encontrado.group(1)) if encontrado else None
+
+
+class CacheRespostas:
+    """
+    Cache LRU com TTL das respostas de leitura da API, guardadas com a sua ETag. Uma leitura repetida é
+    reenviada com `If-None-Match`: se nada mudou, a API responde 304 sem corpo e a resposta guardada é
+    reaproveitada. As entradas são indexadas pela URI completa (método e parâmetros) e marcadas com o
+    calendário, para que as escritas invalidem só o que afetam.
+    """
+
+    def __init__(self, capacidade: int = CAPACIDADE_CACHE, ttl: float = TTL_CACHE):
+        self.capacidade = capacidade
+        self.ttl = ttl
+        # Cada resposta fica serializada: quem a recebe pode alterá-la sem afetar o que está guardado.
+        self._entradas: OrderedDict[str, tuple[str, str, float, str | None, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave: str) -> tuple[str, str] | None:
+        """ETag e resposta (em JSON) guardadas para `chave`, ou None se não houver ou se já tiverem expirado."""
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+            if time.monotonic() - entrada[2] > self.ttl:
+                del self._entradas[chave]
+                return None
+            self._entradas.move_to_end(chave)
+        return entrada[0], entrada[1]
+
+    def guardar(self, chave: str, etag: str, resposta: dict, calendar_id: str | None, metodo: str):
+        serializada = json.dumps(resposta)
+        with self._lock:
+            self._entradas[chave] = (etag, serializada, time.monotonic(), calendar_id, metodo)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)
+
+    def renovar(self, chave: str):
+        """Marca a entrada como recém-validada (resposta 304), reiniciando o seu TTL."""
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                self._entradas[chave] = (entrada[0], entrada[1], time.monotonic(), *entrada[3:])
+
+    def invalidar(self, calendar_id: str | None = None, prefixo_metodo: str | None = None):
+        """Descarta as entradas do calendário e/ou cujo método começa com `prefixo_metodo`."""
+        with self._lock:
+            for chave, (_, _, _, calendario, metodo) in list(self._entradas.items()):
+                if (calendar_id is None or calendario == calendar_id) \
+                        and (prefixo_metodo is None or metodo.startswith(prefixo_metodo)):
+                    del self._entradas[chave]
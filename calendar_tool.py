@@ -3,11 +3,18 @@ load_dotenv()
 
 from typing import Annotated, Optional
 
-from google_calendar_functions import cria_calendario, listar_calendarios, listar_eventos_calendario, criar_evento_programado, excluir_evento, atualizar_evento
+from google_calendar_functions import cria_calendario, listar_calendarios, listar_eventos_calendario, criar_evento_programado, excluir_evento, atualizar_evento, \
+    consultar_disponibilidade, criar_eventos_em_lote, atualizar_eventos_em_lote, excluir_eventos_em_lote, \
+    listar_eventos_varios_calendarios, planejar_tarefas
 from langchain_core.tools import tool
 
+from formatador_saida import CAMPOS_PADRAO_CALENDARIO, CAMPOS_PADRAO_EVENTO, COLUNAS_CALENDARIO, COLUNAS_EVENTO, \
+    codificar_tabela, validar_campos
+from metricas import medir_tool
+
 
 @tool
+@medir_tool("criar_calendario")
 def criar_calendario_tool(
     calendar_name: Annotated[str, "Nome do calendário que será criado"],
     timezone: Annotated[str, "Fuso horário do calendário (padrão: America/Sao_Paulo)"] = "America/Sao_Paulo"
@@ -25,29 +32,28 @@ def criar_calendario_tool(
     A função forma um dicionário com os dados do calendário e utiliza o método `insert` da API para
     criar o calendário. Em seguida, extrai e retorna o ID do calendário a partir da resposta.
     """
-    print("Tool `criar_calendario` foi chamada.")
     calendar_id = cria_calendario(calendar_name, timezone)
     return f"Calendário criado.\n summary: '{calendar_name}' | calendar_id: '{calendar_id}'."
 
 @tool
+@medir_tool("listar_calendarios")
 def listar_calendarios_tool(
-    max_capacity: Annotated[int, "Número máximo de calendários a recuperar."] = 200
-) -> list | str:
+    max_capacity: Annotated[int, "Número máximo de calendários a recuperar."] = 200,
+    campos: Annotated[Optional[list[str]], "Colunas retornadas, entre: id, nome, descricao, principal, fuso, acesso"] = None,
+    cursor: Annotated[int, "Posição a partir da qual continuar, informada no resultado anterior"] = 0
+) -> str:
     """
     Recupera listas de calendários da conta do Google Calendar, respeitando o limite definido por max_capacity.
 
     Parâmetros:
       max_capacity (int, opcional): Número máximo de calendários a serem recuperados. Se fornecido como string, a função a converte para inteiro. O padrão é 200.
+      campos (list, opcional): Colunas da tabela, entre 'id', 'nome', 'descricao', 'principal', 'fuso' e 'acesso'.
+                               O padrão é id, nome, principal, fuso e acesso.
+      cursor (int, opcional): Continua a listagem de onde o resultado anterior parou.
 
     Retorno:
-      list: Uma lista de dicionários. Cada dicionário contém os dados formatados do calendário, com as seguintes chaves:
-            - 'id': Identificador único do calendário.
-            - 'name': Nome ou resumo do calendário.
-            - 'description': Descrição do calendário (pode ser vazia).
-            - 'primary': Indica se é o calendário principal (True ou False).
-            - 'time_zone': Fuso horário associado ao calendário.
-            - 'etag': Identificador de versão do calendário.
-            - 'access_role': Papel de acesso do usuário ao calendário.
+      str: Tabela compacta com uma linha de cabeçalho (colunas separadas por '|') e um calendário por linha. Se houver
+           mais calendários do que cabem no resultado, a última linha informa o cursor para continuar.
 
     Funcionamento:
       A função realiza chamadas paginadas à API do Google Calendar. Em cada iteração, são recuperados até 200 itens
@@ -56,20 +62,24 @@ def listar_calendarios_tool(
       "limpos" para conter apenas os campos relevantes e retornados em uma lista.
     """
     try:
-        print("Tool `listar_calendarios` foi chamada.")
-        lista_de_calendarios = listar_calendarios(max_capacity)
-        return lista_de_calendarios
+        campos = validar_campos(campos, COLUNAS_CALENDARIO, CAMPOS_PADRAO_CALENDARIO)
+        lista_de_calendarios = listar_calendarios(cursor + int(max_capacity) + 1)[cursor:]
+        return codificar_tabela(lista_de_calendarios[:int(max_capacity)], COLUNAS_CALENDARIO, campos, "calendarios",
+                                cursor, ha_mais=len(lista_de_calendarios) > int(max_capacity))
     except Exception as e:
         return f"Falha na execução da ferramenta `listar_calendarios`. Erro: {e}"
 
 @tool
+@medir_tool("listar_eventos_calendario")
 def listar_eventos_calendario_tool(
     calendar_id: Annotated[str, "ID do calendário a ser consultado (padrão: 'primary')"] = 'primary',
     max_capacity: Annotated[int, "Número máximo de eventos a serem recuperados."] = 20,
     time_min: Annotated[Optional[str], "Data/hora mínima para o início dos eventos no formato RFC3339 (e.g., '2025-04-06T10:00:00-04:00')."] = None,
     time_max: Annotated[Optional[str], "Data/hora máxima para o término dos eventos no formato RFC3339 (e.g., '2025-04-06T10:00:00-04:00')."] = None,
-    show_deleted: Annotated[bool, "Indica se eventos deletados devem ser incluídos na listagem."] = False
-) -> list | str:
+    show_deleted: Annotated[bool, "Indica se eventos deletados devem ser incluídos na listagem."] = False,
+    campos: Annotated[Optional[list[str]], "Colunas retornadas, entre: id, inicio, fim, titulo, descricao, local, status, organizador, participantes, reuniao, recorrente"] = None,
+    cursor: Annotated[int, "Posição a partir da qual continuar, informada no resultado anterior"] = 0
+) -> str:
     """
         Recupera eventos de um calendário específico até atingir o número máximo de eventos definido (max_capacity).
 
@@ -79,25 +89,113 @@ def listar_eventos_calendario_tool(
           time_min (str, opcional): Data/hora mínima para o início dos eventos no formato RFC3339.
           time_max (str, opcional): Data/hora máxima para o término dos eventos no formato RFC3339.
           show_deleted (bool): Define se a listagem deve incluir eventos deletados (False por padrão).
+          campos (list, opcional): Colunas da tabela. O padrão é id, inicio, fim, titulo, local e participantes; peça
+                                   'descricao', 'reuniao' etc. apenas quando necessário.
+          cursor (int, opcional): Continua a listagem de onde o resultado anterior parou.
 
         Retorno:
-          list: Uma lista de eventos processados. Cada evento é representado por um dicionário.
+          str: Tabela compacta com uma linha de cabeçalho (colunas separadas por '|') e um evento por linha. Se houver
+               mais eventos do que cabem no resultado, a última linha informa o cursor para continuar.
 
         Funcionamento:
-          A função realiza uma consulta paginada na API do Google Calendar para recuperar os eventos do calendário
-          especificado. Em cada iteração, é solicitada uma quantidade de eventos limitada pelo valor mínimo entre 250
-          e a quantidade remanescente definida por max_capacity. O processo é repetido até que o total de eventos
-          coletados alcance max_capacity ou não existam mais páginas de resultados. Ao final, os eventos são processados
-          para extrair as informações relevantes e retornados em uma lista de dicionários.
+          Os eventos são lidos de um espelho local do calendário, atualizado pela sincronização incremental da API
+          do Google Calendar (apenas as alterações desde a última consulta trafegam pela rede). A consulta retorna os
+          eventos que se sobrepõem à janela [time_min, time_max), ordenados pelo início, até max_capacity itens. Quando
+          show_deleted é True, a consulta é feita diretamente na API, de forma paginada. Ao final, os eventos são
+          processados e serializados em uma tabela com apenas as colunas pedidas, limitada em tamanho.
         """
     try:
-        print("Tool `listar_eventos_calendario` foi chamada.")
-        lista_de_eventos = listar_eventos_calendario(calendar_id, max_capacity, time_min, time_max, show_deleted)
-        return lista_de_eventos
+        campos = validar_campos(campos, COLUNAS_EVENTO, CAMPOS_PADRAO_EVENTO)
+        lista_de_eventos = listar_eventos_calendario(calendar_id, cursor + int(max_capacity) + 1, time_min, time_max,
+                                                     show_deleted)[cursor:]
+        return codificar_tabela([evento.como_dict() for evento in lista_de_eventos[:int(max_capacity)]], COLUNAS_EVENTO,
+                                campos, "eventos", cursor, ha_mais=len(lista_de_eventos) > int(max_capacity))
     except Exception as e:
         return f"Falha na execução da ferramenta `listar_eventos_calendario`. Erro: {e}"
 
 @tool
+@medir_tool("listar_eventos_varios_calendarios")
+def listar_eventos_varios_calendarios_tool(
+    calendar_ids: Annotated[Optional[list[str]], "IDs dos calendários consultados (padrão: todos os calendários visíveis)"] = None,
+    max_capacity: Annotated[int, "Número máximo de eventos retornados no total."] = 50,
+    time_min: Annotated[Optional[str], "Data/hora mínima para o início dos eventos no formato RFC3339 (e.g., '2025-04-06T10:00:00-04:00')."] = None,
+    time_max: Annotated[Optional[str], "Data/hora máxima para o término dos eventos no formato RFC3339 (e.g., '2025-04-06T10:00:00-04:00')."] = None,
+    campos: Annotated[Optional[list[str]], "Colunas retornadas, entre: id, inicio, fim, titulo, descricao, local, status, organizador, participantes, reuniao, recorrente, calendarios"] = None,
+    cursor: Annotated[int, "Posição a partir da qual continuar, informada no resultado anterior"] = 0
+) -> str:
+    """
+    Recupera, em uma única chamada, os eventos de vários calendários (ou de todos) em uma lista única ordenada
+    pelo início. Use esta ferramenta para perguntas sobre a agenda como um todo, como "o que tenho amanhã?".
+
+    Parâmetros:
+      calendar_ids (list, opcional): IDs dos calendários consultados. Se omitido, consulta todos os calendários
+                                     visíveis da conta.
+      max_capacity (int): Número máximo de eventos retornados no total. O padrão é 50.
+      time_min (str, opcional): Data/hora mínima para o início dos eventos no formato RFC3339.
+      time_max (str, opcional): Data/hora máxima para o término dos eventos no formato RFC3339.
+      campos (list, opcional): Colunas da tabela. O padrão é id, inicio, fim, titulo, local, participantes e
+                               calendarios (IDs dos calendários onde o evento aparece).
+      cursor (int, opcional): Continua a listagem de onde o resultado anterior parou.
+
+    Retorno:
+      str: Tabela compacta com uma linha de cabeçalho (colunas separadas por '|') e um evento por linha, ordenada
+           pelo início. Se houver mais eventos do que cabem no resultado, uma linha informa o cursor para continuar;
+           calendários que não puderam ser consultados são listados ao final, com o motivo.
+
+    Funcionamento:
+      Os calendários são consultados em paralelo (com número limitado de consultas simultâneas) e os resultados,
+      já ordenados, são intercalados. Um mesmo evento presente em mais de um calendário aparece uma única vez.
+    """
+    try:
+        campos = validar_campos(campos, COLUNAS_EVENTO, CAMPOS_PADRAO_EVENTO + ("calendarios",))
+        resultado = listar_eventos_varios_calendarios(calendar_ids, cursor + int(max_capacity) + 1, time_min, time_max)
+        eventos = resultado['eventos'][cursor:]
+        tabela = codificar_tabela(eventos[:int(max_capacity)], COLUNAS_EVENTO, campos, "eventos", cursor,
+                                  ha_mais=len(eventos) > int(max_capacity))
+        if resultado.get('calendarios_com_erro'):
+            erros = "; ".join(f"{calendar_id}: {motivo}" for calendar_id, motivo in resultado['calendarios_com_erro'].items())
+            tabela += f"\ncalendarios com erro: {erros}"
+        return tabela
+    except Exception as e:
+        return f"Falha na execução da ferramenta `listar_eventos_varios_calendarios`. Erro: {e}"
+
+@tool
+@medir_tool("consultar_disponibilidade")
+def consultar_disponibilidade_tool(
+    time_min: Annotated[str, "Início do período de busca no formato RFC3339 (ex.: '2025-04-07T00:00:00-03:00')"],
+    time_max: Annotated[str, "Fim do período de busca no formato RFC3339 (ex.: '2025-04-12T00:00:00-03:00')"],
+    duracao_minutos: Annotated[int, "Duração mínima, em minutos, de cada horário livre"] = 60,
+    calendar_ids: Annotated[Optional[list[str]], "IDs dos calendários considerados (padrão: ['primary'])"] = None,
+    respeitar_expediente: Annotated[bool, "Considera apenas o horário de trabalho do usuário, sem o almoço"] = True,
+) -> dict | str:
+    """
+    Consulta a disponibilidade do usuário e retorna os horários livres com a duração mínima pedida.
+    Use esta ferramenta para perguntas de disponibilidade, em vez de listar eventos.
+
+    Parâmetros:
+      time_min (str): Início do período de busca no formato RFC3339.
+      time_max (str): Fim do período de busca no formato RFC3339.
+      duracao_minutos (int): Duração mínima, em minutos, de cada horário livre. O padrão é 60.
+      calendar_ids (list, opcional): IDs dos calendários cujos compromissos ocupam a agenda. O padrão é ['primary'].
+      respeitar_expediente (bool): Quando True (padrão), considera apenas o horário de trabalho do usuário (9h às 18h),
+                                   excluindo o almoço (12h às 13h).
+
+    Retorno:
+      dict: Dicionário com a chave 'horarios_livres', uma lista de janelas livres com as chaves 'inicio' e 'fim'
+            (RFC3339). Se algum calendário não puder ser consultado, a chave 'calendarios_com_erro' traz o motivo.
+
+    Funcionamento:
+      Faz uma única consulta free/busy à API do Google Calendar para todos os calendários informados, une os
+      períodos ocupados e os desconta das janelas de trabalho de cada dia do período, retornando apenas os
+      trechos livres com pelo menos a duração pedida.
+    """
+    try:
+        return consultar_disponibilidade(time_min, time_max, duracao_minutos, calendar_ids, respeitar_expediente)
+    except Exception as e:
+        return f"Falha na execução da ferramenta `consultar_disponibilidade`. Erro: {e}"
+
+@tool
+@medir_tool("criar_evento_programado")
 def criar_evento_programado_tool(
     start: Annotated[str, "Hora de início do evento no formato RFC3339 (ex.: '2025-04-06T10:00:00-04:00')"],
     end: Annotated[str, "Hora de término do evento no formato RFC3339 (ex.: '2025-04-06T11:00:00-04:00')"],
@@ -135,12 +233,12 @@ def criar_evento_programado_tool(
       - Tenta inserir o evento utilizando a API do Google Calendar e retorna uma mensagem com o ID do evento criado.
       - Em caso de falha na criação ou na comunicação com o serviço, retorna uma mensagem de erro apropriada.
     """
-    print("Tool `criar_evento_programado` foi chamada.")
     evento_criado = criar_evento_programado(start, end, calendar_id, timezone, summary, description, location, attendees, send_notifications)
     return evento_criado
 
 
 @tool
+@medir_tool("excluir_evento")
 def excluir_evento_tool(
     event_id: Annotated[str, "ID do evento a ser excluído"],
     send_notifications: Annotated[bool, "Enviar notificações de cancelamento aos participantes"] = True,
@@ -163,12 +261,12 @@ def excluir_evento_tool(
       sem problemas, a função retorna True. Se ocorrer qualquer erro durante a operação, o erro é
       impresso no console e a função retorna False.
     """
-    print("Tool `excluir_evento` foi chamada.")
     resposta = excluir_evento(event_id, send_notifications, calendar_id)
     return resposta
 
 
 @tool
+@medir_tool("atualizar_evento")
 def atualizar_evento_tool(
     event_id: Annotated[str, "ID do evento a ser atualizado"],
     calendar_id: Annotated[str, "ID do calendário onde o evento se encontra (padrão: 'primary')"] = 'primary',
@@ -205,6 +303,153 @@ def atualizar_evento_tool(
       - Caso a atualização seja bem-sucedida, retorna uma mensagem contendo o ID do evento e os campos atualizados;
         caso contrário, retorna uma mensagem informando que o evento não pôde ser atualizado.
     """
-    print("Tool `atualizar_evento` foi chamada.")
     resposta = atualizar_evento(event_id, calendar_id, start, end, timezone, summary, description, location)
-    return resposta
\ No newline at end of file
+    return resposta
+
+
+@tool
+@medir_tool("criar_eventos_em_lote")
+def criar_eventos_em_lote_tool(
+    eventos: Annotated[list[dict], "Lista de eventos. Cada evento é um dicionário com as chaves 'start' e 'end' (RFC3339) e, opcionalmente, 'summary', 'description', 'location', 'attendees', 'timezone' e 'calendar_id'"],
+    calendar_id: Annotated[str, "ID do calendário padrão onde os eventos serão criados (padrão: 'primary')"] = 'primary',
+    send_notifications: Annotated[bool, "Determina se notificações devem ser enviadas aos participantes"] = True,
+) -> list | str:
+    """
+    Cria vários eventos no Google Calendar de uma só vez. Prefira esta ferramenta a várias chamadas de
+    `criar_evento_programado_tool` quando houver mais de um evento para criar.
+
+    Parâmetros:
+      eventos (list): Lista de dicionários, um por evento, com as chaves:
+            - 'start' (str): Hora de início no formato RFC3339 (obrigatório).
+            - 'end' (str): Hora de término no formato RFC3339 (obrigatório).
+            - 'summary', 'description', 'location' (str, opcionais): Título, descrição e local do evento.
+            - 'attendees' (list, opcional): Lista de e-mails dos participantes.
+            - 'timezone' (str, opcional): Fuso horário IANA do evento. Padrão: "America/Sao_Paulo".
+            - 'calendar_id' (str, opcional): Calendário do evento, quando diferente do calendário padrão.
+      calendar_id (str): ID do calendário padrão. Padrão: 'primary'.
+      send_notifications (bool): Define se notificações devem ser enviadas aos participantes. Padrão: True.
+
+    Retorno:
+      list: Um resultado por evento, na mesma ordem da entrada, com as chaves 'indice', 'sucesso' e
+            'event_id' (em caso de sucesso) ou 'erro' (em caso de falha). Falhas em um item não impedem os demais.
+
+    Funcionamento:
+      Valida cada evento e envia todas as criações em requisições em lote da API do Google Calendar
+      (até 50 operações por requisição HTTP).
+    """
+    try:
+        return criar_eventos_em_lote(eventos, calendar_id, send_notifications)
+    except Exception as e:
+        return f"Falha na execução da ferramenta `criar_eventos_em_lote`. Erro: {e}"
+
+
+@tool
+@medir_tool("atualizar_eventos_em_lote")
+def atualizar_eventos_em_lote_tool(
+    atualizacoes: Annotated[list[dict], "Lista de atualizações. Cada item é um dicionário com a chave 'event_id' e, opcionalmente, 'start', 'end', 'timezone', 'summary', 'description', 'location' e 'calendar_id'"],
+    calendar_id: Annotated[str, "ID do calendário padrão onde os eventos se encontram (padrão: 'primary')"] = 'primary',
+) -> list | str:
+    """
+    Atualiza vários eventos do Google Calendar de uma só vez. Os campos não informados em cada item
+    permanecem com seus valores atuais. Use para alterações em massa, como mover todas as reuniões da semana.
+
+    Parâmetros:
+      atualizacoes (list): Lista de dicionários, um por evento, com as chaves:
+            - 'event_id' (str): ID do evento a ser atualizado (obrigatório).
+            - 'start', 'end' (str, opcionais): Novas datas/horas no formato RFC3339.
+            - 'timezone' (str, opcional): Novo fuso horário IANA.
+            - 'summary', 'description', 'location' (str, opcionais): Novos título, descrição e local.
+            - 'calendar_id' (str, opcional): Calendário do evento, quando diferente do calendário padrão.
+      calendar_id (str): ID do calendário padrão. Padrão: 'primary'.
+
+    Retorno:
+      list: Um resultado por item, na mesma ordem da entrada, com as chaves 'indice', 'sucesso' e
+            'event_id' (em caso de sucesso) ou 'erro' (em caso de falha). Falhas em um item não impedem os demais.
+
+    Funcionamento:
+      Valida cada atualização e envia todos os `patch` em requisições em lote da API do Google Calendar
+      (até 50 operações por requisição HTTP).
+    """
+    try:
+        return atualizar_eventos_em_lote(atualizacoes, calendar_id)
+    except Exception as e:
+        return f"Falha na execução da ferramenta `atualizar_eventos_em_lote`. Erro: {e}"
+
+
+@tool
+@medir_tool("excluir_eventos_em_lote")
+def excluir_eventos_em_lote_tool(
+    event_ids: Annotated[list[str], "Lista de IDs dos eventos a serem excluídos"],
+    calendar_id: Annotated[str, "ID do calendário de onde os eventos serão excluídos"] = "primary",
+    send_notifications: Annotated[bool, "Enviar notificações de cancelamento aos participantes"] = True,
+) -> list | str:
+    """
+    Exclui vários eventos do Google Calendar de uma só vez a partir dos seus IDs.
+
+    Parâmetros:
+      event_ids (list): IDs dos eventos que deverão ser excluídos.
+      calendar_id (str): ID do calendário de onde os eventos serão removidos. O padrão é 'primary'.
+      send_notifications (bool): Indica se deve enviar notificações de cancelamento para os participantes.
+                                  O valor padrão é True.
+
+    Retorno:
+      list: Um resultado por evento, na mesma ordem da entrada, com as chaves 'indice', 'event_id', 'sucesso'
+            e 'erro' (em caso de falha). Falhas em um item não impedem os demais.
+
+    Funcionamento:
+      Envia todas as exclusões em requisições em lote da API do Google Calendar (até 50 operações por
+      requisição HTTP).
+    """
+    try:
+        return excluir_eventos_em_lote(event_ids, calendar_id, send_notifications)
+    except Exception as e:
+        return f"Falha na execução da ferramenta `excluir_eventos_em_lote`. Erro: {e}"
+
+
+@tool
+@medir_tool("planejar_tarefas")
+def planejar_tarefas_tool(
+    tarefas: Annotated[list[dict], "Lista de tarefas. Cada tarefa é um dicionário com 'summary' e 'duracao_minutos' e, opcionalmente, 'prazo' (RFC3339), 'prioridade' (1 a 5, 1 é a mais alta), 'periodo' ('expediente' ou 'noite'), 'description' e 'location'"],
+    time_min: Annotated[Optional[str], "Início do período de planejamento no formato RFC3339 (padrão: agora)"] = None,
+    time_max: Annotated[Optional[str], "Fim do período de planejamento no formato RFC3339 (padrão: o maior prazo ou 7 dias)"] = None,
+    calendar_id: Annotated[str, "ID do calendário onde as tarefas serão agendadas (padrão: 'primary')"] = "primary",
+    calendar_ids_ocupados: Annotated[Optional[list[str]], "IDs dos calendários cujos compromissos ocupam a agenda (padrão: o calendar_id)"] = None,
+    incluir_fim_de_semana: Annotated[bool, "Permite agendar tarefas no sábado e no domingo"] = False,
+    apenas_simular: Annotated[bool, "Quando True, apenas propõe os horários, sem criar os eventos"] = False,
+) -> dict | str:
+    """
+    Agenda várias tarefas de uma vez nos horários livres do usuário, escolhendo o horário de cada uma. Use esta
+    ferramenta para planejar o dia ou a semana, em vez de consultar a disponibilidade e criar os eventos um a um.
+
+    Parâmetros:
+      tarefas (list): Lista de dicionários, um por tarefa, com as chaves:
+            - 'summary' (str): Título do evento (obrigatório).
+            - 'duracao_minutos' (int): Duração da tarefa em minutos (obrigatório).
+            - 'prazo' (str, opcional): Horário, no formato RFC3339, até o qual a tarefa deve estar concluída.
+            - 'prioridade' (int, opcional): De 1 (mais alta) a 5 (mais baixa). Padrão: 3.
+            - 'periodo' (str, opcional): 'expediente' (9h às 18h, sem o almoço; padrão) para tarefas de trabalho
+              ou 'noite' (20h às 23h) para estudos e projetos pessoais.
+            - 'description', 'location' (str, opcionais): Descrição e local do evento.
+      time_min (str, opcional): Início do período de planejamento. O padrão é o horário atual.
+      time_max (str, opcional): Fim do período de planejamento. O padrão é o maior prazo ou, sem prazos, 7 dias.
+      calendar_id (str): Calendário onde os eventos são criados. O padrão é 'primary'.
+      calendar_ids_ocupados (list, opcional): Calendários cujos compromissos devem ser respeitados. O padrão é o
+                                              calendar_id.
+      incluir_fim_de_semana (bool): Permite usar sábados e domingos. O padrão é False.
+      apenas_simular (bool): Quando True, retorna o plano sem criar os eventos, para o usuário confirmar.
+
+    Retorno:
+      dict: Dicionário com 'agendadas' (uma entrada por tarefa posicionada, com 'indice', 'summary', 'inicio', 'fim'
+            e, quando os eventos são criados, 'sucesso' e 'event_id' ou 'erro') e 'nao_agendadas' (tarefas que não
+            couberam ou são inválidas, com o 'motivo').
+
+    Funcionamento:
+      Faz uma única consulta free/busy, ordena as tarefas pelo prazo mais próximo, depois pela prioridade, e
+      posiciona cada uma no primeiro horário livre do seu período em que ela cabe, sem sobrepor compromissos
+      nem as tarefas já posicionadas. Os eventos são então criados em uma única requisição em lote.
+    """
+    try:
+        return planejar_tarefas(tarefas, time_min, time_max, calendar_id, calendar_ids_ocupados,
+                                incluir_fim_de_semana, apenas_simular)
+    except Exception as e:
+        return f"Falha na execução da ferramenta `planejar_tarefas`. Erro: {e}"
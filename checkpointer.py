@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+import uuid
+
+import aiosqlite
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from metricas import registrar
+
+CAMINHO_CHECKPOINTS = os.getenv("CHECKPOINTS_DB", "calendar_google.sqlite")
+# Conversas sem atividade há mais que isso são apagadas (segundos; padrão: 7 dias).
+IDADE_MAXIMA_THREAD = float(os.getenv("CHECKPOINTS_IDADE_MAXIMA", str(7 * 24 * 3600)))
+# Quantidade máxima de conversas mantidas; as menos recentes saem primeiro.
+MAXIMO_THREADS = int(os.getenv("CHECKPOINTS_MAXIMO_THREADS", "1000"))
+INTERVALO_MANUTENCAO = float(os.getenv("CHECKPOINTS_INTERVALO_MANUTENCAO", "900"))
+
+# WAL permite leituras concorrentes à escrita; com `synchronous=NORMAL` o commit não espera o fsync
+# (só o checkpoint do WAL espera), mantendo a latência de escrita baixa e constante. Com `auto_vacuum=INCREMENTAL`
+# (vale para bancos novos) a poda devolve as páginas livres aos poucos, sem o bloqueio exclusivo do VACUUM.
+PRAGMAS = (
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Intervalos de 100 ns entre a época dos UUIDs (1582-10-15) e a época Unix.
+_EPOCA_UUID = 0x01B21DD213814000
+
+
+def instante_checkpoint(checkpoint_id: str) -> float:
+    """Timestamp POSIX embutido no `checkpoint_id` (UUID v6) gerado pelo LangGraph."""
+    valor = uuid.UUID(checkpoint_id).int
+    tempo = ((valor >> 80) << 12) | ((valor >> 64) & 0x0FFF)
+    return (tempo - _EPOCA_UUID) / 10_000_000
+
+
+def conectar(caminho: str = CAMINHO_CHECKPOINTS) -> sqlite3.Connection:
+    conexao = sqlite3.connect(caminho, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conexao.execute(pragma)
+    return conexao
+
+
+def criar_checkpointer(caminho: str = CAMINHO_CHECKPOINTS) -> SqliteSaver:
+    """Checkpointer síncrono, para uso fora do event loop (scripts e o agente síncrono)."""
+    return SqliteSaver(conectar(caminho))
+
+
+async def abrir_checkpointer_async(caminho: str = CAMINHO_CHECKPOINTS) -> AsyncSqliteSaver:
+    """
+    Checkpointer assíncrono usado pelo app: as escritas de cada passo do agente rodam na thread do aiosqlite,
+    sem bloquear o event loop. Deve ser criado dentro do loop e fechado com `fechar_checkpointer_async`.
+    """
+    conexao = await aiosqlite.connect(caminho)
+    for pragma in PRAGMAS:
+        await conexao.execute(pragma)
+    saver = AsyncSqliteSaver(conexao)
+    await saver.setup()
+    return saver
+
+
+async def fechar_checkpointer_async(saver: AsyncSqliteSaver):
+    # A thread do aiosqlite não é daemon: sem fechar a conexão o processo não termina.
+    await saver.conn.close()
+
+
+def _liberar_paginas(conexao: sqlite3.Connection):
+    """
+    Devolve ao sistema as páginas livres com `incremental_vacuum`. Um banco criado antes do `auto_vacuum=INCREMENTAL`
+    passa por um único VACUUM completo, que é o que grava o novo modo no arquivo.
+    """
+    try:
+        if conexao.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conexao.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conexao.execute("VACUUM")
+        else:
+            # Pelo `execute` o pragma libera uma página por passo; `executescript` o executa até o fim.
+            conexao.executescript("PRAGMA incremental_vacuum")
+    except sqlite3.OperationalError:
+        # Outra conexão está escrevendo; o espaço livre é reaproveitado e a próxima rodada tenta de novo.
+        pass
+
+
+def podar(caminho: str = CAMINHO_CHECKPOINTS, idade_maxima: float = IDADE_MAXIMA_THREAD,
+          maximo_threads: int = MAXIMO_THREADS, compactar: bool = True) -> dict:
+    """
+    Apaga as conversas inativas há mais de `idade_maxima` segundos e as que excedem `maximo_threads`
+    (mantendo as mais recentes). Com `compactar`, cada conversa restante fica só com o checkpoint mais
+    recente, que já contém o estado completo; o histórico intermediário e as escritas pendentes antigas
+    são descartados. Usa uma conexão própria, então pode rodar em paralelo com o agente.
+    """
+    conexao = conectar(caminho)
+    try:
+        tabelas = {nome for nome, in conexao.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if "checkpoints" not in tabelas:
+            return {"threads_removidas": 0, "linhas_removidas": 0}
+
+        # IDs de checkpoint (UUID v6) crescem com o tempo, então o maior é o mais recente.
+        ultimos = conexao.execute("SELECT thread_id, MAX(checkpoint_id) FROM checkpoints GROUP BY thread_id").fetchall()
+        ultimos.sort(key=lambda linha: linha[1], reverse=True)
+        limite = time.time() - idade_maxima
+        removidas = [(thread_id,) for posicao, (thread_id, checkpoint_id) in enumerate(ultimos)
+                     if posicao >= maximo_threads or instante_checkpoint(checkpoint_id) < limite]
+
+        with conexao:
+            linhas_removidas = conexao.executemany("DELETE FROM checkpoints WHERE thread_id = ?", removidas).rowcount
+            linhas_removidas += conexao.executemany("DELETE FROM writes WHERE thread_id = ?", removidas).rowcount
+            if compactar:
+                linhas_removidas += conexao.execute(
+                    """
+                    DELETE FROM checkpoints WHERE checkpoint_id < (
+                        SELECT MAX(recente.checkpoint_id) FROM checkpoints AS recente
+                        WHERE recente.thread_id = checkpoints.thread_id
+                          AND recente.checkpoint_ns = checkpoints.checkpoint_ns
+                    )
+                    """
+                ).rowcount
+                linhas_removidas += conexao.execute(
+                    """
+                    DELETE FROM writes WHERE NOT EXISTS (
+                        SELECT 1 FROM checkpoints
+                        WHERE checkpoints.thread_id = writes.thread_id
+                          AND checkpoints.checkpoint_ns = writes.checkpoint_ns
+                          AND checkpoints.checkpoint_id = writes.checkpoint_id
+                    )
+                    """
+                ).rowcount
+                # Só os checkpoints cujo pai acabou de ser apagado; os demais já estão sem pai desde a rodada anterior.
+                conexao.execute(
+                    """
+                    UPDATE checkpoints SET parent_checkpoint_id = NULL
+                    WHERE parent_checkpoint_id IS NOT NULL
+                      AND parent_checkpoint_id NOT IN (SELECT checkpoint_id FROM checkpoints)
+                    """
+                )
+
+        if linhas_removidas:
+            conexao.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            _liberar_paginas(conexao)
+        return {"threads_removidas": len(removidas), "linhas_removidas": linhas_removidas}
+    finally:
+        conexao.close()
+
+
+async def manter_checkpoints(intervalo: float = INTERVALO_MANUTENCAO, caminho: str = CAMINHO_CHECKPOINTS):
+    """Tarefa de segundo plano do app: executa `podar` periodicamente, fora do event loop."""
+    while True:
+        try:
+            inicio = time.perf_counter()
+            resultado = await asyncio.to_thread(podar, caminho)
+            registrar("checkpoints_podados", duracao_s=round(time.perf_counter() - inicio, 4), **resultado)
+        except Exception as e:
+            registrar("poda_checkpoints_falhou", logging.WARNING, erro=str(e))
+        await asyncio.sleep(intervalo)
@@ -0,0 +1,106 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from perfil_usuario import FUSO_HORARIO, INICIO_EXPEDIENTE, FIM_EXPEDIENTE, INICIO_ALMOCO, FIM_ALMOCO, FIM_NOITE, \
+    FIM_PROJETOS_PESSOAIS
+
+
+def ler_instante(texto: str, fuso_horario: str = FUSO_HORARIO) -> datetime:
+    """Lê um instante ISO/RFC3339; sem deslocamento, é interpretado no fuso do usuário. Levanta ValueError se inválido."""
+    instante = datetime.fromisoformat(texto)
+    if instante.tzinfo is None:
+        instante = instante.replace(tzinfo=ZoneInfo(fuso_horario))
+    return instante
+
+
+def mesclar_intervalos(intervalos) -> list[tuple[datetime, datetime]]:
+    """Ordena e une intervalos sobrepostos ou adjacentes."""
+    mesclados = []
+    for inicio, fim in sorted(intervalos):
+        if mesclados and inicio <= mesclados[-1][1]:
+            if fim > mesclados[-1][1]:
+                mesclados[-1] = (mesclados[-1][0], fim)
+        else:
+            mesclados.append((inicio, fim))
+    return mesclados
+
+
+class IntervalosOcupados:
+    """
+    Conjunto de intervalos ocupados, mantido mesclado e ordenado. Como os intervalos não se sobrepõem,
+    os fins também ficam ordenados e a busca pelos intervalos que tocam uma janela é feita com bisect.
+    """
+
+    def __init__(self, intervalos=()):
+        self.intervalos = mesclar_intervalos(intervalos)
+        self._fins = [fim for _, fim in self.intervalos]
+
+    def livres(self, inicio: datetime, fim: datetime) -> list[tuple[datetime, datetime]]:
+        """Trechos livres dentro da janela [inicio, fim)."""
+        livres = []
+        cursor = inicio
+        for ocupado_inicio, ocupado_fim in self.intervalos[bisect_right(self._fins, inicio):]:
+            if ocupado_inicio >= fim:
+                break
+            if ocupado_inicio > cursor:
+                livres.append((cursor, ocupado_inicio))
+            cursor = max(cursor, ocupado_fim)
+        if cursor < fim:
+            livres.append((cursor, fim))
+        return livres
+
+
+# Blocos do dia em que o usuário aceita compromissos, conforme o perfil: o expediente (sem o almoço) e a noite,
+# depois da academia/aula de inglês, reservada a estudos e projetos pessoais.
+PERIODOS = {
+    "expediente": ((INICIO_EXPEDIENTE, INICIO_ALMOCO), (FIM_ALMOCO, FIM_EXPEDIENTE)),
+    "noite": ((FIM_NOITE, FIM_PROJETOS_PESSOAIS),),
+}
+
+
+def janelas_do_periodo(dia, fuso: ZoneInfo, periodo: str = "expediente") -> list[tuple[datetime, datetime]]:
+    return [(datetime.combine(dia, inicio, fuso), datetime.combine(dia, fim, fuso)) for inicio, fim in PERIODOS[periodo]]
+
+
+def _janelas_do_dia(dia, fuso: ZoneInfo, respeitar_expediente: bool):
+    if not respeitar_expediente:
+        inicio = datetime.combine(dia, datetime.min.time(), fuso)
+        return [(inicio, inicio + timedelta(days=1))]
+    return janelas_do_periodo(dia, fuso, "expediente")
+
+
+def horarios_livres(
+        ocupados: IntervalosOcupados,
+        time_min: datetime,
+        time_max: datetime,
+        duracao: timedelta,
+        respeitar_expediente: bool = True,
+        fuso_horario: str = FUSO_HORARIO,
+) -> list[tuple[datetime, datetime]]:
+    """
+    Janelas livres de pelo menos `duracao` entre time_min e time_max. Com `respeitar_expediente`,
+    considera apenas o horário de trabalho do usuário, excluindo o almoço.
+    """
+    fuso = ZoneInfo(fuso_horario)
+    time_min = time_min.astimezone(fuso)
+    time_max = time_max.astimezone(fuso)
+
+    janelas = []
+    dia = time_min.date()
+    while dia <= time_max.date():
+        for inicio, fim in _janelas_do_dia(dia, fuso, respeitar_expediente):
+            inicio, fim = max(inicio, time_min), min(fim, time_max)
+            if inicio < fim:
+                janelas.append((inicio, fim))
+        dia += timedelta(days=1)
+
+    # Janelas contíguas (ex.: dias inteiros seguidos) são unidas antes de descontar os compromissos.
+    livres = []
+    for inicio, fim in mesclar_intervalos(janelas):
+        livres.extend(
+            (livre_inicio.astimezone(fuso), livre_fim.astimezone(fuso))
+            for livre_inicio, livre_fim in ocupados.livres(inicio, fim)
+            if livre_fim - livre_inicio >= duracao
+        )
+    return livres
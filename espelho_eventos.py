@@ -0,0 +1,277 @@
+import heapq
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from itertools import islice
+from zoneinfo import ZoneInfo
+
+from googleapiclient.errors import HttpError
+
+from metricas import cronometrar, espelho_duracao, registrar
+from modelos import CAMPOS_LISTA_EVENTOS
+from recorrencia import expandir, fim_da_recorrencia, regra
+
+CAMINHO_ESPELHO = os.getenv("ESPELHO_EVENTOS_DB", "calendar_events.sqlite")
+INTERVALO_MINIMO_SYNC = float(os.getenv("ESPELHO_EVENTOS_INTERVALO_SYNC", "30"))
+FUSO_PADRAO = "America/Sao_Paulo"
+# Incrementada quando o formato das tabelas muda; espelhos de versão anterior são refeitos do zero.
+VERSAO_ESQUEMA = 2
+
+
+def para_timestamp(valor: dict | str | None, fuso: str = FUSO_PADRAO) -> float | None:
+    """Converte um `start`/`end` da API (ou uma string RFC3339) em timestamp POSIX."""
+    if not valor:
+        return None
+    if isinstance(valor, dict):
+        fuso = valor.get("timeZone") or fuso
+        valor = valor.get("dateTime") or valor.get("date")
+        if not valor:
+            return None
+    instante = datetime.fromisoformat(valor)
+    if instante.tzinfo is None:
+        instante = instante.replace(tzinfo=ZoneInfo(fuso))
+    return instante.timestamp()
+
+
+class EspelhoEventos:
+    """
+    Cópia local dos eventos de cada calendário, mantida pela sincronização incremental da API
+    (`syncToken`/`nextSyncToken`). Consultas por intervalo são respondidas pela tabela indexada
+    por início/fim, sem custo de cota.
+
+    Eventos recorrentes são guardados como a API os define (o evento mestre com a `recurrence` e as
+    exceções: ocorrências alteradas ou canceladas) e expandidos localmente para a janela consultada,
+    em vez de uma linha por ocorrência vinda do servidor.
+    """
+
+    def __init__(self, caminho: str = CAMINHO_ESPELHO, intervalo_minimo_sync: float = INTERVALO_MINIMO_SYNC,
+                 executar=lambda requisicao: requisicao.execute()):
+        self.intervalo_minimo_sync = intervalo_minimo_sync
+        self.executar = executar
+        self.conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self.lock = threading.Lock()
+        self._locks_sync: dict[str, threading.Lock] = {}
+        self._ultimo_sync: dict[str, float] = {}
+        self._criar_tabelas()
+
+    def _criar_tabelas(self):
+        with self.lock:
+            self.conexao.execute("PRAGMA journal_mode=WAL")
+            versao, = self.conexao.execute("PRAGMA user_version").fetchone()
+            if versao < VERSAO_ESQUEMA:
+                # Espelhos antigos guardavam as ocorrências já expandidas: são descartados e sincronizados de novo.
+                self.conexao.executescript(
+                    """
+                    DROP TABLE IF EXISTS eventos;
+                    DROP TABLE IF EXISTS sincronizacao;
+                    """
+                )
+            self.conexao.executescript(
+                f"""
+                CREATE TABLE IF NOT EXISTS eventos (
+                    calendar_id TEXT NOT NULL,
+                    event_id TEXT NOT NULL,
+                    inicio REAL,
+                    fim REAL,
+                    recurso TEXT NOT NULL,
+                    PRIMARY KEY (calendar_id, event_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_eventos_intervalo ON eventos (calendar_id, inicio, fim);
+                CREATE TABLE IF NOT EXISTS recorrencias (
+                    calendar_id TEXT NOT NULL,
+                    event_id TEXT NOT NULL,
+                    inicio REAL,
+                    fim REAL,  -- fim da última ocorrência; NULL se a recorrência não termina
+                    recurso TEXT NOT NULL,
+                    PRIMARY KEY (calendar_id, event_id)
+                );
+                CREATE TABLE IF NOT EXISTS excecoes (
+                    calendar_id TEXT NOT NULL,
+                    event_id TEXT NOT NULL,
+                    mestre_id TEXT NOT NULL,
+                    inicio_original REAL,
+                    PRIMARY KEY (calendar_id, event_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_excecoes_mestre ON excecoes (calendar_id, mestre_id);
+                CREATE TABLE IF NOT EXISTS sincronizacao (
+                    calendar_id TEXT PRIMARY KEY,
+                    sync_token TEXT,
+                    atualizado_em REAL,
+                    fuso TEXT
+                );
+                PRAGMA user_version = {VERSAO_ESQUEMA};
+                """
+            )
+
+    def _lock_sync(self, calendar_id: str) -> threading.Lock:
+        with self.lock:
+            return self._locks_sync.setdefault(calendar_id, threading.Lock())
+
+    def _sync_token(self, calendar_id: str) -> str | None:
+        with self.lock:
+            linha = self.conexao.execute(
+                "SELECT sync_token FROM sincronizacao WHERE calendar_id = ?", (calendar_id,)
+            ).fetchone()
+        return linha[0] if linha else None
+
+    def _sincronizado_recentemente(self, calendar_id: str) -> bool:
+        ultimo = self._ultimo_sync.get(calendar_id)
+        return ultimo is not None and time.monotonic() - ultimo < self.intervalo_minimo_sync
+
+    def sincronizar(self, service, calendar_id: str = "primary", forcar: bool = False):
+        """
+        Traz para o espelho as alterações do calendário desde a última sincronização. Sem token salvo
+        (ou quando a API responde 410 Gone) faz a sincronização completa.
+        """
+        if not forcar and self._sincronizado_recentemente(calendar_id):
+            return
+
+        with self._lock_sync(calendar_id), cronometrar(espelho_duracao, operacao="sincronizar"):
+            if not forcar and self._sincronizado_recentemente(calendar_id):
+                return
+
+            sync_token = self._sync_token(calendar_id)
+            try:
+                itens, fuso, proximo_token = self._baixar(service, calendar_id, sync_token)
+            except HttpError as e:
+                if sync_token is None or e.resp.status != 410:
+                    raise
+                sync_token = None
+                itens, fuso, proximo_token = self._baixar(service, calendar_id, None)
+
+            self._aplicar(calendar_id, itens, fuso, proximo_token, completo=sync_token is None)
+            self._ultimo_sync[calendar_id] = time.monotonic()
+
+    def _baixar(self, service, calendar_id: str, sync_token: str | None):
+        itens = []
+        fuso = FUSO_PADRAO
+        next_page_token = None
+
+        while True:
+            resposta = self.executar(service.events().list(
+                calendarId=calendar_id,
+                singleEvents=False,
+                maxResults=2500,
+                pageToken=next_page_token,
+                syncToken=sync_token,
+                fields=CAMPOS_LISTA_EVENTOS
+            ))
+            itens.extend(resposta.get("items", []))
+            fuso = resposta.get("timeZone") or fuso
+            next_page_token = resposta.get("nextPageToken")
+            if not next_page_token:
+                return itens, fuso, resposta.get("nextSyncToken")
+
+    def _aplicar(self, calendar_id: str, itens: list, fuso: str, proximo_token: str | None, completo: bool):
+        alterados = []
+        mestres_removidos = []
+        excecoes = []
+        eventos = []
+        recorrencias = []
+        for evento in itens:
+            alterados.append((calendar_id, evento["id"]))
+            if evento.get("recurringEventId"):
+                excecoes.append((calendar_id, evento["id"], evento["recurringEventId"],
+                                 para_timestamp(evento.get("originalStartTime"), fuso)))
+            if evento.get("status") == "cancelled":
+                mestres_removidos.append((calendar_id, evento["id"]))
+                continue
+            linha = (
+                calendar_id,
+                evento["id"],
+                para_timestamp(evento.get("start"), fuso),
+                para_timestamp(evento.get("end"), fuso),
+                json.dumps(evento, ensure_ascii=False)
+            )
+            if evento.get("recurrence"):
+                # Uma recorrência que não pode ser interpretada não interrompe a sincronização do calendário: o
+                # mestre é guardado sem fim calculado e ignorado na expansão.
+                try:
+                    fim_recorrencia = fim_da_recorrencia(evento, fuso)
+                except (ValueError, TypeError) as e:
+                    registrar("recorrencia_invalida", logging.WARNING, calendar_id=calendar_id, event_id=evento["id"],
+                              erro=str(e))
+                    fim_recorrencia = None
+                recorrencias.append(linha[:3] + (fim_recorrencia,) + linha[4:])
+            else:
+                eventos.append(linha)
+
+        with self.lock, self.conexao:
+            if completo:
+                for tabela in ("eventos", "recorrencias", "excecoes"):
+                    self.conexao.execute(f"DELETE FROM {tabela} WHERE calendar_id = ?", (calendar_id,))
+            # Um mestre cancelado leva junto as suas exceções.
+            self.conexao.executemany(
+                """
+                DELETE FROM eventos WHERE calendar_id = ? AND event_id IN (
+                    SELECT event_id FROM excecoes WHERE calendar_id = eventos.calendar_id AND mestre_id = ?
+                )
+                """, mestres_removidos
+            )
+            self.conexao.executemany("DELETE FROM excecoes WHERE calendar_id = ? AND mestre_id = ?", mestres_removidos)
+            self.conexao.executemany("DELETE FROM eventos WHERE calendar_id = ? AND event_id = ?", alterados)
+            self.conexao.executemany("DELETE FROM recorrencias WHERE calendar_id = ? AND event_id = ?", alterados)
+            self.conexao.executemany("INSERT OR REPLACE INTO excecoes VALUES (?, ?, ?, ?)", excecoes)
+            self.conexao.executemany("INSERT INTO eventos VALUES (?, ?, ?, ?, ?)", eventos)
+            self.conexao.executemany("INSERT INTO recorrencias VALUES (?, ?, ?, ?, ?)", recorrencias)
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO sincronizacao VALUES (?, ?, ?, ?)", (calendar_id, proximo_token, time.time(), fuso)
+            )
+
+    def consultar(self, calendar_id: str = "primary", time_min: str | None = None, time_max: str | None = None,
+                  limite: int | None = None) -> list[dict]:
+        """
+        Eventos do espelho que se sobrepõem à janela [time_min, time_max), ordenados pelo início, com as
+        ocorrências dos eventos recorrentes expandidas localmente.
+        """
+        inicio = para_timestamp(time_min) if time_min is not None else None
+        fim = para_timestamp(time_max) if time_max is not None else None
+        filtro = ""
+        parametros = [calendar_id]
+        if fim is not None:
+            filtro += " AND inicio < ?"
+            parametros.append(fim)
+        if inicio is not None:
+            filtro += " AND (fim > ? OR fim IS NULL)"
+            parametros.append(inicio)
+
+        with self.lock, cronometrar(espelho_duracao, operacao="consultar"):
+            avulsos = self.conexao.execute(
+                f"SELECT inicio, recurso FROM eventos WHERE calendar_id = ?{filtro} ORDER BY inicio LIMIT ?",
+                parametros + [-1 if limite is None else limite]
+            ).fetchall()
+            mestres = self.conexao.execute(
+                f"SELECT event_id, recurso FROM recorrencias WHERE calendar_id = ?{filtro}", parametros
+            ).fetchall()
+            excecoes = {}
+            if mestres:
+                for mestre_id, inicio_original in self.conexao.execute(
+                        "SELECT mestre_id, inicio_original FROM excecoes WHERE calendar_id = ?", (calendar_id,)):
+                    excecoes.setdefault(mestre_id, set()).add(inicio_original)
+            linha = self.conexao.execute(
+                "SELECT fuso FROM sincronizacao WHERE calendar_id = ?", (calendar_id,)
+            ).fetchone()
+        fuso = (linha and linha[0]) or FUSO_PADRAO
+
+        if not mestres:
+            return [json.loads(recurso) for _, recurso in avulsos]
+        with cronometrar(espelho_duracao, operacao="expandir"):
+            fontes = [((-math.inf if ts is None else ts, json.loads(recurso)) for ts, recurso in avulsos)]
+            for mestre_id, recurso in mestres:
+                mestre = json.loads(recurso)
+                try:
+                    regra(mestre, fuso)
+                except (ValueError, TypeError):
+                    continue
+                fontes.append(expandir(mestre, fuso, inicio, fim, frozenset(excecoes.get(mestre_id, ()))))
+            ordenados = heapq.merge(*fontes, key=lambda par: par[0])
+            return [recurso for _, recurso in islice(ordenados, limite)]
+
+    def invalidar(self, calendar_id: str):
+        """Força a próxima leitura do calendário a buscar as alterações pendentes na API."""
+        self._ultimo_sync.pop(calendar_id, None)
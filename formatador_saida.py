@@ -0,0 +1,101 @@
+import os
+
+# Teto de tokens de cada resultado de ferramenta enviado ao LLM, estimado como no histórico (4 caracteres por token).
+LIMITE_TOKENS_RESULTADO = int(os.getenv("TOOL_LIMITE_TOKENS", "1500"))
+CARACTERES_POR_TOKEN = 4
+TAMANHO_MAXIMO_CELULA = 80
+
+
+def _horario(valor: dict | None) -> str | None:
+    if not valor:
+        return None
+    horario = valor.get("dateTime") or valor.get("date")
+    # '2025-06-02T08:00:00-03:00' -> '2025-06-02T08:00-03:00': os segundos quase sempre são zero.
+    if horario and len(horario) >= 19 and horario[16:19] == ":00":
+        horario = horario[:16] + horario[19:]
+    return horario
+
+
+def _link_reuniao(evento: dict) -> str | None:
+    if evento.get("hangoutLink"):
+        return evento["hangoutLink"]
+    for entrada in (evento.get("conferenceData") or {}).get("entryPoints", []):
+        if entrada.get("entryPointType") == "video":
+            return entrada.get("uri")
+    return None
+
+
+# Colunas disponíveis para cada tipo de resultado: nome da coluna -> extrator a partir do dicionário da API.
+COLUNAS_EVENTO = {
+    "id": lambda e: e.get("id"),
+    "inicio": lambda e: _horario(e.get("start")),
+    "fim": lambda e: _horario(e.get("end")),
+    "titulo": lambda e: e.get("summary"),
+    "descricao": lambda e: e.get("description"),
+    "local": lambda e: e.get("location"),
+    "status": lambda e: e.get("status"),
+    "organizador": lambda e: (e.get("organizer") or {}).get("email"),
+    "participantes": lambda e: ",".join(p.get("email", "") for p in e.get("attendees") or []),
+    "reuniao": _link_reuniao,
+    "recorrente": lambda e: e.get("recurringEventId"),
+    "calendarios": lambda e: ",".join(e.get("calendarios") or []),
+}
+CAMPOS_PADRAO_EVENTO = ("id", "inicio", "fim", "titulo", "local", "participantes")
+
+COLUNAS_CALENDARIO = {
+    "id": lambda c: c.get("id"),
+    "nome": lambda c: c.get("name"),
+    "descricao": lambda c: c.get("description"),
+    "principal": lambda c: "sim" if c.get("primary") else None,
+    "fuso": lambda c: c.get("time_zone"),
+    "acesso": lambda c: c.get("access_role"),
+}
+CAMPOS_PADRAO_CALENDARIO = ("id", "nome", "principal", "fuso", "acesso")
+
+
+def validar_campos(campos: list[str] | None, colunas: dict, padrao: tuple) -> tuple[str, ...]:
+    """Campos pedidos pelo agente (ou o padrão); levanta ValueError listando os válidos se algum não existir."""
+    if not campos:
+        return padrao
+    desconhecidos = [campo for campo in campos if campo not in colunas]
+    if desconhecidos:
+        raise ValueError(f"Campos desconhecidos: {', '.join(desconhecidos)}. Campos válidos: {', '.join(colunas)}.")
+    return tuple(campos)
+
+
+def _celula(valor) -> str:
+    if valor is None:
+        return ""
+    texto = " ".join(str(valor).replace("|", "/").split())
+    if len(texto) > TAMANHO_MAXIMO_CELULA:
+        texto = texto[:TAMANHO_MAXIMO_CELULA - 1] + "…"
+    return texto
+
+
+def codificar_tabela(registros: list[dict], colunas: dict, campos: tuple[str, ...], titulo: str,
+                     deslocamento: int = 0, ha_mais: bool = False,
+                     limite_tokens: int = LIMITE_TOKENS_RESULTADO) -> str:
+    """
+    Serializa `registros` em uma tabela compacta separada por '|', com uma linha de cabeçalho e uma linha por
+    registro, apenas com os `campos` pedidos. Linhas são acrescentadas até o teto de `limite_tokens`; se algo
+    ficar de fora (ou `ha_mais` indicar resultados além desta página), a última linha informa o `cursor`
+    com que a ferramenta deve ser chamada de novo para continuar.
+    """
+    limite_caracteres = limite_tokens * CARACTERES_POR_TOKEN
+    linhas = []
+    tamanho = 0
+    for registro in registros:
+        linha = "|".join(_celula(colunas[campo](registro)) for campo in campos)
+        if linhas and tamanho + len(linha) + 1 > limite_caracteres:
+            break
+        linhas.append(linha[:limite_caracteres])
+        tamanho += len(linha) + 1
+
+    if not linhas:
+        return f"{titulo}: nenhum resultado."
+    fim = deslocamento + len(linhas)
+    cabecalho = f"{titulo} {deslocamento + 1}-{fim} | {'|'.join(campos)}"
+    rodape = []
+    if len(linhas) < len(registros) or ha_mais:
+        rodape.append(f"[há mais resultados: chame a ferramenta novamente com cursor={fim}]")
+    return "\n".join([cabecalho, *linhas, *rodape])
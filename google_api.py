@@ -1,20 +1,84 @@
 import datetime
+import hashlib
+import json
+import logging
 import os.path
+import queue
+import threading
+import time
+from contextlib import contextmanager
 
+import google_auth_httplib2
+import httplib2
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from googleapiclient.errors import HttpError
 
 # If modifying these scopes, delete the file token.json.
 SCOPES = ["https://www.googleapis.com/auth/calendar"]
 
+logger = logging.getLogger("agent_calendar.google_api")
 
-def create_service(cliente_secret_file, api_name, api_version, *scopes, prefix=''):
-  """Shows basic usage of the Google Calendar API.
-  Prints the start and name of the next 10 events on the user's calendar.
+
+# Maximum number of concurrent requests (and pooled connections) per HttpPool.
+MAX_CONNECTIONS = int(os.getenv("GOOGLE_API_MAX_CONNECTIONS", "10"))
+
+# Credentials are refreshed this many seconds before they expire, checked every REFRESH_CHECK_INTERVAL.
+REFRESH_MARGIN = float(os.getenv("GOOGLE_API_REFRESH_MARGIN", "300"))
+REFRESH_CHECK_INTERVAL = float(os.getenv("GOOGLE_API_REFRESH_CHECK_INTERVAL", "60"))
+
+DISCOVERY_CACHE_DIR = os.getenv("GOOGLE_API_DISCOVERY_CACHE", "discovery_cache")
+DISCOVERY_MAX_AGE = float(os.getenv("GOOGLE_API_DISCOVERY_MAX_AGE", str(24 * 60 * 60)))
+DISCOVERY_URL = "https://www.googleapis.com/discovery/v1/apis/{api}/{apiVersion}/rest"
+
+
+def _discovery_cache_file(api_name, api_version):
+    return os.path.join(DISCOVERY_CACHE_DIR, f'{api_name}.{api_version}.json')
+
+
+def load_discovery_document(api_name, api_version):
+  """
+  Returns the discovery document without touching the network: the on-disk cache when present,
+  otherwise the copy bundled with googleapiclient.
   """
+  cache_file = _discovery_cache_file(api_name, api_version)
+  if os.path.exists(cache_file):
+      with open(cache_file, encoding='utf-8') as f:
+          return f.read()
+  return get_static_doc(api_name, api_version)
+
+
+def refresh_discovery_document(api_name, api_version, max_age=DISCOVERY_MAX_AGE):
+  """
+  Downloads the discovery document when the cached copy is older than `max_age` seconds, replacing
+  it atomically only if its revision changed. Returns the cached revision.
+  """
+  cache_file = _discovery_cache_file(api_name, api_version)
+  if os.path.exists(cache_file) and time.time() - os.path.getmtime(cache_file) < max_age:
+      return json.loads(load_discovery_document(api_name, api_version)).get('revision')
+
+  resp, content = httplib2.Http(timeout=30).request(DISCOVERY_URL.format(api=api_name, apiVersion=api_version))
+  if resp.status != 200:
+      raise HttpError(resp, content, uri=DISCOVERY_URL.format(api=api_name, apiVersion=api_version))
+  document = json.loads(content)
+
+  os.makedirs(DISCOVERY_CACHE_DIR, exist_ok=True)
+  cached = load_discovery_document(api_name, api_version)
+  if os.path.exists(cache_file) and json.loads(cached).get('revision') == document.get('revision'):
+      os.utime(cache_file)
+  else:
+      tmp_file = f'{cache_file}.tmp'
+      with open(tmp_file, 'w', encoding='utf-8') as f:
+          f.write(content.decode('utf-8'))
+      os.replace(tmp_file, cache_file)
+  return document.get('revision')
+
+
+def load_credentials(cliente_secret_file, api_name, api_version, *scopes, prefix=''):
+  """Loads the stored OAuth token, refreshing it or running the consent flow when needed."""
   CLIENT_SECRET_FILE = cliente_secret_file
   API_SERVICE_NAME = api_name
   API_VERSION = api_version
@@ -22,16 +86,13 @@ def create_service(cliente_secret_file, api_name, api_version, *scopes, prefix='
 
   cred = None
 
-  working_dir = os.getcwd()
-  token_dir = 'token files'
-  token_file = f'token_{API_SERVICE_NAME}_{API_VERSION}-{prefix}.json'
+  token_file = token_path(API_SERVICE_NAME, API_VERSION, prefix)
 
   ### Check if token dir exists first, if not, create the folder
-  if not os.path.exists(os.path.join(working_dir, token_dir)):
-      os.mkdir(os.path.join(working_dir, token_dir))
+  os.makedirs(os.path.dirname(token_file), exist_ok=True)
 
-  if os.path.exists(os.path.join(working_dir, token_dir, token_file)):
-      cred = Credentials.from_authorized_user_file(os.path.join(working_dir, token_dir, token_file), SCOPES)
+  if os.path.exists(token_file):
+      cred = Credentials.from_authorized_user_file(token_file, SCOPES)
 
   if not cred or not cred.valid:
       if cred and cred.expired and cred.refresh_token:
@@ -40,15 +101,216 @@ def create_service(cliente_secret_file, api_name, api_version, *scopes, prefix='
           flow = InstalledAppFlow.from_client_secrets_file(CLIENT_SECRET_FILE, SCOPES)
           cred = flow.run_local_server(port=0)
 
-      with open(os.path.join(working_dir, token_dir, token_file), 'w') as token:
-          token.write(cred.to_json())
+      save_token(token_file, cred)
+
+  return cred
+
+
+def account_key(account):
+  """
+  File-name-safe key for an account identifier (e.g. an e-mail address). A hash rather than a character
+  substitution, so distinct identifiers never share a token file or a mirror; '' stays '' (default account).
+  """
+  return hashlib.sha256(account.encode('utf-8')).hexdigest() if account else ''
+
+
+def token_path(api_name, api_version, prefix=''):
+  return os.path.join(os.getcwd(), 'token files', f'token_{api_name}_{api_version}-{account_key(prefix)}.json')
+
+
+def save_token(path, cred):
+  """Writes the token atomically, so a crash or a concurrent reader never sees a half-written file."""
+  tmp_path = f'{path}.tmp'
+  with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as token:
+      token.write(cred.to_json())
+  os.replace(tmp_path, path)
+
+
+def create_service(cliente_secret_file, api_name, api_version, *scopes, prefix='', credentials=None):
+  """
+  Builds the API client, loading the credentials when they are not given. On failure the account's token
+  file is deleted, so the next attempt goes through the OAuth flow again, and the error is re-raised.
+  """
+  API_SERVICE_NAME = api_name
+  API_VERSION = api_version
+
+  cred = credentials or load_credentials(cliente_secret_file, api_name, api_version, *scopes, prefix=prefix)
 
   try:
-      service = build(API_SERVICE_NAME, API_VERSION, credentials=cred, static_discovery=False)
-      print(API_SERVICE_NAME, API_VERSION, 'service created successfully')
+      service = build_from_document(load_discovery_document(API_SERVICE_NAME, API_VERSION), credentials=cred)
+      logger.info('%s %s service created successfully', API_SERVICE_NAME, API_VERSION)
       return service
-  except Exception as e:
-      print(e)
-      print(f'Failed to create service instance for {API_SERVICE_NAME}')
-      os.remove(os.path.join(working_dir, token_dir, token_file))
-      return None
\ No newline at end of file
+  except Exception:
+      logger.exception('Failed to create service instance for %s', API_SERVICE_NAME)
+      token_file = token_path(API_SERVICE_NAME, API_VERSION, prefix)
+      if os.path.exists(token_file):
+          os.remove(token_file)
+      raise
+
+
+class CredentialManager:
+    """
+    Keeps one set of OAuth credentials per account in memory and refreshes them in a background thread
+    shortly before they expire, persisting each new token atomically. Request paths only read credentials
+    that are already valid, so the token refresh round trip stays off them.
+
+    The default account ('') uses the local token file and may run the consent flow; other accounts must
+    already have a token file (`token files/token_<api>_<version>-<account>.json`), created by `authorize`.
+    """
+
+    def __init__(self, client_secret_file, api_name, api_version, scopes,
+                 refresh_margin=REFRESH_MARGIN, check_interval=REFRESH_CHECK_INTERVAL):
+        self.client_secret_file = client_secret_file
+        self.api_name = api_name
+        self.api_version = api_version
+        self.scopes = list(scopes)
+        self.refresh_margin = datetime.timedelta(seconds=refresh_margin)
+        self.check_interval = check_interval
+        self._credentials = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _account_lock(self, account):
+        with self._lock:
+            return self._locks.setdefault(account, threading.Lock())
+
+    def get(self, account=''):
+        """Valid credentials for `account`, loading them on first use."""
+        cred = self._credentials.get(account)
+        if cred is None:
+            with self._account_lock(account):
+                cred = self._credentials.get(account)
+                if cred is None:
+                    cred = self._load(account)
+                    self._credentials[account] = cred
+        if not cred.valid:
+            self.refresh(account)
+        return cred
+
+    def has_token(self, account):
+        return account == '' or account in self._credentials \
+            or os.path.exists(token_path(self.api_name, self.api_version, account))
+
+    def authorize(self, account):
+        """Runs the OAuth consent flow for `account` and stores its token."""
+        flow = InstalledAppFlow.from_client_secrets_file(self.client_secret_file, self.scopes)
+        cred = flow.run_local_server(port=0)
+        path = token_path(self.api_name, self.api_version, account)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        save_token(path, cred)
+        with self._account_lock(account):
+            self._credentials[account] = cred
+        return cred
+
+    def discard(self, account):
+        """Forgets the in-memory credentials of `account`; the next `get` loads them again."""
+        with self._account_lock(account):
+            self._credentials.pop(account, None)
+
+    def _load(self, account):
+        if account == '':
+            return load_credentials(self.client_secret_file, self.api_name, self.api_version, self.scopes)
+        path = token_path(self.api_name, self.api_version, account)
+        if not os.path.exists(path):
+            raise PermissionError(f'No stored Google token for account {account!r}')
+        return Credentials.from_authorized_user_file(path, self.scopes)
+
+    def _expiring(self, cred):
+        if cred.expiry is None:
+            return False
+        # google-auth keeps `expiry` as a naive UTC datetime.
+        return cred.expiry - datetime.datetime.utcnow() < self.refresh_margin
+
+    def refresh(self, account=''):
+        cred = self._credentials[account]
+        with self._account_lock(account):
+            if cred.valid and not self._expiring(cred):
+                return
+            cred.refresh(Request())
+            save_token(token_path(self.api_name, self.api_version, account), cred)
+            logger.info('Refreshed Google credentials for account %r', account)
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.check_interval):
+            for account, cred in list(self._credentials.items()):
+                if cred.refresh_token and (not cred.valid or self._expiring(cred)):
+                    try:
+                        self.refresh(account)
+                    except Exception:
+                        # The request path still refreshes on its own if the token really expires.
+                        logger.exception('Background refresh failed for account %r', account)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._refresh_loop, name='credential-refresh', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+class _ObservedHttp:
+    """Proxy that reports every (response, content) pair to a hook before handing it back."""
+
+    def __init__(self, http, hook):
+        self._http = http
+        self._hook = hook
+
+    def request(self, *args, **kwargs):
+        resp, content = self._http.request(*args, **kwargs)
+        self._hook(resp, content)
+        return resp, content
+
+    def __getattr__(self, name):
+        return getattr(self._http, name)
+
+
+class HttpPool:
+    """
+    Bounded pool of authorized httplib2 connections sharing one set of credentials.
+
+    httplib2.Http is not thread-safe, so each request borrows a connection for its exclusive use
+    and gives it back afterwards, keeping its keep-alive sockets warm for the next caller. At most
+    `max_connections` requests run at once; extra callers wait for a free connection.
+    """
+
+    def __init__(self, credentials, max_connections=MAX_CONNECTIONS, timeout=None, response_hook=None):
+        self.credentials = credentials
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.response_hook = response_hook
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def _new_connection(self):
+        return google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=self.timeout))
+
+    @contextmanager
+    def connection(self):
+        with self._slots:
+            try:
+                http = self._idle.get_nowait()
+            except queue.Empty:
+                http = self._new_connection()
+            reusable = False
+            try:
+                yield _ObservedHttp(http, self.response_hook) if self.response_hook else http
+                reusable = True
+            except HttpError:
+                reusable = True
+                raise
+            finally:
+                if reusable:
+                    self._idle.put(http)
+                else:
+                    # A transport failure may leave a half-read socket behind; drop the connection.
+                    for conn in list(http.http.connections.values()):
+                        conn.close()
+
+    def execute(self, request):
+        """Executes a googleapiclient request (or batch) on a pooled connection."""
+        with self.connection() as http:
+            return request.execute(http=http)
@@ -1,6 +1,30 @@
+import base64
+import hashlib
+import json
+import logging
 import os.path
-from datetime import datetime
-from google_api import create_service
+import threading
+import time
+import uuid
+import heapq
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timedelta
+from itertools import chain, islice
+from zoneinfo import ZoneInfo
+from google_api import CredentialManager, HttpPool, account_key, create_service
+from cache_respostas import CacheRespostas, calendario_da_uri
+from espelho_eventos import CAMINHO_ESPELHO, EspelhoEventos, para_timestamp
+from disponibilidade import IntervalosOcupados, horarios_livres, ler_instante
+from planejador import Tarefa, alocar_tarefas
+from perfil_usuario import FUSO_HORARIO
+import pre_carregamento
+from modelos import CAMPOS_LISTA_CALENDARIOS, CAMPOS_LISTA_EVENTOS, Evento
+from limitador_taxa import MAXIMO_TENTATIVAS, erro_retentavel, espera_com_jitter, executar_com_retentativas
+from googleapiclient.errors import HttpError
+import metricas
 
 
 
@@ -9,117 +33,449 @@ API_NAME = 'calendar'
 API_VERSION = 'v3'
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
-service = create_service(CLIENT_SECRET_FILE, API_NAME, API_VERSION, SCOPES)
+# Cada conta (usuário do Chainlit) tem o seu cliente: credenciais, `service`, pool de conexões e espelho
+# de eventos. As credenciais ficam em memória no gerenciador, que as renova em segundo plano antes de
+# expirarem. O cliente da conta é criado no primeiro uso, para que importar o módulo não dependa de rede
+# nem do fluxo OAuth; as requisições são executadas em conexões do pool, pois o transporte httplib2 não
+# é thread-safe.
+credenciais = CredentialManager(CLIENT_SECRET_FILE, API_NAME, API_VERSION, SCOPES)
+
+# Conta da requisição em andamento; '' é a conta padrão (token local de `token files/`).
+conta_atual: ContextVar[str] = ContextVar('conta_atual', default='')
+# Usuário autenticado sem token próprio do Google (ver `autorizar_conta.py`): por padrão ('recusar') as
+# ferramentas falham pedindo a autorização; só com 'padrao' ele usa a conta padrão, que é a do dono da
+# instalação, como antes das contas por usuário.
+CONTA_SEM_TOKEN = os.getenv("GOOGLE_CONTA_SEM_TOKEN", "recusar")
+
+# Turno do agente em andamento; '' fora de um turno. Define o escopo dos IDs dos eventos criados.
+turno_atual: ContextVar[str] = ContextVar('turno_atual', default='')
+
+
+@dataclass
+class ClienteConta:
+    service: object
+    http_pool: HttpPool
+    espelho: EspelhoEventos
+    cache: CacheRespostas
+
+
+_clientes: dict[str, ClienteConta] = {}
+_lock_inicializacao = threading.Lock()
+
+
+def _caminho_espelho(conta):
+    if not conta:
+        return CAMINHO_ESPELHO
+    raiz, extensao = os.path.splitext(CAMINHO_ESPELHO)
+    return f'{raiz}-{account_key(conta)}{extensao}'
+
+
+def registrar_cliente(conta, service, http_pool, espelho=None):
+    """Associa à `conta` um cliente já montado (usado também pelos benchmarks, com a API falsa)."""
+    cliente = ClienteConta(service, http_pool, espelho or EspelhoEventos(_caminho_espelho(conta), executar=executar),
+                           CacheRespostas())
+    _clientes[conta] = cliente
+    return cliente
+
+
+def obter_cliente(conta=None) -> ClienteConta:
+    conta = conta_atual.get() if conta is None else conta
+    cliente = _clientes.get(conta)
+    if cliente is None and conta and not credenciais.has_token(conta):
+        if CONTA_SEM_TOKEN == 'padrao':
+            return obter_cliente('')
+        raise PermissionError(f"A conta {conta!r} ainda não autorizou o acesso ao Google Calendar. "
+                              f"Autorize com `python autorizar_conta.py {conta}`.")
+    if cliente is None:
+        with _lock_inicializacao:
+            cliente = _clientes.get(conta)
+            if cliente is None:
+                credentials = credenciais.get(conta)
+                credenciais.start()
+                try:
+                    service = create_service(CLIENT_SECRET_FILE, API_NAME, API_VERSION, SCOPES, prefix=conta,
+                                             credentials=credentials)
+                except Exception:
+                    # Um cliente que não pôde ser criado não fica registrado: a próxima chamada tenta de novo.
+                    credenciais.discard(conta)
+                    raise
+                cliente = registrar_cliente(conta, service, HttpPool(credentials, response_hook=_medir_resposta))
+    return cliente
+
+
+def obter_service():
+    return obter_cliente().service
+
+
+def _medir_resposta(resp, content):
+    metricas.api_bytes.observar(len(content or b''))
+
+
+def executar(requisicao, custo=1):
+    # Passa pelo limitador de taxa compartilhado e repete, com backoff, erros de cota, 5xx e de transporte.
+    # Leituras já feitas são revalidadas pela ETag: se nada mudou, a API responde 304 e o cache é reaproveitado.
+    cliente = obter_cliente()
+    metodo = getattr(requisicao, 'methodId', None) or 'batch'
+    status = 'ok'
+    guardada = None
+    if getattr(requisicao, 'method', None) == 'GET':
+        guardada = cliente.cache.obter(requisicao.uri)
+        if guardada is not None:
+            requisicao.headers['If-None-Match'] = guardada[0]
+    metricas.api_em_andamento.somar(1)
+    inicio = time.perf_counter()
+    try:
+        resultado = executar_com_retentativas(
+            lambda: cliente.http_pool.execute(requisicao), custo,
+            ao_retentar=lambda erro: metricas.api_retentativas.incrementar(metodo=metodo)
+        )
+        if isinstance(resultado, dict) and 'items' in resultado:
+            metricas.api_paginas.incrementar(metodo=metodo)
+        if getattr(requisicao, 'method', None) == 'GET' and isinstance(resultado, dict) and resultado.get('etag'):
+            metricas.api_cache.incrementar(metodo=metodo, resultado='baixado' if guardada is None else 'alterado')
+            cliente.cache.guardar(requisicao.uri, resultado['etag'], resultado, calendario_da_uri(requisicao.uri), metodo)
+        return resultado
+    except HttpError as e:
+        if e.resp.status == 304 and guardada is not None:
+            status = 'nao_modificado'
+            metricas.api_cache.incrementar(metodo=metodo, resultado='revalidado')
+            cliente.cache.renovar(requisicao.uri)
+            return json.loads(guardada[1])
+        status = str(e.resp.status)
+        raise
+    except Exception:
+        status = 'erro_transporte'
+        raise
+    finally:
+        duracao = time.perf_counter() - inicio
+        metricas.api_em_andamento.somar(-1)
+        metricas.api_duracao.observar(duracao, metodo=metodo)
+        metricas.api_requisicoes.incrementar(metodo=metodo, status=status)
+        if status not in ('ok', 'nao_modificado'):
+            metricas.registrar('api_erro', metodo=metodo, status=status, duracao_s=round(duracao, 4))
+
+
+def invalidar_calendario(calendar_id):
+    """Descarta o que está guardado do calendário (espelho e respostas em cache) após uma escrita nele."""
+    cliente = obter_cliente()
+    cliente.espelho.invalidar(calendar_id)
+    cliente.cache.invalidar(calendar_id)
+    pre_carregamento.invalidar_conta(conta_atual.get())
+
+
+def novo_id_evento(calendar_id, event):
+    """
+    ID do evento a criar, derivado do turno do agente, do calendário, do início, do fim e do título. IDs gerados
+    pelo cliente tornam a criação idempotente: se o LLM repetir a criação no mesmo turno (por exemplo, depois de
+    uma falha cuja resposta se perdeu), o insert resulta em 409, e não em um evento duplicado. Fora de um turno,
+    o escopo é aleatório e só as retentativas HTTP reaproveitam o ID.
+    """
+    escopo = turno_atual.get() or uuid.uuid4().hex
+    chave = json.dumps([escopo, calendar_id, para_timestamp(event.get('start')), para_timestamp(event.get('end')),
+                        event.get('summary')])
+    # A API aceita IDs em base32hex minúsculo (a-v e 0-9).
+    return base64.b32hexencode(hashlib.sha256(chave.encode()).digest()).decode().rstrip('=').lower()
+
+
+# Threads que buscam antecipadamente a próxima página das listagens.
+_executor_paginas = ThreadPoolExecutor(max_workers=8, thread_name_prefix='paginacao')
 
 
 def cria_calendario(calendar_name, timezone: str = "America/Sao_Paulo"):
+    service = obter_service()
     calendar_name = {
         'summary': calendar_name,
         'timeZone': timezone
     }
-    response = service.calendars().insert(body=calendar_name).execute()
+    response = executar(service.calendars().insert(body=calendar_name, fields='id'))
+    obter_cliente().cache.invalidar(prefixo_metodo='calendar.calendarList.')
     calendar_id = response.get('id')
     return calendar_id
 
+def _paginas(criar_requisicao, limite=None, tamanho_pagina=250):
+    """
+    Gera as respostas de uma listagem paginada da API. Enquanto uma página é consumida, a próxima já está
+    sendo buscada em segundo plano; se o consumidor parar antes do fim, a busca antecipada é cancelada.
+    `criar_requisicao(page_token, max_results)` monta a requisição de cada página.
+    """
+    recebidos = 0
+
+    def buscar(page_token):
+        tamanho = tamanho_pagina if limite is None else min(tamanho_pagina, limite - recebidos)
+        # A cópia do contexto leva `conta_atual` para a thread que busca a página.
+        return _executor_paginas.submit(copy_context().run, executar, criar_requisicao(page_token, tamanho))
+
+    futuro = buscar(None)
+    try:
+        while futuro is not None:
+            pagina = futuro.result()
+            recebidos += len(pagina.get('items', []))
+            next_page_token = pagina.get('nextPageToken')
+            futuro = buscar(next_page_token) if next_page_token and (limite is None or recebidos < limite) else None
+            yield pagina
+    finally:
+        if futuro is not None:
+            futuro.cancel()
+
+
+def iterar_calendarios(limite=None):
+    """Gera os calendários do usuário página a página, já no formato devolvido pelas ferramentas."""
+    service = obter_service()
+    with closing(_paginas(
+        lambda page_token, max_results: service.calendarList().list(
+            maxResults=max_results,
+            pageToken=page_token,
+            fields=CAMPOS_LISTA_CALENDARIOS
+        ),
+        limite, tamanho_pagina=200
+    )) as paginas:
+        for pagina in paginas:
+            for calendar in pagina.get('items', []):
+                yield {
+                    'id': calendar['id'],
+                    'name': calendar['summary'],
+                    'description': calendar.get('description', ''),
+                    'primary': calendar.get('primary', False),
+                    'time_zone': calendar.get('timeZone'),
+                    'etag': calendar.get('etag'),
+                    'access_role': calendar.get('accessRole')
+                }
+
+
+def iterar_eventos(calendar_id='primary', time_min=None, time_max=None, show_deleted=False, limite=None,
+                   expandir_recorrencias=False):
+    """
+    Gera os eventos direto da API (sem o espelho local), página a página, como registros `Evento`. Com
+    `expandir_recorrencias`, a API devolve as ocorrências dos eventos recorrentes, ordenadas pelo início.
+    """
+    service = obter_service()
+    with closing(_paginas(
+        lambda page_token, max_results: service.events().list(
+            calendarId=calendar_id,
+            timeMin=time_min,
+            timeMax=time_max,
+            maxResults=max_results,
+            pageToken=page_token,
+            showDeleted=show_deleted,
+            singleEvents=expandir_recorrencias or None,
+            orderBy='startTime' if expandir_recorrencias else None,
+            fields=CAMPOS_LISTA_EVENTOS
+        ),
+        limite
+    )) as paginas:
+        for pagina in paginas:
+            for event in pagina.get('items', []):
+                yield Evento.de_recurso(event)
+
+
 def listar_calendarios(max_capacity=200):
     if isinstance(max_capacity, str):
         max_capacity = int(max_capacity)
-
-    all_calendars = []
-    all_calendars_cleaned = []
-    next_page_token = None
-    capacity_tracker = 0
-
-    while True:
-        calendar_list = service.calendarList().list(
-            maxResults=min(200, max_capacity - capacity_tracker),
-            pageToken=next_page_token
-        ).execute()
-        calendars = calendar_list.get('items', [])
-        all_calendars.extend(calendars)
-        capacity_tracker += len(calendars)
-        if capacity_tracker >= max_capacity:
-            break
-        next_page_token = calendar_list.get('nextPageToken')
-        if not next_page_token:
-            break
-
-    for calendar in all_calendars:
-        all_calendars_cleaned.append(
-            {
-                'id': calendar['id'],
-                'name': calendar['summary'],
-                'description': calendar.get('description', ''),
-                'primary': calendar.get('primary', False),
-                'time_zone': calendar.get('timeZone'),
-                'etag': calendar.get('etag'),
-                'access_role': calendar.get('accessRole')
-            })
-
-    return all_calendars_cleaned
+    return list(islice(iterar_calendarios(max_capacity), max_capacity))
 
 def listar_eventos_calendario(calendar_id='primary', max_capacity=20, time_min=None, time_max=None, show_deleted=False):
+    service = obter_service()
     if isinstance(max_capacity, str):
         max_capacity = int(max_capacity)
 
-    all_events = []
-    next_page_token = None
-    capacity_tracker = 0
+    # Eventos excluídos não ficam no espelho local; só nesse caso a consulta vai direto à API.
+    if show_deleted:
+        return list(islice(iterar_eventos(calendar_id, time_min, time_max, show_deleted, max_capacity), max_capacity))
 
-    while True:
-        
-        events_list = service.events().list(
-            calendarId=calendar_id,
-            timeMin=time_min,
-            timeMax=time_max,
-            maxResults=min(250, max_capacity - capacity_tracker),
-            pageToken=next_page_token,
-            showDeleted=show_deleted
-        ).execute()
-
-        events = events_list.get('items', [])
-        all_events.extend(events)
-        capacity_tracker += len(events)
-        if capacity_tracker >= max_capacity:
-            break
-        next_page_token = events_list.get('nextPageToken')
-        if not next_page_token:
-            break
-    # Process and return the events
-    processed_events = []
-    for event in all_events:
-        processed_event = {
-            'id': event.get('id'),
-            'summary': event.get('summary'),
-            'description': event.get('description'),
-            'start': event.get('start'),
-            'end': event.get('end'),
-            'status': event.get('status'),
-            'creator': event.get('creator'),
-            'organizer': event.get('organizer'),
-            'attendees': event.get('attendees'),
-            'location': event.get('location'),
-            'hangoutLink': event.get('hangoutLink'),
-            'conferenceData': event.get('conferenceData'),
-            'recurringEventId': event.get('recurringEventId')
+    # Logo após o pré-carregamento da sessão, que sincronizou o calendário principal, a sincronização é local.
+    obter_cliente().espelho.sincronizar(service, calendar_id)
+    return [Evento.de_recurso(event) for event in obter_cliente().espelho.consultar(calendar_id, time_min, time_max, max_capacity)]
+
+def listar_eventos_janela(calendar_id='primary', max_capacity=20, time_min=None, time_max=None):
+    """Eventos de [time_min, time_max) direto da API, com as recorrências expandidas, sem sincronizar o espelho."""
+    return list(islice(iterar_eventos(calendar_id, time_min, time_max, limite=max_capacity, expandir_recorrencias=True),
+                       max_capacity))
+
+# Calendários consultados ao mesmo tempo pela listagem de vários calendários.
+PARALELISMO_CALENDARIOS = 4
+
+def _espelhavel(calendar_id, calendarios):
+    """
+    Só o calendário principal e os do próprio usuário vão para o espelho; feriados e agendas assinadas ou
+    compartilhadas, que a sincronização completa traria com todo o histórico, são consultados só na janela pedida.
+    """
+    calendario = calendarios.get(calendar_id, {})
+    return calendar_id == 'primary' or calendario.get('primary') or calendario.get('access_role') == 'owner'
+
+def listar_eventos_varios_calendarios(calendar_ids=None, max_capacity=50, time_min=None, time_max=None,
+                                      usar_espelho=True):
+    """
+    Lista os eventos de vários calendários em paralelo e os une em uma única lista ordenada pelo início.
+    Sem `calendar_ids`, consulta todos os calendários cujos eventos o usuário pode ler. Os calendários do
+    usuário são lidos do espelho local; os demais (ou todos, sem `usar_espelho`), direto da API e só na janela pedida.
+    Um evento presente em mais de um calendário (ex.: uma reunião para a qual o usuário foi convidado em duas
+    agendas) aparece uma vez só, com a lista de calendários onde foi encontrado em 'calendarios'.
+    """
+    if isinstance(max_capacity, str):
+        max_capacity = int(max_capacity)
+    calendarios = {}
+    if not calendar_ids or (usar_espelho and set(calendar_ids) != {'primary'}):
+        calendarios = {calendario['id']: calendario for calendario in iterar_calendarios()}
+    if not calendar_ids:
+        calendar_ids = [calendar_id for calendar_id, calendario in calendarios.items()
+                        if calendario['access_role'] != 'freeBusyReader']
+    calendar_ids = list(dict.fromkeys(calendar_ids))
+
+    resultados = {}
+    erros = {}
+    with ThreadPoolExecutor(max_workers=min(PARALELISMO_CALENDARIOS, len(calendar_ids) or 1)) as executor:
+        futuros = {
+            calendar_id: executor.submit(copy_context().run,
+                                         listar_eventos_calendario if usar_espelho and _espelhavel(calendar_id, calendarios)
+                                         else listar_eventos_janela,
+                                         calendar_id, max_capacity, time_min, time_max)
+            for calendar_id in calendar_ids
         }
-        processed_events.append(processed_event)
-    return processed_events
+        for calendar_id, futuro in futuros.items():
+            try:
+                resultados[calendar_id] = futuro.result()
+            except HttpError as e:
+                erros[calendar_id] = e.reason
+            except Exception as e:
+                erros[calendar_id] = str(e)
 
-def criar_evento_programado(
-        start: str,
-        end: str,
-        calendar_id='primary',
+    # Cada lista já vem ordenada pelo início, então a união é um merge de k listas ordenadas.
+    def com_chave(calendar_id, eventos):
+        for evento in eventos:
+            yield para_timestamp(evento.start) or 0.0, calendar_id, evento
+
+    eventos = []
+    vistos = {}
+    for inicio, calendar_id, evento in heapq.merge(*(com_chave(c, e) for c, e in resultados.items()),
+                                                   key=lambda item: item[0]):
+        chave = (evento.ical_uid or evento.id, inicio)
+        if chave in vistos:
+            vistos[chave]['calendarios'].append(calendar_id)
+            continue
+        if len(eventos) >= max_capacity:
+            continue
+        registro = evento.como_dict()
+        registro['calendarios'] = [calendar_id]
+        vistos[chave] = registro
+        eventos.append(registro)
+
+    resultado = {'eventos': eventos}
+    if erros:
+        resultado['calendarios_com_erro'] = erros
+    return resultado
+
+def consultar_ocupado(time_min, time_max, calendar_ids=None, timezone: str = "America/Sao_Paulo"):
+    calendar_ids = list(calendar_ids or ['primary'])
+    agenda = pre_carregamento.obter()
+    if agenda is not None and calendar_ids == ['primary']:
+        ocupados = _ocupados_pre_carregados(agenda, time_min, time_max, timezone)
+        if ocupados is not None:
+            return {'primary': ocupados}, {}
+    return _consultar_ocupado_api(time_min, time_max, calendar_ids, timezone)
+
+def _ocupados_pre_carregados(agenda, time_min, time_max, timezone):
+    """
+    Períodos ocupados do calendário principal em [time_min, time_max), recortados da agenda pré-carregada da sessão.
+    Se a agenda foi invalidada por uma escrita ou expirou, é recarregada por inteiro com uma única consulta,
+    que custa o mesmo que consultar só a janela pedida. None quando a janela está fora da agenda.
+    """
+    try:
+        inicio, fim = datetime.fromisoformat(time_min), datetime.fromisoformat(time_max)
+    except (TypeError, ValueError):
+        return None
+    if inicio.tzinfo is None or fim.tzinfo is None or not agenda.cobre(inicio, fim):
+        return None
+    agenda.aguardar()
+    ocupados = agenda.ocupados_em(inicio, fim)
+    if ocupados is not None:
+        metricas.pre_carregamento.incrementar(leitura='ocupados', resultado='usado')
+        return ocupados
+    _carregar_ocupados(agenda, timezone)
+    ocupados = agenda.ocupados_em(inicio, fim)
+    if ocupados is not None:
+        metricas.pre_carregamento.incrementar(leitura='ocupados', resultado='recarregado')
+    return ocupados
+
+def _carregar_ocupados(agenda, timezone=FUSO_HORARIO):
+    geracao = agenda.geracao
+    ocupados, _erros = _consultar_ocupado_api(agenda.inicio.isoformat(), agenda.fim.isoformat(), ['primary'], timezone)
+    if 'primary' in ocupados:
+        agenda.registrar_ocupados(ocupados['primary'], geracao)
+
+def pre_carregar_agenda(sessao, conta='', inicio=None):
+    """
+    Busca a agenda próxima do calendário principal para a sessão que está começando: sincroniza o espelho de
+    eventos (que dispensa nova sincronização pelo seu intervalo mínimo) e consulta o free/busy de
+    `HORIZONTE_PRE_CARREGAMENTO` a partir de `inicio` (padrão: o começo do dia de hoje), em paralelo. Feito em
+    segundo plano, para que a primeira ferramenta da sessão seja respondida localmente. Falhas só são
+    registradas: as leituras seguem para a API como de costume.
+    """
+    conta_atual.set(conta)
+    if inicio is None:
+        inicio = datetime.now(ZoneInfo(FUSO_HORARIO)).replace(hour=0, minute=0, second=0, microsecond=0)
+    agenda = pre_carregamento.iniciar(sessao, conta, inicio)
+    try:
+        cliente = obter_cliente()
+        futuro = _executor_paginas.submit(copy_context().run, _carregar_ocupados, agenda)
+        try:
+            cliente.espelho.sincronizar(cliente.service, 'primary')
+        finally:
+            futuro.result()
+    except Exception as e:
+        metricas.registrar('pre_carregamento_falhou', logging.WARNING, sessao=sessao, erro=str(e))
+    finally:
+        agenda.concluir()
+    return agenda
+
+def _consultar_ocupado_api(time_min, time_max, calendar_ids, timezone):
+    service = obter_service()
+    ocupados = {}
+    erros = {}
+
+    # A consulta free/busy aceita até 50 calendários por requisição.
+    for i in range(0, len(calendar_ids), 50):
+        resposta = executar(service.freebusy().query(fields='calendars', body={
+            'timeMin': time_min,
+            'timeMax': time_max,
+            'timeZone': timezone,
+            'items': [{'id': calendar_id} for calendar_id in calendar_ids[i:i + 50]]
+        }))
+
+        for calendar_id, info in resposta.get('calendars', {}).items():
+            if info.get('errors'):
+                erros[calendar_id] = [erro.get('reason') for erro in info['errors']]
+                continue
+            ocupados[calendar_id] = [
+                (datetime.fromisoformat(periodo['start']), datetime.fromisoformat(periodo['end']))
+                for periodo in info.get('busy', [])
+            ]
+    return ocupados, erros
+
+def consultar_disponibilidade(
+        time_min: str,
+        time_max: str,
+        duracao_minutos: int = 60,
+        calendar_ids: list | None = None,
+        respeitar_expediente: bool = True,
         timezone: str = "America/Sao_Paulo",
-        summary: str | None = None,
-        description: str | None = None,
-        location: str | None = None,
-        attendees: list | None = None,
-        send_notifications: bool = True,
-) -> str:
-    if service is None:
-        return "Não é possível comunicar com o Serviço de Calendário Google."
+):
+    try:
+        inicio = ler_instante(time_min, timezone)
+        fim = ler_instante(time_max, timezone)
+    except Exception:
+        return "O intervalo de consulta não está no formato ISO/RFC3339"
+
+    ocupados, erros = consultar_ocupado(inicio.isoformat(), fim.isoformat(), calendar_ids, timezone)
+    intervalos = IntervalosOcupados(chain.from_iterable(ocupados.values()))
+    livres = horarios_livres(intervalos, inicio, fim, timedelta(minutes=int(duracao_minutos)),
+                             respeitar_expediente, timezone)
 
+    resultado = {'horarios_livres': [{'inicio': a.isoformat(), 'fim': b.isoformat()} for a, b in livres]}
+    if erros:
+        resultado['calendarios_com_erro'] = erros
+    return resultado
+
+def _montar_evento(start, end, timezone, summary=None, description=None, location=None, attendees=None):
     # datetime validation
     try:
         datetime.fromisoformat(start)
@@ -145,27 +501,57 @@ def criar_evento_programado(
     
     if attendees:
         event['attendees'] = [{'email': email} for email in attendees]
-    
+    return event
+
+def _resolver_id_existente(service, calendar_id, event, send_notifications, fields):
+    """
+    Trata o 409 de uma criação com o ID de `novo_id_evento`: uma tentativa anterior já criou o evento, mas a
+    resposta se perdeu, e ele é devolvido como está. Se esse evento foi excluído depois (o mesmo evento criado e
+    excluído no turno), a criação é nova e é refeita com um ID aleatório.
+    """
     try:
-        event = service.events().insert(calendarId=calendar_id, body=event,
-                                        sendNotifications=send_notifications).execute()
-        return f"Evento criado com sucesso com o id '{event.get('id')}'. \nLink do evento: {event.get('htmlLink')}"
-    except Exception as e:
-        return f"Falha na execução da ferramenta `criar_evento_programado`. Erro: {e}"
+        existente = executar(service.events().get(calendarId=calendar_id, eventId=event['id'],
+                                                  fields=f'{fields},status'))
+    except HttpError as e:
+        if e.resp.status != 410:
+            raise
+        existente = {'status': 'cancelled'}
+    if existente.get('status') != 'cancelled':
+        return existente
+    return executar(service.events().insert(calendarId=calendar_id, body={**event, 'id': uuid.uuid4().hex},
+                                            sendNotifications=send_notifications, fields=fields))
 
-def atualizar_evento(
-        event_id: str,
-        calendar_id: str = 'primary',
-        start: str | None = None,
-        end: str | None = None,
-        timezone: str | None = None,
+def criar_evento_programado(
+        start: str,
+        end: str,
+        calendar_id='primary',
+        timezone: str = "America/Sao_Paulo",
         summary: str | None = None,
         description: str | None = None,
         location: str | None = None,
-):
-    if service is None:
-        return "Não é possível comunicar com o Serviço de Calendário Google."
+        attendees: list | None = None,
+        send_notifications: bool = True,
+) -> str:
+    event = _montar_evento(start, end, timezone, summary, description, location, attendees)
+    if isinstance(event, str):
+        return event
+    event['id'] = novo_id_evento(calendar_id, event)
+    
+    try:
+        service = obter_service()
+        try:
+            event = executar(service.events().insert(calendarId=calendar_id, body=event,
+                                                     sendNotifications=send_notifications, fields='id,htmlLink'))
+        except HttpError as e:
+            if e.resp.status != 409:
+                raise
+            event = _resolver_id_existente(service, calendar_id, event, send_notifications, 'id,htmlLink')
+        invalidar_calendario(calendar_id)
+        return f"Evento criado com sucesso com o id '{event.get('id')}'. \nLink do evento: {event.get('htmlLink')}"
+    except Exception as e:
+        return f"Falha na execução da ferramenta `criar_evento_programado`. Erro: {e}"
 
+def _montar_atualizacao(start=None, end=None, timezone=None, summary=None, description=None, location=None):
     updates = {}
     updated_parameters = set()
 
@@ -205,9 +591,27 @@ def atualizar_evento(
             updates[key] = value
             updated_parameters.add(key)
 
-    updated_parameters = ",".join(updated_parameters)
+    return updates, ",".join(updated_parameters)
+
+def atualizar_evento(
+        event_id: str,
+        calendar_id: str = 'primary',
+        start: str | None = None,
+        end: str | None = None,
+        timezone: str | None = None,
+        summary: str | None = None,
+        description: str | None = None,
+        location: str | None = None,
+):
+    atualizacao = _montar_atualizacao(start, end, timezone, summary, description, location)
+    if isinstance(atualizacao, str):
+        return atualizacao
+    updates, updated_parameters = atualizacao
+
     try:
-        _ = service.events().patch(calendarId=calendar_id, eventId=event_id, body=updates).execute()
+        service = obter_service()
+        _ = executar(service.events().patch(calendarId=calendar_id, eventId=event_id, body=updates, fields='id'))
+        invalidar_calendario(calendar_id)
         return f"O evento com o id {event_id} foi atualiza com as informações: [{''.join(updated_parameters)}] "
     except Exception as e:
         return f"Falha na execução da atualização. Erro: {e}"
@@ -218,16 +622,214 @@ def excluir_evento(
         calendar_id: str = 'primary'
 ) -> str:
     try:
-        service.events().delete(
-            calendarId=calendar_id,
-            eventId=event_id,
-            sendNotifications=send_notifications
-        ).execute()
+        service = obter_service()
+        try:
+            executar(service.events().delete(
+                calendarId=calendar_id,
+                eventId=event_id,
+                sendNotifications=send_notifications
+            ))
+        except HttpError as e:
+            # 410: o evento já foi excluído (por exemplo, por uma tentativa anterior cuja resposta se perdeu).
+            if e.resp.status != 410:
+                raise
+        invalidar_calendario(calendar_id)
         return f"Evento (ID: {event_id}) excluído com sucesso."
 
     except Exception as e:
         return f"Erro ao deletar evento do calendário. ID Evento: {event_id} - Mensagem de Erro:\n{str(e)}"  
      
+# ----------------------------------------
+# OPERAÇÕES EM LOTE
+# ----------------------------------------
+
+# Limite de requisições por lote da API do Google Calendar.
+TAMANHO_MAXIMO_LOTE = 50
+
+def _executar_em_lote(operacoes, status_sucesso=()):
+    """
+    Executa as operações (índice, calendar_id, requisição ou mensagem de erro de validação) em lotes HTTP.
+    Retorna um resultado por operação, na ordem original, preservando falhas parciais. Itens que falham
+    por limite de taxa ou erro 5xx são reenviados em um novo lote, com backoff. Respostas de erro com
+    status em `status_sucesso` contam como sucesso e trazem o status em 'status' (ex.: 409 em criações
+    idempotentes, que quem chama ainda confere).
+    """
+    service = obter_service()
+    resultados = {}
+    pendentes = []
+    for indice, calendar_id, requisicao in operacoes:
+        if isinstance(requisicao, str):
+            resultados[indice] = {'indice': indice, 'sucesso': False, 'erro': requisicao}
+        else:
+            pendentes.append((indice, calendar_id, requisicao))
+
+    for inicio in range(0, len(pendentes), TAMANHO_MAXIMO_LOTE):
+        bloco = pendentes[inicio:inicio + TAMANHO_MAXIMO_LOTE]
+
+        for tentativa in range(MAXIMO_TENTATIVAS):
+            retentar = set()
+
+            def callback(request_id, response, exception):
+                indice = int(request_id)
+                if exception is None:
+                    resultados[indice] = {'indice': indice, 'sucesso': True, 'event_id': (response or {}).get('id')}
+                elif isinstance(exception, HttpError) and exception.resp.status in status_sucesso:
+                    resultados[indice] = {'indice': indice, 'sucesso': True, 'event_id': None,
+                                          'status': exception.resp.status}
+                elif erro_retentavel(exception) and tentativa < MAXIMO_TENTATIVAS - 1:
+                    retentar.add(indice)
+                else:
+                    resultados[indice] = {'indice': indice, 'sucesso': False, 'erro': str(exception)}
+
+            lote = service.new_batch_http_request(callback=callback)
+            for indice, _, requisicao in bloco:
+                lote.add(requisicao, request_id=str(indice))
+            try:
+                executar(lote, custo=len(bloco))
+            except Exception as e:
+                for indice, _, _ in bloco:
+                    resultados.setdefault(indice, {'indice': indice, 'sucesso': False, 'erro': str(e)})
+                break
+
+            bloco = [operacao for operacao in bloco if operacao[0] in retentar]
+            if not bloco:
+                break
+            time.sleep(espera_com_jitter(tentativa))
+
+    for calendar_id in {calendar_id for _, calendar_id, _ in pendentes}:
+        invalidar_calendario(calendar_id)
+    return [resultados[indice] for indice in sorted(resultados)]
+
+def criar_eventos_em_lote(
+        eventos: list[dict],
+        calendar_id: str = 'primary',
+        send_notifications: bool = True,
+):
+    service = obter_service()
+
+    operacoes = []
+    corpos = {}
+    for indice, dados in enumerate(eventos):
+        destino = dados.get('calendar_id', calendar_id)
+        event = _montar_evento(
+            dados.get('start'), dados.get('end'), dados.get('timezone', "America/Sao_Paulo"),
+            dados.get('summary'), dados.get('description'), dados.get('location'), dados.get('attendees')
+        )
+        if not isinstance(event, str):
+            event['id'] = novo_id_evento(destino, event)
+            corpos[indice] = (destino, event)
+            event = service.events().insert(calendarId=destino, body=event, sendNotifications=send_notifications,
+                                            fields='id')
+        operacoes.append((indice, destino, event))
+
+    resultados = _executar_em_lote(operacoes, status_sucesso={409})
+    for resultado in resultados:
+        if not resultado['sucesso']:
+            continue
+        destino, event = corpos[resultado['indice']]
+        resultado['event_id'] = event['id']
+        # Os 409 são raros (reenvio após uma resposta perdida) e conferidos um a um, como na criação individual.
+        if resultado.pop('status', None) == 409:
+            try:
+                resultado['event_id'] = _resolver_id_existente(service, destino, event, send_notifications, 'id')['id']
+                invalidar_calendario(destino)
+            except Exception as e:
+                del resultado['event_id']
+                resultado.update(sucesso=False, erro=str(e))
+    return resultados
+
+def atualizar_eventos_em_lote(
+        atualizacoes: list[dict],
+        calendar_id: str = 'primary',
+):
+    service = obter_service()
+
+    operacoes = []
+    for indice, dados in enumerate(atualizacoes):
+        destino = dados.get('calendar_id', calendar_id)
+        if not dados.get('event_id'):
+            operacoes.append((indice, destino, "O ID do evento (event_id) não foi informado"))
+            continue
+        atualizacao = _montar_atualizacao(
+            dados.get('start'), dados.get('end'), dados.get('timezone'),
+            dados.get('summary'), dados.get('description'), dados.get('location')
+        )
+        if not isinstance(atualizacao, str):
+            atualizacao = service.events().patch(calendarId=destino, eventId=dados['event_id'], body=atualizacao[0],
+                                                 fields='id')
+        operacoes.append((indice, destino, atualizacao))
+    return _executar_em_lote(operacoes)
+
+def excluir_eventos_em_lote(
+        event_ids: list[str],
+        calendar_id: str = 'primary',
+        send_notifications: bool = True,
+):
+    service = obter_service()
+
+    operacoes = [
+        (indice, calendar_id,
+         service.events().delete(calendarId=calendar_id, eventId=event_id, sendNotifications=send_notifications))
+        for indice, event_id in enumerate(event_ids)
+    ]
+    resultados = _executar_em_lote(operacoes, status_sucesso={410})
+    for resultado in resultados:
+        resultado['event_id'] = event_ids[resultado['indice']]
+    return resultados
+
+# Sem `time_max` nem prazos, o planejamento considera os próximos dias.
+HORIZONTE_PLANEJAMENTO = timedelta(days=7)
+
+def planejar_tarefas(
+        tarefas: list[dict],
+        time_min: str | None = None,
+        time_max: str | None = None,
+        calendar_id: str = 'primary',
+        calendar_ids_ocupados: list | None = None,
+        incluir_fim_de_semana: bool = False,
+        apenas_simular: bool = False,
+        send_notifications: bool = False,
+        timezone: str = "America/Sao_Paulo",
+):
+    try:
+        inicio = ler_instante(time_min, timezone) if time_min else datetime.now(ZoneInfo(timezone))
+        fim = ler_instante(time_max, timezone) if time_max else None
+    except Exception:
+        return "O intervalo de planejamento não está no formato ISO/RFC3339"
+
+    validas = []
+    nao_agendadas = []
+    for indice, dados in enumerate(tarefas):
+        try:
+            validas.append(Tarefa.de_dict(indice, dados, timezone))
+        except ValueError as e:
+            nao_agendadas.append({'indice': indice, 'summary': dados.get('summary'), 'motivo': str(e)})
+    if fim is None:
+        prazos = [tarefa.prazo for tarefa in validas if tarefa.prazo]
+        fim = max(prazos) if prazos else inicio + HORIZONTE_PLANEJAMENTO
+
+    # Uma única consulta free/busy; com algum calendário ilegível, o plano poderia colidir com compromissos.
+    ocupados, erros = consultar_ocupado(inicio.isoformat(), fim.isoformat(),
+                                        calendar_ids_ocupados or [calendar_id], timezone)
+    if erros:
+        return f"Não foi possível consultar a agenda dos calendários: {erros}"
+    alocadas, sem_horario = alocar_tarefas(validas, IntervalosOcupados(chain.from_iterable(ocupados.values())),
+                                           inicio, fim, incluir_fim_de_semana, timezone)
+
+    agendadas = [{'indice': tarefa.indice, 'summary': tarefa.summary, 'inicio': a.isoformat(), 'fim': b.isoformat()}
+                 for tarefa, a, b in alocadas]
+    nao_agendadas += [{'indice': tarefa.indice, 'summary': tarefa.summary, 'motivo': motivo}
+                      for tarefa, motivo in sem_horario]
+    if not apenas_simular and alocadas:
+        eventos = [{'start': a.isoformat(), 'end': b.isoformat(), 'summary': tarefa.summary, 'timezone': timezone,
+                    'description': tarefa.description, 'location': tarefa.location}
+                   for tarefa, a, b in alocadas]
+        for agendada, resultado in zip(agendadas, criar_eventos_em_lote(eventos, calendar_id, send_notifications)):
+            agendada.update({chave: resultado[chave] for chave in ('sucesso', 'event_id', 'erro') if chave in resultado})
+
+    return {'simulacao': apenas_simular, 'agendadas': agendadas,
+            'nao_agendadas': sorted(nao_agendadas, key=lambda item: item['indice'])}
+
 # if __name__ == "__main__":
     # r1 = listar_calendarios(10)
     # r2 = listar_eventos_calendario(calendar_id='primary',max_capacity=20, time_min='2025-05-26T00:00:00-03:00', time_max='2025-05-30T23:59:00-03:00', show_deleted=False )
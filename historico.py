@@ -0,0 +1,48 @@
+import os
+
+from langchain_core.messages import HumanMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+
+# Orçamento de tokens do histórico enviado ao LLM (sem contar o prompt de sistema).
+ORCAMENTO_TOKENS = int(os.getenv("HISTORICO_ORCAMENTO_TOKENS", "6000"))
+# Quantas trocas recentes (mensagem do usuário e tudo o que veio depois dela) seguem sem alteração.
+TROCAS_INTEGRAIS = int(os.getenv("HISTORICO_TROCAS_INTEGRAIS", "3"))
+# Resultados de ferramentas mais antigos que isso são substituídos por um resumo de uma linha.
+TAMANHO_MAXIMO_TOOL_ANTIGA = 200
+
+
+def _resumir_resultado(mensagem: ToolMessage) -> ToolMessage:
+    conteudo = mensagem.content if isinstance(mensagem.content, str) else str(mensagem.content)
+    if len(conteudo) <= TAMANHO_MAXIMO_TOOL_ANTIGA:
+        return mensagem
+    resumo = (f"[Resultado antigo da ferramenta `{mensagem.name}` omitido ({len(conteudo)} caracteres). "
+              f"Chame a ferramenta novamente se precisar destes dados.]")
+    return mensagem.model_copy(update={"content": resumo})
+
+
+def janela_historico(mensagens: list, orcamento: int = ORCAMENTO_TOKENS, trocas_integrais: int = TROCAS_INTEGRAIS) -> list:
+    """
+    Seleciona as mensagens enviadas ao LLM: as últimas `trocas_integrais` trocas vão como estão; nas anteriores,
+    resultados de ferramentas longos viram um resumo e, do fim para o começo, entram só as trocas que cabem no
+    que sobrar de `orcamento`. Os cortes acontecem sempre antes de uma mensagem do usuário, então nenhuma
+    chamada de ferramenta fica sem o seu resultado.
+    """
+    indices_usuario = [i for i, mensagem in enumerate(mensagens) if isinstance(mensagem, HumanMessage)]
+    # A troca em andamento sempre vai inteira.
+    trocas_integrais = max(trocas_integrais, 1)
+    corte = indices_usuario[-trocas_integrais] if len(indices_usuario) > trocas_integrais else 0
+
+    recentes = mensagens[corte:]
+    antigas = [_resumir_resultado(m) if isinstance(m, ToolMessage) else m for m in mensagens[:corte]]
+    restante = orcamento - count_tokens_approximately(recentes)
+    if not antigas or restante <= 0:
+        return recentes
+
+    antigas = trim_messages(antigas, max_tokens=restante, token_counter=count_tokens_approximately,
+                            strategy="last", start_on="human", allow_partial=False)
+    return antigas + recentes
+
+
+def preparar_historico(state) -> dict:
+    """`pre_model_hook` do agente: limita o que vai ao LLM sem alterar as mensagens salvas no checkpoint."""
+    return {"llm_input_messages": janela_historico(state["messages"])}
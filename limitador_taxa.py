@@ -0,0 +1,80 @@
+import os
+import random
+import threading
+import time
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+# Cota compartilhada por todas as sessões do processo: requisições por segundo e rajada máxima.
+TAXA_MAXIMA = float(os.getenv("GOOGLE_API_TAXA_MAXIMA", "10"))
+RAJADA_MAXIMA = int(os.getenv("GOOGLE_API_RAJADA_MAXIMA", "20"))
+MAXIMO_TENTATIVAS = int(os.getenv("GOOGLE_API_MAXIMO_TENTATIVAS", "5"))
+ESPERA_BASE = 0.5
+ESPERA_MAXIMA = 32.0
+
+STATUS_RETENTAVEIS = {429, 500, 502, 503, 504}
+MOTIVOS_RETENTAVEIS = {"rateLimitExceeded", "userRateLimitExceeded"}
+
+
+class BaldeDeTokens:
+    """Limitador token bucket thread-safe: libera `taxa` tokens por segundo, acumulando até `capacidade`."""
+
+    def __init__(self, taxa: float = TAXA_MAXIMA, capacidade: int = RAJADA_MAXIMA):
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self._tokens = float(capacidade)
+        self._atualizado_em = time.monotonic()
+        self._lock = threading.Lock()
+
+    def adquirir(self, quantidade: int = 1):
+        """Bloqueia até haver `quantidade` tokens disponíveis (limitada à capacidade do balde)."""
+        quantidade = min(quantidade, self.capacidade)
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._tokens = min(self.capacidade, self._tokens + (agora - self._atualizado_em) * self.taxa)
+                self._atualizado_em = agora
+                if self._tokens >= quantidade:
+                    self._tokens -= quantidade
+                    return
+                espera = (quantidade - self._tokens) / self.taxa
+            time.sleep(espera)
+
+
+balde = BaldeDeTokens()
+
+
+def erro_retentavel(erro: Exception) -> bool:
+    """Indica se vale repetir a requisição: limite de taxa, erro 5xx ou falha de transporte."""
+    if isinstance(erro, HttpError):
+        if erro.resp.status in STATUS_RETENTAVEIS:
+            return True
+        if erro.resp.status == 403:
+            return any(detalhe.get("reason") in MOTIVOS_RETENTAVEIS
+                       for detalhe in (erro.error_details or []) if isinstance(detalhe, dict))
+        return False
+    return isinstance(erro, (OSError, httplib2.HttpLib2Error))
+
+
+def espera_com_jitter(tentativa: int) -> float:
+    """Backoff exponencial com "full jitter": sorteia a espera entre zero e o teto da tentativa."""
+    return random.uniform(0, min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** tentativa))
+
+
+def executar_com_retentativas(funcao, custo: int = 1, tentativas: int = MAXIMO_TENTATIVAS, ao_retentar=None):
+    """
+    Executa `funcao` respeitando o limitador compartilhado e repetindo, com backoff exponencial e jitter,
+    as falhas retentáveis. `custo` é o número de requisições da cota consumidas (ex.: itens de um lote).
+    `ao_retentar`, se informado, é chamado com o erro antes de cada nova tentativa.
+    """
+    for tentativa in range(tentativas):
+        balde.adquirir(custo)
+        try:
+            return funcao()
+        except Exception as e:
+            if tentativa == tentativas - 1 or not erro_retentavel(e):
+                raise
+            if ao_retentar is not None:
+                ao_retentar(e)
+            time.sleep(espera_com_jitter(tentativa))
@@ -0,0 +1,233 @@
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BUCKETS_BYTES = (1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+METRICAS = []
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nome: str, descricao: str, rotulos: tuple[str, ...] = ()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = rotulos
+        self._valores: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        METRICAS.append(self)
+
+    def _chave(self, rotulos: dict) -> tuple:
+        return tuple(str(rotulos.get(rotulo, "")) for rotulo in self.rotulos)
+
+    def _rotulos_texto(self, chave: tuple, *extras: tuple[str, str]) -> str:
+        pares = list(zip(self.rotulos, chave)) + list(extras)
+        if not pares:
+            return ""
+        return "{" + ",".join(f'{rotulo}="{valor}"' for rotulo, valor in pares) + "}"
+
+    def exportar(self) -> list[str]:
+        with self._lock:
+            amostras = self._amostras()
+        return [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}"] + amostras
+
+    def _amostras(self) -> list[str]:
+        return [f"{self.nome}{self._rotulos_texto(chave)} {valor}" for chave, valor in self._valores.items()]
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def incrementar(self, valor: float = 1, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+
+class Medidor(_Metrica):
+    tipo = "gauge"
+
+    def somar(self, valor: float, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nome, descricao, rotulos=(), buckets=BUCKETS_LATENCIA):
+        super().__init__(nome, descricao, rotulos)
+        self.buckets = tuple(buckets)
+
+    def observar(self, valor: float, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            # [contagem acumulada por bucket..., contagem total, soma]
+            serie = self._valores.setdefault(chave, [0] * (len(self.buckets) + 1) + [0.0])
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[i] += 1
+            serie[-2] += 1
+            serie[-1] += valor
+
+    def _amostras(self):
+        linhas = []
+        for chave, serie in self._valores.items():
+            for limite, contagem in zip(self.buckets, serie):
+                linhas.append(f"{self.nome}_bucket{self._rotulos_texto(chave, ('le', limite))} {contagem}")
+            linhas.append(f"{self.nome}_bucket{self._rotulos_texto(chave, ('le', '+Inf'))} {serie[-2]}")
+            linhas.append(f"{self.nome}_count{self._rotulos_texto(chave)} {serie[-2]}")
+            linhas.append(f"{self.nome}_sum{self._rotulos_texto(chave)} {serie[-1]}")
+        return linhas
+
+
+def exportar_prometheus() -> str:
+    """Todas as métricas no formato de texto de exposição do Prometheus."""
+    return "\n".join(linha for metrica in METRICAS for linha in metrica.exportar()) + "\n"
+
+
+# ----------------------------------------
+# MÉTRICAS DA APLICAÇÃO
+# ----------------------------------------
+
+api_duracao = Histograma("agent_calendar_api_duracao_segundos",
+                         "Latência das requisições à API do Google Calendar.", ("metodo",))
+api_requisicoes = Contador("agent_calendar_api_requisicoes_total",
+                           "Requisições à API do Google Calendar por método e resultado.", ("metodo", "status"))
+api_retentativas = Contador("agent_calendar_api_retentativas_total",
+                            "Requisições repetidas após erro retentável.", ("metodo",))
+api_bytes = Histograma("agent_calendar_api_resposta_bytes",
+                       "Tamanho das respostas HTTP da API do Google Calendar.", (), BUCKETS_BYTES)
+api_paginas = Contador("agent_calendar_api_paginas_total", "Páginas de listagem recebidas da API.", ("metodo",))
+api_em_andamento = Medidor("agent_calendar_api_em_andamento", "Requisições à API em andamento.")
+api_cache = Contador("agent_calendar_api_cache_total",
+                     "Leituras com ETag: 'revalidado' (304, veio do cache), 'alterado' ou 'baixado' (sem cópia).",
+                     ("metodo", "resultado"))
+
+tool_duracao = Histograma("agent_calendar_tool_duracao_segundos", "Duração das chamadas de ferramentas.", ("tool",))
+tool_chamadas = Contador("agent_calendar_tool_chamadas_total", "Chamadas de ferramentas por resultado.",
+                         ("tool", "status"))
+tool_em_andamento = Medidor("agent_calendar_tool_em_andamento", "Ferramentas em execução.", ("tool",))
+
+llm_duracao = Histograma("agent_calendar_llm_duracao_segundos", "Duração das chamadas ao LLM.", ("modelo",))
+llm_tokens = Contador("agent_calendar_llm_tokens_total", "Tokens consumidos nas chamadas ao LLM.",
+                      ("modelo", "tipo"))
+
+roteador_respostas = Contador("agent_calendar_roteador_respostas_total",
+                              "Turnos por caminho: intenção atendida sem o LLM ou 'agente'.", ("intencao",))
+
+espelho_duracao = Histograma("agent_calendar_espelho_duracao_segundos",
+                             "Duração das operações no espelho local de eventos (SQLite).", ("operacao",))
+
+pre_carregamento = Contador("agent_calendar_pre_carregamento_total",
+                            "Consultas de disponibilidade respondidas pela agenda pré-carregada da sessão: 'usado' "
+                            "ou 'recarregado' (após uma escrita ou a expiração).", ("leitura", "resultado"))
+
+
+# ----------------------------------------
+# LOGS ESTRUTURADOS
+# ----------------------------------------
+
+class FormatadorJson(logging.Formatter):
+    """Uma linha JSON por registro; campos passados em `extra={"campos": {...}}` entram no objeto."""
+
+    def format(self, record):
+        registro = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensagem": record.getMessage(),
+            **getattr(record, "campos", {}),
+        }
+        if record.exc_info:
+            registro["excecao"] = self.formatException(record.exc_info)
+        return json.dumps(registro, ensure_ascii=False, default=str)
+
+
+logger = logging.getLogger("agent_calendar")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(FormatadorJson())
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def registrar(mensagem: str, nivel: int = logging.INFO, **campos):
+    logger.log(nivel, mensagem, extra={"campos": campos})
+
+
+@contextmanager
+def cronometrar(histograma: Histograma, **rotulos):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        histograma.observar(time.perf_counter() - inicio, **rotulos)
+
+
+# ----------------------------------------
+# INSTRUMENTAÇÃO
+# ----------------------------------------
+
+def medir_tool(nome: str):
+    """Decorador para as funções das ferramentas: latência, resultado, concorrência e log estruturado."""
+
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def wrapper(*args, **kwargs):
+            tool_em_andamento.somar(1, tool=nome)
+            inicio = time.perf_counter()
+            status = "ok"
+            try:
+                resultado = funcao(*args, **kwargs)
+                # As ferramentas devolvem o erro como texto para o LLM em vez de lançar exceção.
+                if isinstance(resultado, str) and resultado.startswith(("Falha", "Erro")):
+                    status = "erro"
+                return resultado
+            except Exception:
+                status = "erro"
+                raise
+            finally:
+                duracao = time.perf_counter() - inicio
+                tool_em_andamento.somar(-1, tool=nome)
+                tool_duracao.observar(duracao, tool=nome)
+                tool_chamadas.incrementar(tool=nome, status=status)
+                registrar("tool_chamada", tool=nome, status=status, duracao_s=round(duracao, 4))
+
+        return wrapper
+
+    return decorador
+
+
+class CallbackMetricasLLM(BaseCallbackHandler):
+    """Callback do LangChain que mede a latência e os tokens de cada chamada ao LLM."""
+
+    def __init__(self):
+        self._inicios = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._inicios[run_id] = (time.perf_counter(), (metadata or {}).get("ls_model_name", ""))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        inicio, modelo = self._inicios.pop(run_id, (None, ""))
+        if inicio is not None:
+            llm_duracao.observar(time.perf_counter() - inicio, modelo=modelo)
+        for geracoes in response.generations:
+            for geracao in geracoes:
+                uso = getattr(getattr(geracao, "message", None), "usage_metadata", None) or {}
+                for tipo in ("input_tokens", "output_tokens"):
+                    if uso.get(tipo):
+                        llm_tokens.incrementar(uso[tipo], modelo=modelo, tipo=tipo)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._inicios.pop(run_id, None)
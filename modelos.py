@@ -0,0 +1,69 @@
+from dataclasses import dataclass
+
+# Projeções (`fields=`) pedidas à API: apenas os campos usados pelas ferramentas trafegam pela rede.
+CAMPOS_EVENTO = (
+    "id,summary,description,start,end,status,creator(email),organizer(email),"
+    "attendees(email,responseStatus),location,hangoutLink,conferenceData(entryPoints(entryPointType,uri)),"
+    "recurringEventId,iCalUID,recurrence,originalStartTime"
+)
+CAMPOS_LISTA_EVENTOS = f"etag,nextPageToken,nextSyncToken,timeZone,items({CAMPOS_EVENTO})"
+CAMPOS_LISTA_CALENDARIOS = "etag,nextPageToken,items(id,summary,description,primary,timeZone,etag,accessRole)"
+
+
+@dataclass(slots=True)
+class Evento:
+    """Registro compacto de um evento, com os campos usados pelas ferramentas."""
+    id: str
+    summary: str | None = None
+    description: str | None = None
+    start: dict | None = None
+    end: dict | None = None
+    status: str | None = None
+    creator: dict | None = None
+    organizer: dict | None = None
+    attendees: list | None = None
+    location: str | None = None
+    hangout_link: str | None = None
+    conference_data: dict | None = None
+    recurring_event_id: str | None = None
+    ical_uid: str | None = None
+
+    @classmethod
+    def de_recurso(cls, recurso: dict) -> "Evento":
+        """Cria o registro a partir do recurso `Event` retornado pela API."""
+        return cls(
+            recurso.get('id'),
+            recurso.get('summary'),
+            recurso.get('description'),
+            recurso.get('start'),
+            recurso.get('end'),
+            recurso.get('status'),
+            recurso.get('creator'),
+            recurso.get('organizer'),
+            recurso.get('attendees'),
+            recurso.get('location'),
+            recurso.get('hangoutLink'),
+            recurso.get('conferenceData'),
+            recurso.get('recurringEventId'),
+            recurso.get('iCalUID'),
+        )
+
+    def como_dict(self) -> dict:
+        """Dicionário com as chaves da API, omitindo os campos vazios."""
+        valores = {
+            'id': self.id,
+            'summary': self.summary,
+            'description': self.description,
+            'start': self.start,
+            'end': self.end,
+            'status': self.status,
+            'creator': self.creator,
+            'organizer': self.organizer,
+            'attendees': self.attendees,
+            'location': self.location,
+            'hangoutLink': self.hangout_link,
+            'conferenceData': self.conference_data,
+            'recurringEventId': self.recurring_event_id,
+            'iCalUID': self.ical_uid,
+        }
+        return {chave: valor for chave, valor in valores.items() if valor is not None}
@@ -0,0 +1,12 @@
+from datetime import time
+
+# Preferências do usuário usadas pelo prompt do agente e pelas ferramentas de agenda.
+FUSO_HORARIO = "America/Sao_Paulo"
+INICIO_EXPEDIENTE = time(9)
+FIM_EXPEDIENTE = time(18)
+INICIO_ALMOCO = time(12)
+FIM_ALMOCO = time(13)
+# Academia ou aula de inglês; após o fim deste bloco o usuário estuda e trabalha em projetos pessoais.
+INICIO_NOITE = time(18)
+FIM_NOITE = time(20)
+FIM_PROJETOS_PESSOAIS = time(23)
@@ -0,0 +1,124 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from disponibilidade import PERIODOS, IntervalosOcupados, janelas_do_periodo, ler_instante
+from perfil_usuario import FUSO_HORARIO
+
+# Inícios propostos caem em múltiplos deste intervalo (9:00, 9:15...), como um humano agendaria.
+ALINHAMENTO = timedelta(minutes=15)
+# 1 é a prioridade mais alta e 5 a mais baixa.
+PRIORIDADE_PADRAO = 3
+
+
+@dataclass(slots=True)
+class Tarefa:
+    """Tarefa a posicionar na agenda, já validada."""
+    indice: int
+    summary: str
+    duracao: timedelta
+    prazo: datetime | None = None
+    prioridade: int = PRIORIDADE_PADRAO
+    periodo: str = "expediente"
+    description: str | None = None
+    location: str | None = None
+
+    @classmethod
+    def de_dict(cls, indice: int, dados: dict, fuso_horario: str = FUSO_HORARIO) -> "Tarefa":
+        """Cria a tarefa a partir do dicionário recebido pela ferramenta; levanta ValueError se algo for inválido."""
+        if not dados.get("summary"):
+            raise ValueError("a tarefa precisa de um 'summary'")
+        duracao = int(dados.get("duracao_minutos") or 0)
+        if duracao <= 0:
+            raise ValueError("'duracao_minutos' deve ser um número positivo")
+        periodo = dados.get("periodo") or "expediente"
+        if periodo not in PERIODOS:
+            raise ValueError(f"'periodo' deve ser um de: {', '.join(PERIODOS)}")
+        prazo = None
+        if dados.get("prazo"):
+            try:
+                prazo = ler_instante(dados["prazo"], fuso_horario)
+            except ValueError:
+                raise ValueError("o 'prazo' não está no formato ISO/RFC3339") from None
+        return cls(indice, dados["summary"], timedelta(minutes=duracao), prazo,
+                   int(dados.get("prioridade") or PRIORIDADE_PADRAO), periodo,
+                   dados.get("description"), dados.get("location"))
+
+
+def _alinhar(instante: datetime) -> datetime:
+    resto = (instante - instante.replace(hour=0, minute=0, second=0, microsecond=0)) % ALINHAMENTO
+    return instante + (ALINHAMENTO - resto) % ALINHAMENTO
+
+
+def _reservar(trechos: list[tuple[datetime, datetime]], inicio: datetime, fim: datetime) -> list:
+    """Remove [inicio, fim) da lista ordenada de trechos livres."""
+    restantes = []
+    for livre_inicio, livre_fim in trechos:
+        if livre_fim <= inicio or livre_inicio >= fim:
+            restantes.append((livre_inicio, livre_fim))
+            continue
+        if livre_inicio < inicio:
+            restantes.append((livre_inicio, inicio))
+        if fim < livre_fim:
+            restantes.append((fim, livre_fim))
+    return restantes
+
+
+def alocar_tarefas(
+        tarefas: list[Tarefa],
+        ocupados: IntervalosOcupados,
+        time_min: datetime,
+        time_max: datetime,
+        incluir_fim_de_semana: bool = False,
+        fuso_horario: str = FUSO_HORARIO,
+) -> tuple[list[tuple[Tarefa, datetime, datetime]], list[tuple[Tarefa, str]]]:
+    """
+    Posiciona as tarefas nos horários livres de [time_min, time_max) dentro do período de cada uma.
+
+    As tarefas são atendidas por prazo mais cedo (as sem prazo por último), depois por prioridade e por
+    duração decrescente; cada uma ocupa o primeiro trecho livre em que cabe (first-fit) e esse tempo sai dos
+    trechos livres de todos os períodos. Retorna as tarefas alocadas, com início e fim, e as que não couberam,
+    com o motivo.
+    """
+    fuso = ZoneInfo(fuso_horario)
+    time_min, time_max = time_min.astimezone(fuso), time_max.astimezone(fuso)
+
+    livres = {}
+    for periodo in {tarefa.periodo for tarefa in tarefas}:
+        trechos = []
+        dia = time_min.date()
+        while dia <= time_max.date():
+            if incluir_fim_de_semana or dia.weekday() < 5:
+                for inicio, fim in janelas_do_periodo(dia, fuso, periodo):
+                    inicio, fim = max(inicio, time_min), min(fim, time_max)
+                    if inicio < fim:
+                        trechos.extend(ocupados.livres(inicio, fim))
+            dia += timedelta(days=1)
+        livres[periodo] = trechos
+
+    sem_prazo = datetime.max.replace(tzinfo=fuso)
+    ordem = sorted(tarefas, key=lambda t: (t.prazo or sem_prazo, t.prioridade, -t.duracao, t.indice))
+    alocadas, nao_alocadas = [], []
+    for tarefa in ordem:
+        limite = min(time_max, tarefa.prazo) if tarefa.prazo else time_max
+        encontrado = None
+        for livre_inicio, livre_fim in livres[tarefa.periodo]:
+            inicio = _alinhar(livre_inicio)
+            if inicio + tarefa.duracao > limite:
+                break
+            if inicio + tarefa.duracao <= livre_fim:
+                encontrado = (inicio, inicio + tarefa.duracao)
+                break
+
+        if encontrado is None:
+            motivo = "sem horário livre antes do prazo" if tarefa.prazo and tarefa.prazo < time_max \
+                else "sem horário livre no período"
+            nao_alocadas.append((tarefa, motivo))
+            continue
+        alocadas.append((tarefa, *encontrado))
+        for periodo in livres:
+            livres[periodo] = _reservar(livres[periodo], *encontrado)
+
+    alocadas.sort(key=lambda alocacao: alocacao[1])
+    nao_alocadas.sort(key=lambda item: item[0].indice)
+    return alocadas, nao_alocadas
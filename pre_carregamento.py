@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+
+from espelho_eventos import INTERVALO_MINIMO_SYNC
+
+# Dias à frente pré-carregados quando a sessão começa, por quanto tempo (segundos) o pré-carregamento vale e
+# quanto uma leitura espera por um pré-carregamento ainda em andamento antes de ir à API por conta própria.
+# Por padrão a validade é o intervalo de sincronização do espelho, para que um evento criado ou movido fora
+# do app apareça na disponibilidade tão cedo quanto na listagem.
+HORIZONTE_PRE_CARREGAMENTO = timedelta(days=int(os.getenv("PRE_CARREGAMENTO_DIAS", "14")))
+VALIDADE_PRE_CARREGAMENTO = float(os.getenv("PRE_CARREGAMENTO_VALIDADE", str(INTERVALO_MINIMO_SYNC)))
+ESPERA_PRE_CARREGAMENTO = float(os.getenv("PRE_CARREGAMENTO_ESPERA", "5"))
+
+# Sessão do Chainlit do turno em andamento; None fora de uma sessão (benchmarks, scripts).
+sessao_atual: ContextVar[str | None] = ContextVar("sessao_atual", default=None)
+
+
+class AgendaPreCarregada:
+    """
+    Períodos ocupados (free/busy) do calendário principal em [inicio, fim), buscados em segundo plano quando a
+    sessão começa. Enquanto válidos, as consultas de disponibilidade da sessão são respondidas sem ida à API.
+    Uma escrita na conta os invalida, e a próxima consulta os recarrega.
+    """
+
+    def __init__(self, conta: str, inicio: datetime, fim: datetime, validade: float = VALIDADE_PRE_CARREGAMENTO):
+        self.conta = conta
+        self.inicio = inicio
+        self.fim = fim
+        self.validade = validade
+        self._ocupados: list[tuple[datetime, datetime]] = []
+        self._ocupados_em: float | None = None
+        # Incrementada a cada invalidação: uma carga iniciada antes de uma escrita não é registrada depois dela.
+        self.geracao = 0
+        self._concluida = threading.Event()
+        self._lock = threading.Lock()
+
+    def _recente(self, instante: float | None) -> bool:
+        return instante is not None and time.monotonic() - instante < self.validade
+
+    def registrar_ocupados(self, ocupados: list[tuple[datetime, datetime]], geracao: int):
+        with self._lock:
+            if geracao != self.geracao:
+                return
+            self._ocupados = sorted(ocupados)
+            self._ocupados_em = time.monotonic()
+
+    def concluir(self):
+        """Marca o fim do pré-carregamento, com ou sem sucesso; quem esperava por ele segue em frente."""
+        self._concluida.set()
+
+    def aguardar(self, timeout: float = ESPERA_PRE_CARREGAMENTO) -> bool:
+        return self._concluida.wait(timeout)
+
+    def invalidar(self):
+        with self._lock:
+            self.geracao += 1
+            self._ocupados_em = None
+
+    def cobre(self, inicio: datetime, fim: datetime) -> bool:
+        return self.inicio <= inicio and fim <= self.fim
+
+    def ocupados_em(self, inicio: datetime, fim: datetime) -> list[tuple[datetime, datetime]] | None:
+        """Períodos ocupados de [inicio, fim) recortados da agenda, ou None se ela não cobre a janela ou expirou."""
+        with self._lock:
+            if not self._recente(self._ocupados_em) or not self.cobre(inicio, fim):
+                return None
+            return [(max(a, inicio), min(b, fim)) for a, b in self._ocupados if a < fim and b > inicio]
+
+
+_agendas: dict[str, AgendaPreCarregada] = {}
+_lock_agendas = threading.Lock()
+
+
+def iniciar(sessao: str, conta: str, inicio: datetime) -> AgendaPreCarregada:
+    """Registra a agenda da sessão (ainda por carregar), cobrindo `HORIZONTE_PRE_CARREGAMENTO` a partir de `inicio`."""
+    agenda = AgendaPreCarregada(conta, inicio, inicio + HORIZONTE_PRE_CARREGAMENTO)
+    with _lock_agendas:
+        _agendas[sessao] = agenda
+    return agenda
+
+
+def obter(sessao: str | None = None) -> AgendaPreCarregada | None:
+    sessao = sessao_atual.get() if sessao is None else sessao
+    if sessao is None:
+        return None
+    with _lock_agendas:
+        return _agendas.get(sessao)
+
+
+def encerrar(sessao: str):
+    with _lock_agendas:
+        _agendas.pop(sessao, None)
+
+
+def invalidar_conta(conta: str):
+    """Invalida a agenda de todas as sessões da conta, após uma escrita em qualquer um dos seus calendários."""
+    with _lock_agendas:
+        agendas = [agenda for agenda in _agendas.values() if agenda.conta == conta]
+    for agenda in agendas:
+        agenda.invalidar()
@@ -0,0 +1,296 @@
+"""
+Rastros de execução de cada turno do agente: uma árvore de trechos (nós do grafo, chamadas ao LLM com os
+tokens e chamadas de ferramentas com o tamanho dos argumentos e do resultado), gravada como uma linha JSON
+por turno em `RASTROS_ARQUIVO`.
+
+Para analisar, na raiz do repositório:
+    python -m rastreamento                      # resumo dos últimos turnos: iterações, tempo de LLM e de tools
+    python -m rastreamento --turno <id>         # árvore de um turno
+    python -m rastreamento --flamegraph > turnos.folded
+O formato "folded" é aceito pelo flamegraph.pl e pelo speedscope (https://www.speedscope.app).
+"""
+import argparse
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+CAMINHO_RASTROS = os.getenv("RASTROS_ARQUIVO", "rastros.jsonl")
+RASTROS_ATIVOS = os.getenv("RASTROS_ATIVOS", "1") == "1"
+# Ao atingir o tamanho máximo (MB), o arquivo é girado para `<arquivo>.1`; são mantidos até esse número de antigos.
+TAMANHO_MAXIMO_RASTROS = int(float(os.getenv("RASTROS_TAMANHO_MAXIMO_MB", "20")) * 1024 * 1024)
+ARQUIVOS_ANTIGOS_RASTROS = int(os.getenv("RASTROS_ARQUIVOS_ANTIGOS", "3"))
+
+_gravadores: dict[str, tuple[logging.Logger, QueueListener]] = {}
+_lock_gravadores = threading.Lock()
+
+
+def _gravador(caminho: str) -> logging.Logger:
+    """
+    Logger que acrescenta linhas ao arquivo de rastros. Quem grava (o fim do turno, no event loop) só
+    enfileira a linha; a escrita e o giro do arquivo ficam na thread do `QueueListener`.
+    """
+    with _lock_gravadores:
+        if caminho not in _gravadores:
+            arquivo = RotatingFileHandler(caminho, maxBytes=TAMANHO_MAXIMO_RASTROS,
+                                          backupCount=ARQUIVOS_ANTIGOS_RASTROS, encoding="utf-8", delay=True)
+            fila = queue.SimpleQueue()
+            ouvinte = QueueListener(fila, arquivo)
+            ouvinte.start()
+            # Fora da hierarquia do `logging`: as linhas não chegam aos handlers da aplicação.
+            gravador = logging.Logger(f"agent_calendar.rastros.{caminho}")
+            gravador.addHandler(QueueHandler(fila))
+            _gravadores[caminho] = (gravador, ouvinte)
+        return _gravadores[caminho][0]
+
+
+@atexit.register
+def encerrar_gravacao():
+    """Grava as linhas ainda na fila e para as threads de gravação (também chamada na saída do processo)."""
+    with _lock_gravadores:
+        gravadores = list(_gravadores.values())
+        _gravadores.clear()
+    for _, ouvinte in gravadores:
+        ouvinte.stop()
+        for handler in ouvinte.handlers:
+            handler.close()
+
+
+def _tamanho(valor) -> int:
+    conteudo = getattr(valor, "content", valor)
+    return len(conteudo if isinstance(conteudo, str) else json.dumps(conteudo, ensure_ascii=False, default=str))
+
+
+class RastreadorTurno(BaseCallbackHandler):
+    """
+    Callback do LangChain que monta a árvore de trechos de um turno. As execuções internas do LangChain
+    (sequências, prompts, parsers) não viram trechos: LLMs e ferramentas ficam pendurados no nó do grafo
+    mais próximo. Um rastreador por turno; `finalizar` grava o rastro.
+    """
+
+    # Chamado na própria thread do evento, para que os tempos não incluam a espera por um executor.
+    run_inline = True
+
+    def __init__(self, thread_id: str, caminho: str = CAMINHO_RASTROS):
+        self.caminho = caminho
+        self.turno = uuid.uuid4().hex[:12]
+        self.thread_id = thread_id
+        self.inicio = time.perf_counter()
+        self.criado_em = datetime.now(timezone.utc).isoformat()
+        self.trechos: list[dict] = []
+        self._por_run: dict = {}
+        self._ancestral: dict = {}
+        self._lock = threading.Lock()
+
+    def _agora_ms(self) -> float:
+        return round((time.perf_counter() - self.inicio) * 1000, 3)
+
+    def _abrir(self, run_id, parent_run_id, tipo: str, nome: str, **atributos) -> dict:
+        with self._lock:
+            trecho = {"id": len(self.trechos) + 1, "pai": self._ancestral.get(parent_run_id), "tipo": tipo,
+                      "nome": nome, "inicio_ms": self._agora_ms(), **atributos}
+            self.trechos.append(trecho)
+            if run_id is not None:
+                self._por_run[run_id] = trecho
+                self._ancestral[run_id] = trecho["id"]
+            return trecho
+
+    def _fechar(self, run_id, **atributos) -> dict | None:
+        with self._lock:
+            trecho = self._por_run.pop(run_id, None)
+            if trecho is not None:
+                trecho["duracao_ms"] = round(self._agora_ms() - trecho["inicio_ms"], 3)
+                trecho.update(atributos)
+            return trecho
+
+    @contextmanager
+    def trecho(self, nome: str, tipo: str = "etapa", **atributos):
+        """Trecho manual, para etapas do turno que não passam pelos callbacks (ex.: o roteador de intenções)."""
+        chave = object()
+        self._abrir(chave, None, tipo, nome, **atributos)
+        try:
+            yield
+        finally:
+            self._fechar(chave)
+
+    # Nós do grafo (e a execução raiz).
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        nome = kwargs.get("name") or (serialized or {}).get("name") or "chain"
+        if parent_run_id is None or nome == (metadata or {}).get("langgraph_node"):
+            self._abrir(run_id, parent_run_id, "grafo" if parent_run_id is None else "no", nome)
+        else:
+            with self._lock:
+                self._ancestral[run_id] = self._ancestral.get(parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._fechar(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._fechar(run_id, erro=str(error)[:200])
+
+    # Chamadas ao LLM.
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        self._abrir(run_id, parent_run_id, "llm", (metadata or {}).get("ls_model_name") or "llm",
+                    mensagens=sum(len(lista) for lista in messages))
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        with self._lock:
+            trecho = self._por_run.get(run_id)
+            if trecho is not None and "primeiro_token_ms" not in trecho:
+                trecho["primeiro_token_ms"] = round(self._agora_ms() - trecho["inicio_ms"], 3)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        atributos = {"tokens_entrada": 0, "tokens_saida": 0, "chamadas_ferramenta": 0}
+        for geracoes in response.generations:
+            for geracao in geracoes:
+                mensagem = getattr(geracao, "message", None)
+                uso = getattr(mensagem, "usage_metadata", None) or {}
+                atributos["tokens_entrada"] += uso.get("input_tokens") or 0
+                atributos["tokens_saida"] += uso.get("output_tokens") or 0
+                atributos["chamadas_ferramenta"] += len(getattr(mensagem, "tool_calls", None) or [])
+        self._fechar(run_id, **atributos)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._fechar(run_id, erro=str(error)[:200])
+
+    # Chamadas de ferramentas.
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._abrir(run_id, parent_run_id, "tool", (serialized or {}).get("name") or kwargs.get("name") or "tool",
+                    bytes_argumentos=len(input_str or ""))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._fechar(run_id, bytes_resultado=_tamanho(output))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._fechar(run_id, erro=str(error)[:200])
+
+    def finalizar(self, **atributos) -> dict:
+        """Fecha o turno e enfileira o rastro para o arquivo (ver `_gravador`); retorna o registro."""
+        with self._lock:
+            trechos = [dict(trecho) for trecho in self.trechos]
+        llms = [t for t in trechos if t["tipo"] == "llm"]
+        tools = [t for t in trechos if t["tipo"] == "tool"]
+        registro = {
+            "turno": self.turno,
+            "thread_id": self.thread_id,
+            "inicio": self.criado_em,
+            "duracao_ms": self._agora_ms(),
+            **atributos,
+            "iteracoes_llm": len(llms),
+            "llm_ms": round(sum(t.get("duracao_ms", 0) for t in llms), 3),
+            "tools_ms": round(sum(t.get("duracao_ms", 0) for t in tools), 3),
+            "tokens_entrada": sum(t.get("tokens_entrada", 0) for t in llms),
+            "tokens_saida": sum(t.get("tokens_saida", 0) for t in llms),
+            "trechos": trechos,
+        }
+        if RASTROS_ATIVOS:
+            _gravador(self.caminho).info(json.dumps(registro, ensure_ascii=False, default=str))
+        return registro
+
+
+# ----------------------------------------
+# ANÁLISE
+# ----------------------------------------
+
+def carregar(caminho: str = CAMINHO_RASTROS) -> list[dict]:
+    """Rastros do arquivo e dos antigos ainda mantidos, do mais antigo para o mais recente."""
+    registros = []
+    for indice in range(ARQUIVOS_ANTIGOS_RASTROS, -1, -1):
+        nome = f"{caminho}.{indice}" if indice else caminho
+        if os.path.exists(nome):
+            with open(nome, encoding="utf-8") as arquivo:
+                registros.extend(json.loads(linha) for linha in arquivo if linha.strip())
+    return registros
+
+
+def pilhas_dobradas(registros: list[dict]) -> list[str]:
+    """
+    Linhas no formato "folded" (`turno;no;trecho valor`), com o tempo próprio de cada trecho em
+    microssegundos: a duração menos a dos filhos. Ferramentas executadas em paralelo podem somar mais que
+    o nó que as contém; nesse caso o tempo próprio do nó é zero.
+    """
+    totais: dict[str, int] = {}
+    for registro in registros:
+        trechos = {trecho["id"]: trecho for trecho in registro["trechos"]}
+        filhos: dict = {}
+        for trecho in trechos.values():
+            filhos[trecho["pai"]] = filhos.get(trecho["pai"], 0) + trecho.get("duracao_ms", 0)
+
+        def pilha(trecho):
+            nomes = []
+            while trecho is not None:
+                nomes.append(f"{trecho['tipo']}:{trecho['nome']}".replace(";", ","))
+                trecho = trechos.get(trecho["pai"])
+            return ";".join(["turno", *reversed(nomes)])
+
+        proprio_turno = registro["duracao_ms"] - filhos.get(None, 0)
+        totais["turno"] = totais.get("turno", 0) + max(int(proprio_turno * 1000), 0)
+        for trecho in trechos.values():
+            proprio = trecho.get("duracao_ms", 0) - filhos.get(trecho["id"], 0)
+            chave = pilha(trecho)
+            totais[chave] = totais.get(chave, 0) + max(int(proprio * 1000), 0)
+    return [f"{chave} {valor}" for chave, valor in totais.items() if valor]
+
+
+def imprimir_resumo(registros: list[dict]):
+    print(f"{'início':<20}{'turno':<14}{'caminho':<9}{'total ms':>10}{'iter':>6}{'llm ms':>10}{'tools ms':>10}"
+          f"{'tokens in/out':>15}  ferramenta mais lenta")
+    for registro in registros:
+        tools = [t for t in registro["trechos"] if t["tipo"] == "tool"]
+        mais_lenta = max(tools, key=lambda t: t.get("duracao_ms", 0), default=None)
+        lenta = f"{mais_lenta['nome']} ({mais_lenta.get('duracao_ms', 0):.0f} ms)" if mais_lenta else ""
+        tokens = f"{registro['tokens_entrada']}/{registro['tokens_saida']}"
+        print(f"{registro['inicio'][:19]:<20}{registro['turno']:<14}{registro.get('caminho', ''):<9}"
+              f"{registro['duracao_ms']:>10.0f}{registro['iteracoes_llm']:>6}{registro['llm_ms']:>10.0f}"
+              f"{registro['tools_ms']:>10.0f}{tokens:>15}  {lenta}")
+
+
+def imprimir_arvore(registro: dict):
+    print(f"turno {registro['turno']} ({registro['duracao_ms']:.0f} ms, thread {registro['thread_id']})")
+    filhos: dict = {}
+    for trecho in registro["trechos"]:
+        filhos.setdefault(trecho["pai"], []).append(trecho)
+
+    def imprimir(pai, nivel):
+        for trecho in filhos.get(pai, []):
+            extras = {chave: valor for chave, valor in trecho.items()
+                      if chave not in ("id", "pai", "tipo", "nome", "inicio_ms", "duracao_ms")}
+            detalhes = " ".join(f"{chave}={valor}" for chave, valor in extras.items())
+            print(f"{'  ' * nivel}{trecho['tipo']}:{trecho['nome']}  +{trecho['inicio_ms']:.0f} ms  "
+                  f"{trecho.get('duracao_ms', 0):.0f} ms  {detalhes}".rstrip())
+            imprimir(trecho["id"], nivel + 1)
+
+    imprimir(None, 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rastros de execução dos turnos do agente.")
+    parser.add_argument("--arquivo", default=CAMINHO_RASTROS, help="arquivo JSONL dos rastros")
+    parser.add_argument("--ultimos", type=int, default=20, help="quantos turnos recentes considerar (0: todos)")
+    parser.add_argument("--turno", help="mostra a árvore de trechos deste turno")
+    parser.add_argument("--flamegraph", action="store_true", help="exporta as pilhas no formato folded")
+    args = parser.parse_args(argv)
+
+    registros = carregar(args.arquivo)
+    if args.turno:
+        registro = next((r for r in registros if r["turno"] == args.turno), None)
+        if registro is None:
+            parser.error(f"turno {args.turno} não encontrado em {args.arquivo}")
+        imprimir_arvore(registro)
+    elif args.flamegraph:
+        print("\n".join(pilhas_dobradas(registros[-args.ultimos:] if args.ultimos else registros)))
+    else:
+        imprimir_resumo(registros[-args.ultimos:])
+
+
+if __name__ == "__main__":
+    main()
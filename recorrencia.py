@@ -0,0 +1,144 @@
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from dateutil.rrule import rruleset, rrulestr
+
+# Sem `time_max`, recorrências infinitas são expandidas até este número de dias após o início da janela.
+HORIZONTE_EXPANSAO_DIAS = int(os.getenv("RECORRENCIA_HORIZONTE_DIAS", "365"))
+
+_UNTIL = re.compile(r"UNTIL=(\d{8})(?:T(\d{6})(Z?))?(?=;|$)")
+
+
+def _dia_inteiro(valor: dict) -> bool:
+    return "dateTime" not in valor
+
+
+def _zona(evento: dict, fuso: str) -> str:
+    return (evento.get("start") or {}).get("timeZone") or fuso
+
+
+def _local(valor: dict, zona: str) -> datetime:
+    """Horário de parede do `start`/`end` no fuso do evento; ingênuo (sem fuso) para eventos de dia inteiro."""
+    if _dia_inteiro(valor):
+        return datetime.fromisoformat(valor["date"])
+    instante = datetime.fromisoformat(valor["dateTime"])
+    if instante.tzinfo is None:
+        return instante.replace(tzinfo=ZoneInfo(zona))
+    return instante.astimezone(ZoneInfo(zona))
+
+
+def _timestamp(instante: datetime, fuso: str) -> float:
+    if instante.tzinfo is None:
+        instante = instante.replace(tzinfo=ZoneInfo(fuso))
+    return instante.timestamp()
+
+
+def _do_timestamp(valor: float, referencia: datetime, fuso: str) -> datetime:
+    """Converte `valor` para a mesma representação (com ou sem fuso) de `referencia`."""
+    if referencia.tzinfo is None:
+        return datetime.fromtimestamp(valor, ZoneInfo(fuso)).replace(tzinfo=None)
+    return datetime.fromtimestamp(valor, referencia.tzinfo)
+
+
+def _normalizar_until(linha: str, zona: str, dia_inteiro: bool) -> str:
+    """
+    O dateutil exige um UNTIL do mesmo tipo do início: horário de parede (sem fuso) nos eventos de dia inteiro e
+    instante em UTC nos demais. A API aceita qualquer das formas (data, horário flutuante ou UTC), então o UNTIL
+    é convertido no fuso do evento; UNTIL só com data vale até o fim do dia.
+    """
+    def converter(encontrado):
+        data, hora, utc = encontrado.groups()
+        limite = datetime.strptime(data + (hora or "235959"), "%Y%m%d%H%M%S")
+        if utc:
+            limite = limite.replace(tzinfo=timezone.utc).astimezone(ZoneInfo(zona)).replace(tzinfo=None)
+        if dia_inteiro:
+            return f"UNTIL={limite:%Y%m%dT%H%M%S}"
+        return f"UNTIL={limite.replace(tzinfo=ZoneInfo(zona)).astimezone(timezone.utc):%Y%m%dT%H%M%SZ}"
+
+    return _UNTIL.sub(converter, linha)
+
+
+@lru_cache(maxsize=1024)
+def _regra(recorrencia: tuple[str, ...], inicio: str, zona: str, dia_inteiro: bool) -> rruleset:
+    # Chave em texto: datetimes iguais em fusos diferentes têm o mesmo hash e trariam a regra errada do cache.
+    dtstart = datetime.fromisoformat(inicio)
+    if not dia_inteiro:
+        dtstart = dtstart.replace(tzinfo=ZoneInfo(zona))
+    linhas = tuple(_normalizar_until(linha, zona, dia_inteiro) if linha.startswith(("RRULE", "EXRULE")) else linha
+                   for linha in recorrencia)
+    return rrulestr("\n".join(linhas), dtstart=dtstart, forceset=True, tzids=ZoneInfo)
+
+
+def regra(mestre: dict, fuso: str) -> rruleset:
+    """
+    Conjunto de ocorrências (RRULE, RDATE, EXDATE e EXRULE) do evento recorrente `mestre`. Levanta ValueError
+    se a recorrência não puder ser interpretada.
+    """
+    zona = _zona(mestre, fuso)
+    inicio = _local(mestre["start"], zona)
+    return _regra(tuple(mestre["recurrence"]), inicio.replace(tzinfo=None).isoformat(), zona, inicio.tzinfo is None)
+
+
+def _duracao(mestre: dict, fuso: str) -> timedelta:
+    zona = _zona(mestre, fuso)
+    return _local(mestre.get("end") or mestre["start"], zona) - _local(mestre["start"], zona)
+
+
+def fim_da_recorrencia(mestre: dict, fuso: str) -> float | None:
+    """Timestamp do fim da última ocorrência, ou None se alguma regra não tiver COUNT nem UNTIL."""
+    for linha in mestre["recurrence"]:
+        if linha.startswith("RRULE") and "COUNT=" not in linha and "UNTIL=" not in linha:
+            return None
+    ocorrencias = list(regra(mestre, fuso))
+    if not ocorrencias:
+        return _timestamp(_local(mestre["start"], _zona(mestre, fuso)), fuso)
+    return _timestamp(ocorrencias[-1] + _duracao(mestre, fuso), fuso)
+
+
+def instancia(mestre: dict, ocorrencia: datetime, fuso: str) -> dict:
+    """Recurso `Event` da ocorrência, no mesmo formato das instâncias devolvidas pela API com `singleEvents`."""
+    fim = ocorrencia + _duracao(mestre, fuso)
+    if ocorrencia.tzinfo is None:
+        sufixo = f"{ocorrencia:%Y%m%d}"
+        inicio, termino = {"date": ocorrencia.date().isoformat()}, {"date": fim.date().isoformat()}
+    else:
+        zona = _zona(mestre, fuso)
+        sufixo = ocorrencia.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        inicio = {"dateTime": ocorrencia.isoformat(), "timeZone": zona}
+        termino = {"dateTime": fim.isoformat(), "timeZone": zona}
+
+    recurso = {chave: valor for chave, valor in mestre.items() if chave != "recurrence"}
+    recurso.update(id=f"{mestre['id']}_{sufixo}", start=inicio, end=termino, originalStartTime=inicio,
+                   recurringEventId=mestre["id"])
+    return recurso
+
+
+def expandir(mestre: dict, fuso: str, inicio: float | None = None, fim: float | None = None,
+             excecoes: frozenset[float] = frozenset()):
+    """
+    Gera, em ordem, `(timestamp_inicio, recurso)` das ocorrências de `mestre` que se sobrepõem à janela
+    [inicio, fim) (timestamps POSIX), pulando as que começariam em `excecoes` (início original das ocorrências
+    alteradas ou canceladas, que o espelho guarda à parte). Sem `fim`, para em `HORIZONTE_EXPANSAO_DIAS`.
+    """
+    conjunto = regra(mestre, fuso)
+    primeira = _local(mestre["start"], _zona(mestre, fuso))
+    duracao = _duracao(mestre, fuso)
+    if fim is None:
+        fim = (inicio if inicio is not None else _timestamp(primeira, fuso)) + HORIZONTE_EXPANSAO_DIAS * 86400
+
+    if inicio is None:
+        ocorrencias = iter(conjunto)
+    else:
+        # Ocorrências que começam antes da janela mas ainda não terminaram também se sobrepõem a ela.
+        desde = _do_timestamp(inicio, primeira, fuso) - duracao
+        ocorrencias = conjunto.xafter(desde, inc=False)
+
+    for ocorrencia in ocorrencias:
+        timestamp = _timestamp(ocorrencia, fuso)
+        if timestamp >= fim:
+            return
+        if timestamp not in excecoes:
+            yield timestamp, instancia(mestre, ocorrencia, fuso)
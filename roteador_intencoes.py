@@ -0,0 +1,134 @@
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from google_calendar_functions import consultar_disponibilidade, listar_eventos_varios_calendarios
+from perfil_usuario import FIM_EXPEDIENTE, FUSO_HORARIO, INICIO_EXPEDIENTE
+
+DIAS_DA_SEMANA = ("segunda", "terça", "quarta", "quinta", "sexta", "sábado", "domingo")
+
+# Pedidos que alteram a agenda (ou citam algo além do previsto) nunca seguem pelo caminho rápido.
+_ESCRITA = re.compile(r"\b(cri\w*|cancel\w*|exclu\w*|apag\w*|remov\w*|mov\w*|alter\w*|mud\w*|atualiz\w*|desmarc\w*)\b")
+# Qualificadores que mudam o sentido do pedido (negação, outro dia, parte do dia, um calendário específico):
+# os modelos fixos não os tratam, então o pedido segue para o agente.
+_QUALIFICADORES = re.compile(
+    r"\b(?:nao|nunca|nem|depois de|antes de|(?:da|a|de|na|pela) (?:manha|tarde|noite|madrugada)|pm)\b"
+    r"|\bcalendarios?\b"
+    r"|\b(?:agendas?|compromissos|eventos|reunioes)\s+(?:do|da|dos|das|no|na|nos|nas)\b"
+)
+# "amanhã" precisa ser o dia consultado, no fim da frase: "agenda de amanhã", "o que tenho amanhã?".
+_AGENDA_AMANHA = re.compile(
+    r"^(?:.*\s)?(?:compromissos|agenda|eventos|reunioes|o que (?:eu )?tenho)(?:\s.*)?\s(?:de |para )?amanha[\s?.!]*$"
+)
+_DISPONIBILIDADE_HORA = re.compile(
+    r"\b(?:semana que vem|proxima semana)\b.*\b(?:disponib\w*|livre)\b.*\b(?:as|a)\s*(\d{1,2})\s*(?:h|hs|hrs|horas)\b"
+)
+_AGENDAR_DAQUI = re.compile(
+    r"\b(?:agendamento|agendar|marcar)\b.*\b(?:evento|reuniao|compromisso)\b.*\bdaqui (?:a )?(tres|3|dois|2|quatro|4) dias\b"
+)
+_NUMEROS = {"dois": 2, "tres": 3, "quatro": 4}
+
+
+def _normalizar(texto: str) -> str:
+    sem_acento = unicodedata.normalize("NFKD", texto.lower()).encode("ascii", "ignore").decode()
+    return " ".join(sem_acento.split())
+
+
+def _dia(data: datetime) -> str:
+    return f"{DIAS_DA_SEMANA[data.weekday()]} ({data:%d/%m})"
+
+
+def _hora(valor: dict) -> str | None:
+    if "dateTime" not in valor:
+        return None
+    return datetime.fromisoformat(valor["dateTime"]).astimezone(ZoneInfo(FUSO_HORARIO)).strftime("%H:%M")
+
+
+def agenda_de_amanha(agora: datetime) -> str | None:
+    # Todos os calendários visíveis, como a ferramenta de agenda geral, mas só a janela de amanhã, direto da API:
+    # uma sessão nova não espera a sincronização completa do espelho. Se algum calendário falhar, a resposta
+    # sairia incompleta e o pedido segue para o agente.
+    inicio = (agora + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    fim = inicio + timedelta(days=1)
+    resultado = listar_eventos_varios_calendarios(None, 50, inicio.isoformat(), fim.isoformat(), usar_espelho=False)
+    if resultado.get('calendarios_com_erro'):
+        return None
+    eventos = resultado['eventos']
+    if not eventos:
+        return f"Você não tem compromissos amanhã, {_dia(inicio)}. Quer aproveitar para planejar algo?"
+
+    linhas = [f"Seus compromissos de amanhã, {_dia(inicio)}:"]
+    for evento in eventos:
+        comeco, termino = _hora(evento.get('start') or {}), _hora(evento.get('end') or {})
+        horario = f"{comeco}–{termino}" if comeco and termino else "dia todo"
+        detalhes = f" · {evento['location']}" if evento.get('location') else ""
+        linhas.append(f"- {horario}: {evento.get('summary') or '(sem título)'}{detalhes}")
+    return "\n".join(linhas)
+
+
+def disponibilidade_na_hora(agora: datetime, hora: int) -> str | None:
+    segunda = (agora + timedelta(days=7 - agora.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    sabado = segunda + timedelta(days=5)
+    resultado = consultar_disponibilidade(segunda.isoformat(), sabado.isoformat(), 60)
+    if isinstance(resultado, str) or resultado.get('calendarios_com_erro'):
+        return None
+
+    livres = [(datetime.fromisoformat(janela['inicio']), datetime.fromisoformat(janela['fim']))
+              for janela in resultado['horarios_livres']]
+    dias = []
+    for deslocamento in range(5):
+        inicio = (segunda + timedelta(days=deslocamento)).replace(hour=hora)
+        if any(a <= inicio and inicio + timedelta(hours=1) <= b for a, b in livres):
+            dias.append(_dia(inicio))
+
+    if not dias:
+        return (f"Na semana que vem você não tem nenhum dia com horário livre às {hora}h dentro do seu expediente. "
+                f"Quer que eu procure outro horário?")
+    return (f"Na semana que vem você está livre às {hora}h (por uma hora) em: {', '.join(dias)}. "
+            f"Quer que eu agende a reunião em algum desses dias?")
+
+
+def horarios_para_agendar(agora: datetime, dias: int) -> str | None:
+    inicio = (agora + timedelta(days=dias)).replace(hour=0, minute=0, second=0, microsecond=0)
+    resultado = consultar_disponibilidade(inicio.isoformat(), (inicio + timedelta(days=1)).isoformat(), 30)
+    if isinstance(resultado, str) or resultado.get('calendarios_com_erro'):
+        return None
+
+    janelas = [f"{datetime.fromisoformat(j['inicio']):%H:%M}–{datetime.fromisoformat(j['fim']):%H:%M}"
+               for j in resultado['horarios_livres']]
+    if not janelas:
+        return (f"Daqui {dias} dias, {_dia(inicio)}, sua agenda de trabalho já está cheia. "
+                f"Quer que eu procure horário em outro dia?")
+    return (f"Claro! Daqui {dias} dias, {_dia(inicio)}, você tem estes horários livres: {', '.join(janelas)}. "
+            f"Qual o título do evento, o horário e a duração que prefere?")
+
+
+def responder_rapido(texto: str, agora: datetime | None = None) -> tuple[str, str] | None:
+    """
+    Responde sem o LLM aos pedidos simples e previsíveis (os atalhos iniciais do app), consultando a agenda
+    diretamente e formatando a resposta com um modelo fixo. Retorna `(intencao, resposta)`, ou None quando o
+    pedido não é reconhecido com segurança e deve seguir para o agente.
+    """
+    normalizado = _normalizar(texto)
+    if len(normalizado) > 200 or _ESCRITA.search(normalizado) or _QUALIFICADORES.search(normalizado):
+        return None
+    agora = agora or datetime.now(ZoneInfo(FUSO_HORARIO))
+
+    if _AGENDA_AMANHA.match(normalizado):
+        resposta = agenda_de_amanha(agora)
+        return ("agenda_amanha", resposta) if resposta else None
+
+    # Sem "da manhã"/"da tarde", só horas dentro do expediente são inequívocas ("às 3h" costuma ser 15h).
+    correspondencia = _DISPONIBILIDADE_HORA.search(normalizado)
+    if correspondencia and INICIO_EXPEDIENTE.hour <= int(correspondencia.group(1)) < FIM_EXPEDIENTE.hour:
+        resposta = disponibilidade_na_hora(agora, int(correspondencia.group(1)))
+        return ("disponibilidade_hora", resposta) if resposta else None
+
+    correspondencia = _AGENDAR_DAQUI.search(normalizado)
+    if correspondencia:
+        dias = _NUMEROS.get(correspondencia.group(1)) or int(correspondencia.group(1))
+        resposta = horarios_para_agendar(agora, dias)
+        return ("agendar_daqui", resposta) if resposta else None
+
+    return None
@@ -0,0 +1,37 @@
+import sqlite3
+
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from checkpointer import criar_checkpointer, podar
+
+
+def _conversas(caminho, threads, passos):
+    saver = criar_checkpointer(caminho)
+    saver.setup()
+    for thread_id in threads:
+        config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+        for _ in range(passos):
+            checkpoint = empty_checkpoint()
+            checkpoint["channel_values"] = {"mensagens": "x" * 5000}
+            config = saver.put(config, checkpoint, {}, {})
+    saver.conn.close()
+
+
+def test_poda_compacta_e_libera_paginas_de_banco_antigo(tmp_path):
+    caminho = str(tmp_path / "checkpoints.sqlite")
+    # Banco criado sem `auto_vacuum`, como os anteriores a essa configuração.
+    antigo = sqlite3.connect(caminho)
+    SqliteSaver(antigo).setup()
+    antigo.close()
+    _conversas(caminho, [str(t) for t in range(6)], 4)
+
+    assert podar(caminho, maximo_threads=3) == {"threads_removidas": 3, "linhas_removidas": 21}
+    _conversas(caminho, ["nova"], 3)
+    assert podar(caminho, maximo_threads=3)["threads_removidas"] == 1
+
+    conexao = sqlite3.connect(caminho)
+    assert conexao.execute("PRAGMA auto_vacuum").fetchone() == (2,)
+    assert conexao.execute("PRAGMA freelist_count").fetchone() == (0,)
+    assert conexao.execute("SELECT COUNT(*), COUNT(parent_checkpoint_id) FROM checkpoints").fetchone() == (3, 0)
+    conexao.close()
@@ -0,0 +1,21 @@
+import pytest
+
+import google_calendar_functions
+from espelho_eventos import CAMINHO_ESPELHO
+from google_api import token_path
+from google_calendar_functions import _caminho_espelho, obter_cliente
+
+
+def test_conta_sem_token_e_recusada_por_padrao(monkeypatch):
+    monkeypatch.setattr(google_calendar_functions.credenciais, "has_token", lambda conta: False)
+    monkeypatch.setitem(google_calendar_functions._clientes, "", object())
+    with pytest.raises(PermissionError, match="autorizar_conta.py"):
+        obter_cliente("maria@exemplo.com")
+
+
+def test_identificadores_parecidos_nao_compartilham_arquivos():
+    contas = ["joao.silva@x.com", "joao_silva@x_com"]
+    assert len({token_path("calendar", "v3", conta) for conta in contas}) == 2
+    assert len({_caminho_espelho(conta) for conta in contas}) == 2
+    assert token_path("calendar", "v3").endswith("token_calendar_v3-.json")
+    assert _caminho_espelho("") == CAMINHO_ESPELHO
@@ -0,0 +1,45 @@
+import pytest
+from googleapiclient.discovery import build_from_document
+
+import google_calendar_functions
+from benchmarks.api_falsa import ApiCalendarioFalsa
+from espelho_eventos import EspelhoEventos
+from google_api import HttpPool, load_discovery_document
+from google_calendar_functions import criar_eventos_em_lote, excluir_evento, registrar_cliente, turno_atual
+
+EVENTOS = [{"start": "2025-06-11T10:00:00-03:00", "end": "2025-06-11T11:00:00-03:00", "summary": "Revisão"}]
+
+
+@pytest.fixture
+def api(monkeypatch, tmp_path):
+    api = ApiCalendarioFalsa({"primary": []})
+
+    class HttpPoolFalso(HttpPool):
+        def _new_connection(self):
+            return api
+
+    monkeypatch.setattr(google_calendar_functions, "_clientes", {})
+    documento = load_discovery_document(google_calendar_functions.API_NAME, google_calendar_functions.API_VERSION)
+    registrar_cliente("", build_from_document(documento, http=api), HttpPoolFalso(None),
+                      EspelhoEventos(str(tmp_path / "espelho.sqlite")))
+    turno_atual.set("turno-1")
+    return api
+
+
+def _ativos(api):
+    return [evento for evento in api.calendarios["primary"].values() if evento.get("status") != "cancelled"]
+
+
+def test_reenvio_do_lote_devolve_o_evento_existente(api):
+    primeiro = criar_eventos_em_lote(EVENTOS, send_notifications=False)
+    segundo = criar_eventos_em_lote(EVENTOS, send_notifications=False)
+    assert segundo == primeiro
+    assert len(_ativos(api)) == 1
+
+
+def test_evento_excluido_no_turno_e_criado_de_novo(api):
+    [primeiro] = criar_eventos_em_lote(EVENTOS, send_notifications=False)
+    excluir_evento(primeiro["event_id"])
+    [segundo] = criar_eventos_em_lote(EVENTOS, send_notifications=False)
+    assert segundo["sucesso"] and segundo["event_id"] != primeiro["event_id"]
+    assert [evento["id"] for evento in _ativos(api)] == [segundo["event_id"]]
@@ -0,0 +1,43 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import google_calendar_functions
+from google_calendar_functions import consultar_disponibilidade, planejar_tarefas
+from planejador import Tarefa
+
+FUSO = ZoneInfo("America/Sao_Paulo")
+
+
+def test_intervalo_sem_fuso_usa_o_fuso_do_usuario(monkeypatch):
+    consultas = []
+
+    def consultar_ocupado(time_min, time_max, calendar_ids=None, timezone="America/Sao_Paulo"):
+        consultas.append((time_min, time_max))
+        return {"primary": [(datetime(2025, 6, 9, 9, tzinfo=FUSO), datetime(2025, 6, 9, 10, tzinfo=FUSO))]}, {}
+
+    monkeypatch.setattr(google_calendar_functions, "consultar_ocupado", consultar_ocupado)
+    resultado = consultar_disponibilidade("2025-06-09T09:00:00", "2025-06-09T12:00:00")
+
+    assert consultas == [("2025-06-09T09:00:00-03:00", "2025-06-09T12:00:00-03:00")]
+    assert resultado["horarios_livres"] == [{"inicio": "2025-06-09T10:00:00-03:00", "fim": "2025-06-09T12:00:00-03:00"}]
+
+
+def test_prazo_sem_fuso_usa_o_mesmo_fuso():
+    tarefa = Tarefa.de_dict(0, {"summary": "Relatório", "duracao_minutos": 60, "prazo": "2025-06-09T12:00:00"})
+    assert tarefa.prazo == datetime(2025, 6, 9, 12, tzinfo=FUSO)
+
+
+def test_planejamento_sem_fuso_compara_janela_e_prazo_no_mesmo_fuso(monkeypatch):
+    consultas = []
+
+    def consultar_ocupado(time_min, time_max, calendar_ids=None, timezone="America/Sao_Paulo"):
+        consultas.append((time_min, time_max))
+        return {"primary": []}, {}
+
+    monkeypatch.setattr(google_calendar_functions, "consultar_ocupado", consultar_ocupado)
+    tarefas = [{"summary": "Relatório", "duracao_minutos": 60, "prazo": "2025-06-09T10:00:00"}]
+    resultado = planejar_tarefas(tarefas, "2025-06-09T09:00:00", "2025-06-09T12:00:00", apenas_simular=True)
+
+    assert consultas == [("2025-06-09T09:00:00-03:00", "2025-06-09T12:00:00-03:00")]
+    assert resultado["agendadas"] == [{"indice": 0, "summary": "Relatório", "inicio": "2025-06-09T09:00:00-03:00",
+                                       "fim": "2025-06-09T10:00:00-03:00"}]
@@ -0,0 +1,22 @@
+import rastreamento
+from rastreamento import RastreadorTurno, carregar, encerrar_gravacao
+
+
+def test_rastros_giram_ao_atingir_o_tamanho_maximo(tmp_path, monkeypatch):
+    monkeypatch.setattr(rastreamento, "TAMANHO_MAXIMO_RASTROS", 2000)
+    monkeypatch.setattr(rastreamento, "ARQUIVOS_ANTIGOS_RASTROS", 2)
+    caminho = str(tmp_path / "rastros.jsonl")
+
+    turnos = []
+    for _ in range(20):
+        rastro = RastreadorTurno("thread", caminho)
+        with rastro.trecho("responder_rapido", tipo="roteador", texto="x" * 300):
+            pass
+        turnos.append(rastro.finalizar(caminho="rapido")["turno"])
+    encerrar_gravacao()
+
+    assert sorted(arquivo.name for arquivo in tmp_path.iterdir()) == [
+        "rastros.jsonl", "rastros.jsonl.1", "rastros.jsonl.2"]
+    gravados = [registro["turno"] for registro in carregar(caminho)]
+    assert 0 < len(gravados) < len(turnos)
+    assert gravados == turnos[-len(gravados):]
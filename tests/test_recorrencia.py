@@ -0,0 +1,48 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from espelho_eventos import EspelhoEventos, para_timestamp
+from recorrencia import expandir, fim_da_recorrencia
+
+FUSO = "America/Sao_Paulo"
+
+
+def _inicios(mestre, time_min, time_max):
+    return [recurso["start"] for _, recurso in expandir(mestre, FUSO, para_timestamp(time_min), para_timestamp(time_max))]
+
+
+def test_dia_inteiro_com_until_em_utc():
+    mestre = {"id": "aniversario", "start": {"date": "2025-06-02"}, "end": {"date": "2025-06-03"},
+              "recurrence": ["RRULE:FREQ=DAILY;UNTIL=20250605T025959Z"]}
+    # 02:59:59Z do dia 5 ainda é dia 4 em São Paulo: a última ocorrência é a do dia 4.
+    assert _inicios(mestre, "2025-06-01T00:00:00-03:00", "2025-06-30T00:00:00-03:00") == [
+        {"date": "2025-06-02"}, {"date": "2025-06-03"}, {"date": "2025-06-04"}]
+    assert fim_da_recorrencia(mestre, FUSO) == para_timestamp("2025-06-05T00:00:00-03:00")
+
+
+def test_horario_com_until_flutuante():
+    mestre = {"id": "daily", "start": {"dateTime": "2025-06-02T09:00:00-03:00", "timeZone": FUSO},
+              "end": {"dateTime": "2025-06-02T09:15:00-03:00", "timeZone": FUSO},
+              "recurrence": ["RRULE:FREQ=DAILY;UNTIL=20250604T090000"]}
+    inicios = _inicios(mestre, "2025-06-01T00:00:00-03:00", "2025-06-30T00:00:00-03:00")
+    assert [datetime.fromisoformat(inicio["dateTime"]) for inicio in inicios] == [
+        datetime(2025, 6, dia, 9, tzinfo=ZoneInfo(FUSO)) for dia in (2, 3, 4)]
+
+
+def test_horario_com_until_so_data_inclui_o_dia_inteiro():
+    mestre = {"id": "noturno", "start": {"dateTime": "2025-06-02T22:00:00-03:00", "timeZone": FUSO},
+              "end": {"dateTime": "2025-06-02T23:00:00-03:00", "timeZone": FUSO},
+              "recurrence": ["RRULE:FREQ=DAILY;UNTIL=20250603"]}
+    assert len(_inicios(mestre, "2025-06-01T00:00:00-03:00", "2025-06-30T00:00:00-03:00")) == 2
+
+
+def test_recorrencia_invalida_nao_interrompe_a_sincronizacao(tmp_path):
+    espelho = EspelhoEventos(str(tmp_path / "espelho.sqlite"))
+    invalido = {"id": "invalido", "start": {"dateTime": "2025-06-02T09:00:00-03:00"},
+                "end": {"dateTime": "2025-06-02T10:00:00-03:00"}, "recurrence": ["RRULE:FREQ=NUNCA"]}
+    avulso = {"id": "avulso", "start": {"dateTime": "2025-06-03T09:00:00-03:00"},
+              "end": {"dateTime": "2025-06-03T10:00:00-03:00"}}
+    espelho._aplicar("primary", [invalido, avulso], FUSO, "token", completo=True)
+
+    eventos = espelho.consultar("primary", "2025-06-01T00:00:00-03:00", "2025-06-30T00:00:00-03:00")
+    assert [evento["id"] for evento in eventos] == ["avulso"]
@@ -0,0 +1,74 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+import roteador_intencoes
+from roteador_intencoes import responder_rapido
+
+AGORA = datetime(2025, 6, 4, 10, 0, tzinfo=ZoneInfo("America/Sao_Paulo"))
+
+
+@pytest.fixture
+def agenda(monkeypatch):
+    chamadas = []
+
+    def listar_eventos_varios_calendarios(calendar_ids, max_capacity, time_min, time_max, usar_espelho=True):
+        chamadas.append((calendar_ids, time_min, time_max, usar_espelho))
+        return {"eventos": [{"summary": "Dentista", "start": {"dateTime": "2025-06-05T10:00:00-03:00"},
+                             "end": {"dateTime": "2025-06-05T11:00:00-03:00"}, "calendarios": ["pessoal"]}]}
+
+    def consultar_disponibilidade(time_min, time_max, duracao_minutos):
+        return {"horarios_livres": [{"inicio": "2025-06-09T15:00:00-03:00", "fim": "2025-06-09T17:00:00-03:00"}]}
+
+    monkeypatch.setattr(roteador_intencoes, "listar_eventos_varios_calendarios", listar_eventos_varios_calendarios)
+    monkeypatch.setattr(roteador_intencoes, "consultar_disponibilidade", consultar_disponibilidade)
+    return chamadas
+
+
+@pytest.mark.parametrize("texto", [
+    "Eu preciso saber quais são meus compromissos de amanhã.",
+    "O que tenho amanhã?",
+    "agenda de amanhã",
+])
+def test_agenda_de_amanha_consulta_todos_os_calendarios(agenda, texto):
+    intencao, resposta = responder_rapido(texto, AGORA)
+    assert intencao == "agenda_amanha"
+    assert "Dentista" in resposta
+    assert agenda == [(None, "2025-06-05T00:00:00-03:00", "2025-06-06T00:00:00-03:00", False)]
+
+
+def test_agenda_de_amanha_com_calendario_indisponivel_segue_para_o_agente(monkeypatch):
+    monkeypatch.setattr(roteador_intencoes, "listar_eventos_varios_calendarios",
+                        lambda *args, **kwargs: {"eventos": [], "calendarios_com_erro": {"trabalho": "notFound"}})
+    assert responder_rapido("Quais são meus compromissos de amanhã?", AGORA) is None
+
+
+def test_disponibilidade_na_hora_do_atalho(agenda):
+    texto = "Na semana que vem quais dias eu tenho disponibilidade para agendar uma reunião as 15hrs?."
+    intencao, resposta = responder_rapido(texto, AGORA)
+    assert intencao == "disponibilidade_hora"
+    assert "segunda (09/06)" in resposta
+
+
+@pytest.mark.parametrize("texto", [
+    "o que tenho depois de amanhã?",
+    "agenda do trabalho amanhã",
+    "compromissos no calendário Família amanhã",
+    "não quero ver a agenda de amanhã",
+    "quais compromissos tenho amanhã à tarde?",
+    "semana que vem estou livre às 3h da tarde?",
+    "semana que vem estou livre às 3h?",
+    "quero cancelar a reunião de amanhã",
+])
+def test_pedidos_ambiguos_seguem_para_o_agente(agenda, texto):
+    assert responder_rapido(texto, AGORA) is None
+    assert agenda == []
+
+
+def test_agendamento_daqui_tres_dias(agenda, monkeypatch):
+    monkeypatch.setattr(roteador_intencoes, "consultar_disponibilidade", lambda *args: {
+        "horarios_livres": [{"inicio": "2025-06-07T09:00:00-03:00", "fim": "2025-06-07T12:00:00-03:00"}]})
+    intencao, resposta = responder_rapido("Poderia me ajudar com o agendamento de um evento para daqui três dias?", AGORA)
+    assert intencao == "agendar_daqui"
+    assert "09:00–12:00" in resposta
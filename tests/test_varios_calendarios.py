@@ -0,0 +1,50 @@
+import google_calendar_functions
+from google_calendar_functions import listar_eventos_varios_calendarios
+from modelos import Evento
+
+CALENDARIOS = [
+    {"id": "eu@exemplo.com", "primary": True, "access_role": "owner"},
+    {"id": "projetos", "primary": False, "access_role": "owner"},
+    {"id": "feriados", "primary": False, "access_role": "reader"},
+    {"id": "equipe", "primary": False, "access_role": "writer"},
+    {"id": "sala", "primary": False, "access_role": "freeBusyReader"},
+]
+
+
+def _evento(calendar_id):
+    return Evento.de_recurso({"id": calendar_id, "summary": calendar_id,
+                              "start": {"dateTime": "2025-06-05T10:00:00-03:00"},
+                              "end": {"dateTime": "2025-06-05T11:00:00-03:00"}})
+
+
+def test_so_os_calendarios_do_usuario_vao_para_o_espelho(monkeypatch):
+    espelhados, na_janela = [], []
+
+    def listar_eventos_calendario(calendar_id, max_capacity, time_min, time_max):
+        espelhados.append(calendar_id)
+        return [_evento(calendar_id)]
+
+    def listar_eventos_janela(calendar_id, max_capacity, time_min, time_max):
+        na_janela.append((calendar_id, time_min, time_max))
+        return [_evento(calendar_id)]
+
+    monkeypatch.setattr(google_calendar_functions, "iterar_calendarios", lambda: iter(CALENDARIOS))
+    monkeypatch.setattr(google_calendar_functions, "listar_eventos_calendario", listar_eventos_calendario)
+    monkeypatch.setattr(google_calendar_functions, "listar_eventos_janela", listar_eventos_janela)
+    resultado = listar_eventos_varios_calendarios(None, 50, "2025-06-05T00:00:00-03:00", "2025-06-06T00:00:00-03:00")
+
+    assert sorted(espelhados) == ["eu@exemplo.com", "projetos"]
+    assert sorted(na_janela) == [("equipe", "2025-06-05T00:00:00-03:00", "2025-06-06T00:00:00-03:00"),
+                                 ("feriados", "2025-06-05T00:00:00-03:00", "2025-06-06T00:00:00-03:00")]
+    assert len(resultado["eventos"]) == 4
+
+
+def test_sem_espelho_todos_sao_consultados_na_janela(monkeypatch):
+    na_janela = []
+    monkeypatch.setattr(google_calendar_functions, "iterar_calendarios", lambda: iter(CALENDARIOS))
+    monkeypatch.setattr(google_calendar_functions, "listar_eventos_calendario", None)
+    monkeypatch.setattr(google_calendar_functions, "listar_eventos_janela",
+                        lambda calendar_id, *args: na_janela.append(calendar_id) or [])
+    listar_eventos_varios_calendarios(None, 50, "2025-06-05T00:00:00-03:00", "2025-06-06T00:00:00-03:00",
+                                      usar_espelho=False)
+    assert sorted(na_janela) == ["equipe", "eu@exemplo.com", "feriados", "projetos"]